@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 
 
@@ -21,6 +21,15 @@ class Command:
     error: Optional[str] = None             # Error message
     execution_time: Optional[float] = None  # Execution time in seconds
     
+    # Large results live in a blob: result is then None until loaded from the repository
+    result_ref: Optional[str] = None         # Blob reference
+    result_size: Optional[int] = None        # Result size in bytes (UTF-8)
+    result_sha256: Optional[str] = None      # Result content hash
+    
+    # Dispatch lease: a processing command must be renewed by its client before this deadline
+    lease_expires_at: Optional[datetime] = None
+    delivery_attempts: int = 0               # Times the command was handed to a client
+    
     @classmethod
     def create_new_command(cls, target_client_id: str, content: str, command_type: str = "shell") -> "Command":
         """Business rule: command.unique_id - create new command with generated unique ID"""
@@ -37,25 +46,53 @@ class Command:
         """Business rule: command.pending_state - check if command is waiting for execution"""
         return self.status == "pending"
     
-    def mark_as_processing(self) -> None:
+    def mark_as_processing(self, lease_seconds: Optional[float] = None) -> None:
         """Business rule: command.status_flow - mark command as being executed"""
         self.status = "processing"
         self.started_at = datetime.utcnow()
+        self.delivery_attempts += 1
+        if lease_seconds:
+            self.extend_lease(lease_seconds)
+    
+    def extend_lease(self, lease_seconds: float) -> None:
+        """Business rule: command.lease - client is still working on the command"""
+        self.lease_expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+    
+    def is_lease_expired(self, now: Optional[datetime] = None) -> bool:
+        """Business rule: command.lease - processing command whose client stopped renewing it"""
+        if self.status != "processing" or self.lease_expires_at is None:
+            return False
+        return (now or datetime.utcnow()) >= self.lease_expires_at
+    
+    def return_to_pending(self) -> None:
+        """Business rule: command.redelivery - make an abandoned command available for dispatch again"""
+        self.status = "pending"
+        self.started_at = None
+        self.lease_expires_at = None
     
     def mark_as_completed(self, result: str, execution_time: float) -> None:
         """Business rule: command.result_capture - mark command as completed with results"""
         self.status = "completed"
         self.completed_at = datetime.utcnow()
+        self.lease_expires_at = None
         self.result = result
+        self.result_ref = None
+        self.result_size = None
+        self.result_sha256 = None
         self.execution_time = execution_time
     
     def mark_as_failed(self, error: str, execution_time: float = 0.0) -> None:
         """Business rule: command.result_capture - mark command as failed with error"""
         self.status = "failed"
         self.completed_at = datetime.utcnow()
+        self.lease_expires_at = None
         self.error = error
         self.execution_time = execution_time
     
+    def has_stored_result(self) -> bool:
+        """Business rule: command.result_capture - result kept out of the record, load it via the repository"""
+        return self.result is None and self.result_ref is not None
+    
     def is_completed(self) -> bool:
         """Check if command execution is finished (success or failure)"""
         return self.status in ["completed", "failed"]
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+import heapq
+
+# Position in the listing order: (created_at ISO string, command_id)
+CommandCursor = Tuple[str, str]
+T = TypeVar("T")
+
+
+@dataclass
+class CommandQuery:
+    """Filters, order and page of a command listing
+
+    Commands are ordered by (created_at, command_id), which is unique and
+    stable, so a cursor holding the last key of a page resumes exactly after
+    it even while new commands arrive. created_at is compared as its ISO
+    string, the form every repository stores.
+    """
+    status: Optional[str] = None
+    target_client_id: Optional[str] = None
+    command_type: Optional[str] = None
+    created_since: Optional[datetime] = None
+    after: Optional[CommandCursor] = None
+    descending: bool = False
+    limit: Optional[int] = None
+
+    def _matches(self, status: str, target_client_id: str, command_type: str, key: CommandCursor) -> bool:
+        if self.status and status != self.status:
+            return False
+        if self.target_client_id and target_client_id != self.target_client_id:
+            return False
+        if self.command_type and command_type != self.command_type:
+            return False
+        if self.created_since and key[0] < self.created_since.isoformat():
+            return False
+        if self.after and ((key >= self.after) if self.descending else (key <= self.after)):
+            return False
+        return True
+
+    def matches(self, command) -> bool:
+        """Business rule: command.listing - check a Command entity against the filters and cursor"""
+        return self._matches(command.status, command.target_client_id, command.type, self.command_key(command))
+
+    def matches_record(self, record: dict) -> bool:
+        """Business rule: command.listing - check a stored record against the filters and cursor"""
+        return self._matches(record.get("status", "pending"), record.get("target_client_id"),
+                             record.get("type", "shell"), self.record_key(record))
+
+    @staticmethod
+    def command_key(command) -> CommandCursor:
+        return command.created_at.isoformat() if command.created_at else "", command.command_id
+
+    @staticmethod
+    def record_key(record: dict) -> CommandCursor:
+        return record.get("created_at") or "", record["command_id"]
+
+    def select(self, items: Iterable[T], matches: Callable[[T], bool], key: Callable[[T], CommandCursor]) -> List[T]:
+        """Matching items in listing order, at most limit of them (a partial sort when limited)"""
+        matching = (item for item in items if matches(item))
+        if self.limit is None:
+            return sorted(matching, key=key, reverse=self.descending)
+        pick = heapq.nlargest if self.descending else heapq.nsmallest
+        return pick(self.limit, matching, key=key)
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ResultRange:
+    """Part of a command result a caller asked for (offsets and lengths in characters)"""
+    offset: Optional[int] = None
+    length: Optional[int] = None
+    tail_lines: Optional[int] = None  # Last N lines; takes precedence over offset
+
+    def is_full(self) -> bool:
+        """Check if the whole result was requested"""
+        return self.offset is None and self.length is None and self.tail_lines is None
+
+
+@dataclass
+class ResultSlice:
+    content: str
+    offset: int         # Character offset of content within the full result
+    total_length: int   # Characters in the full result
+
+    @property
+    def truncated(self) -> bool:
+        """Business rule: command.result_range - True if the slice is not the whole result"""
+        return len(self.content) < self.total_length
+
+
+def tail_start(text: str, lines: int) -> int:
+    """Offset of the last ``lines`` lines of text, scanning back from the end only"""
+    # A trailing newline ends the last line rather than starting an empty one
+    position = len(text) - 1 if text.endswith("\n") else len(text)
+    for _ in range(lines):
+        position = text.rfind("\n", 0, position)
+        if position < 0:
+            return 0
+    return position + 1
+
+
+def slice_text(text: str, result_range: ResultRange) -> ResultSlice:
+    """Business rule: command.result_range - cut the requested range out of an inline result"""
+    if result_range.tail_lines is not None:
+        start = tail_start(text, result_range.tail_lines)
+    else:
+        start = min(result_range.offset or 0, len(text))
+    end = len(text) if result_range.length is None else min(start + result_range.length, len(text))
+    return ResultSlice(content=text[start:end], offset=start, total_length=len(text))
@@ -1,12 +1,17 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from brief_bridge.web.client_router import router as client_router
 from brief_bridge.web.command_router import router as command_router
 from brief_bridge.web.tunnel_router import router as tunnel_router
 from brief_bridge.web.install_router import router as install_router
 from brief_bridge.web.file_router import router as file_router
+from brief_bridge.web.dependencies import get_client_repository, get_command_repository, get_command_event_bus, get_command_archive, get_client_presence_table, get_command_output_buffer
+from brief_bridge.use_cases.command_lease_use_case import CommandLeaseUseCase
+from brief_bridge.use_cases.command_retention_use_case import CommandRetentionUseCase
+from brief_bridge.use_cases.client_presence_use_case import ClientPresenceUseCase
 from brief_bridge.services.ngrok_manager import cleanup_all_ngrok_tunnels
 
 # Global flag to prevent multiple cleanup attempts
@@ -30,12 +35,41 @@ async def cleanup_handler():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    client_repository = app.dependency_overrides.get(get_client_repository, get_client_repository)()
+    command_repository = app.dependency_overrides.get(get_command_repository, get_command_repository)()
+    await client_repository.start()
+    await command_repository.start()
+    # Requeue or fail commands whose client stopped renewing the lease
+    event_bus = app.dependency_overrides.get(get_command_event_bus, get_command_event_bus)()
+    output_buffer = app.dependency_overrides.get(get_command_output_buffer, get_command_output_buffer)()
+    lease_use_case = CommandLeaseUseCase(command_repository, event_bus, output_buffer=output_buffer)
+    lease_sweeper = asyncio.create_task(lease_use_case.run_lease_sweeper())
+    # Move finished commands beyond the retention limits into the archive
+    command_archive = app.dependency_overrides.get(get_command_archive, get_command_archive)()
+    retention_use_case = CommandRetentionUseCase(command_repository, command_archive)
+    retention_sweeper = asyncio.create_task(retention_use_case.run_retention_sweeper())
+    # Persist client activity recorded by polls in the background
+    presence_table = app.dependency_overrides.get(get_client_presence_table, get_client_presence_table)()
+    presence_use_case = ClientPresenceUseCase(client_repository, presence_table, event_bus)
+    presence_flusher = asyncio.create_task(presence_use_case.run_presence_flusher())
+    # Mark clients offline when they stop polling
+    await presence_use_case.track_stored_clients()
+    offline_sweeper = asyncio.create_task(presence_use_case.run_offline_sweeper())
     print("🚀 Brief Bridge started")
     
     yield
     
-    # Shutdown - cleanup all ngrok tunnels
+    # Shutdown - stop background tasks, flush repositories, then cleanup all ngrok tunnels
     print("🔄 Brief Bridge shutting down...")
+    for task in (lease_sweeper, retention_sweeper, presence_flusher, offline_sweeper):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await presence_use_case.flush_presence()
+    await command_repository.close()
+    await client_repository.close()
     await cleanup_handler()
 
 
@@ -0,0 +1,228 @@
+"""Content-addressed files for command outputs too large to keep inline
+
+Command records only keep a reference, the size and the SHA-256 of such an
+output, so the metadata the dispatch hot path reads stays small however big
+the outputs get. Blobs are immutable and named by their hash, so storing the
+same output twice writes it once. Blobs whose commands were pruned are
+deleted; storing an existing blob again touches it, so a prune that started
+before the new reference was made leaves it alone.
+
+Next to each blob a ``.lines`` file indexes where every line starts (as
+character and byte offsets), so ranged and tail reads seek straight to the
+requested part instead of reading and decoding the whole output. Compressed
+blobs are split into frames for the same reason.
+"""
+import bisect
+import hashlib
+import os
+import tempfile
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+from brief_bridge.entities.result_slice import ResultRange, ResultSlice
+from brief_bridge.repositories.result_compression import DEFAULT_RESULT_COMPRESSION_LEVEL
+
+# Results larger than this many characters are stored as blobs
+DEFAULT_BLOB_THRESHOLD = int(os.getenv('BRIEF_BRIDGE_BLOB_THRESHOLD', str(64 * 1024)))
+# Uncompressed bytes per independently compressed frame (the unit a ranged read decompresses)
+BLOB_FRAME_SIZE = 256 * 1024
+
+
+@dataclass
+class BlobReference:
+    ref: str       # path relative to the blob directory
+    size: int      # bytes (UTF-8)
+    sha256: str
+
+
+def build_line_index(content: str, data: bytes) -> bytes:
+    """Line starts as (character, byte) offset pairs, ending with (total characters, total bytes)
+
+    A newline is a single byte in UTF-8 and never part of a multi-byte
+    character, so the n-th newline of the text and of its encoding match up.
+    """
+    entries = array('q', (0, 0))
+    char_position, byte_position = content.find('\n'), data.find(b'\n')
+    while char_position >= 0:
+        if char_position + 1 < len(content):
+            entries.extend((char_position + 1, byte_position + 1))
+        char_position, byte_position = content.find('\n', char_position + 1), data.find(b'\n', byte_position + 1)
+    entries.extend((len(content), len(data)))
+    return entries.tobytes()
+
+
+class _LineIndexFile:
+    """Read entries of a line index file on demand; indexing yields character offsets (for bisect)"""
+
+    ENTRY_SIZE = array('q').itemsize * 2
+
+    def __init__(self, index_file: BinaryIO) -> None:
+        self._file = index_file
+        self._length = os.fstat(index_file.fileno()).st_size // self.ENTRY_SIZE
+
+    def __len__(self) -> int:
+        return self._length
+
+    def entry(self, position: int) -> Tuple[int, int]:
+        self._file.seek(position * self.ENTRY_SIZE)
+        entry = array('q')
+        entry.frombytes(self._file.read(self.ENTRY_SIZE))
+        return entry[0], entry[1]
+
+    def __getitem__(self, position: int) -> int:
+        return self.entry(position)[0]
+
+
+class BlobStore:
+    """Blob files under ``<data_dir>/blobs``; all methods block and belong on the storage thread pool
+
+    With a compression level the blob is written as ``<ref>.z``: fixed-size
+    frames compressed independently, whose offsets are listed in
+    ``<ref>.frames``. Plain ``<ref>`` files (level 0 or older stores) are read
+    as they are.
+    """
+
+    def __init__(self, blob_dir: Path, compression_level: int = DEFAULT_RESULT_COMPRESSION_LEVEL) -> None:
+        self.blob_dir = blob_dir
+        self._compression_level = compression_level
+
+    def put(self, content: str) -> BlobReference:
+        """Store content (once per distinct content) and return its reference"""
+        data = content.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        ref = f"{sha256[:2]}/{sha256}"
+        blob_file = self.blob_dir / ref
+        compressed_file = self.blob_dir / f"{ref}.z"
+        if not blob_file.exists() and not compressed_file.exists():
+            blob_file.parent.mkdir(parents=True, exist_ok=True)
+            if self._compression_level > 0:
+                frames, frame_table = self._compress_frames(data)
+                # The frame table goes first: an existing .z file is always readable
+                self._write_atomic(self.blob_dir / f"{ref}.frames", frame_table)
+                self._write_atomic(compressed_file, frames)
+            else:
+                self._write_atomic(blob_file, data)
+            self._write_atomic(self.blob_dir / f"{ref}.lines", build_line_index(content, data))
+        else:
+            self._touch(ref)
+        return BlobReference(ref=ref, size=len(data), sha256=sha256)
+
+    def _touch(self, ref: str) -> None:
+        for path in (self.blob_dir / f"{ref}.z", self.blob_dir / ref):
+            try:
+                os.utime(path)
+                return
+            except FileNotFoundError:
+                continue
+
+    def delete(self, ref: str, unused_since: float) -> bool:
+        """Remove a blob and its index files unless it was stored again since unused_since (a time.time())"""
+        files = [self.blob_dir / name for name in (f"{ref}.z", ref, f"{ref}.frames", f"{ref}.lines")]
+        try:
+            content_file = next(path for path in files[:2] if path.exists())
+            if content_file.stat().st_mtime >= unused_since:
+                return False
+        except (StopIteration, FileNotFoundError):
+            pass
+        for path in files:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return True
+
+    def get(self, ref: str, sha256: Optional[str] = None) -> Optional[str]:
+        """Load blob content; None if it is missing or fails the hash check"""
+        try:
+            data = self._read_bytes(ref)
+        except (OSError, zlib.error) as e:
+            print(f"Warning: Failed to read output blob {ref}: {e}")
+            return None
+        if sha256 and hashlib.sha256(data).hexdigest() != sha256:
+            print(f"Warning: Output blob {ref} does not match its recorded hash")
+            return None
+        return data.decode('utf-8')
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        # Atomic write: write to a temp file of our own first, then rename.
+        # Concurrent writers of the same blob write identical bytes, so a
+        # destination that exists after a failed rename is as good as ours.
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_name, path)
+        except OSError:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            if not path.exists():
+                raise
+
+    def _compress_frames(self, data: bytes) -> Tuple[bytes, bytes]:
+        """Compressed frames and their table: frame size, total size, then frame start offsets and the end"""
+        frame_table = array('q', (BLOB_FRAME_SIZE, len(data), 0))
+        frames = []
+        view = memoryview(data)
+        for start in range(0, len(data), BLOB_FRAME_SIZE):
+            frames.append(zlib.compress(view[start:start + BLOB_FRAME_SIZE], self._compression_level))
+            frame_table.append(frame_table[-1] + len(frames[-1]))
+        return b''.join(frames), frame_table.tobytes()
+
+    def _read_bytes(self, ref: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Bytes [start, end) of the blob content, decompressing only the frames that hold them"""
+        compressed_file = self.blob_dir / f"{ref}.z"
+        if not compressed_file.exists():
+            with open(self.blob_dir / ref, 'rb') as blob:
+                blob.seek(start)
+                return blob.read(-1 if end is None else end - start)
+
+        frame_table = array('q')
+        frame_table.frombytes((self.blob_dir / f"{ref}.frames").read_bytes())
+        frame_size, total_bytes, offsets = frame_table[0], frame_table[1], frame_table[2:]
+        end = total_bytes if end is None else end
+        if end <= start:
+            return b''
+        first, last = start // frame_size, (end - 1) // frame_size
+        with open(compressed_file, 'rb') as blob:
+            blob.seek(offsets[first])
+            compressed = blob.read(offsets[last + 1] - offsets[first])
+        base = offsets[first]
+        data = b''.join(
+            zlib.decompress(compressed[offsets[frame] - base:offsets[frame + 1] - base])
+            for frame in range(first, last + 1)
+        )
+        return data[start - first * frame_size:end - first * frame_size]
+
+    def _open_line_index(self, ref: str) -> BinaryIO:
+        """Open the blob's line index, building it for blobs stored before indexes existed"""
+        index_file = self.blob_dir / f"{ref}.lines"
+        if not index_file.exists():
+            data = self._read_bytes(ref)
+            self._write_atomic(index_file, build_line_index(data.decode('utf-8'), data))
+        return open(index_file, 'rb')
+
+    def read_slice(self, ref: str, result_range: ResultRange) -> Optional[ResultSlice]:
+        """Load part of a blob, reading only the lines that overlap the range; None if missing"""
+        try:
+            with self._open_line_index(ref) as index_file:
+                index = _LineIndexFile(index_file)
+                line_count = len(index) - 1
+                total_length = index.entry(line_count)[0]
+                if result_range.tail_lines is not None:
+                    line = max(line_count - result_range.tail_lines, 0)
+                    start = index.entry(line)[0]
+                else:
+                    start = min(result_range.offset or 0, total_length)
+                    line = max(bisect.bisect_right(index, start, 0, line_count) - 1, 0)
+                line_start, start_byte = index.entry(line)
+
+                end = total_length if result_range.length is None else min(start + result_range.length, total_length)
+                end_byte = index.entry(bisect.bisect_left(index, end, line, line_count))[1]
+
+            text = self._read_bytes(ref, start_byte, end_byte).decode('utf-8')
+        except (OSError, UnicodeDecodeError, zlib.error) as e:
+            print(f"Warning: Failed to read output blob {ref}: {e}")
+            return None
+        return ResultSlice(content=text[start - line_start:end - line_start], offset=start, total_length=total_length)
@@ -4,7 +4,11 @@ import json
 import os
 from pathlib import Path
 import asyncio
+import sqlite3
+from datetime import datetime, timezone
 from brief_bridge.entities.client import Client
+from brief_bridge.repositories.storage_io import run_storage_io
+from brief_bridge.repositories.json_file_store import JsonFileStore, DEFAULT_FILE_FLUSH_INTERVAL
 
 
 class ClientRepository(ABC):
@@ -13,6 +17,10 @@ class ClientRepository(ABC):
         """Business rule: client.registration - persist newly registered client"""
         pass
     
+    async def save_clients(self, clients: List[Client]) -> List[Client]:
+        """Business rule: client.activity_tracking - store several clients as one write"""
+        return [await self.save_registered_client(client) for client in clients]
+    
     @abstractmethod
     async def find_client_by_id(self, client_id: str) -> Optional[Client]:
         """Business rule: client.lookup - retrieve client by unique identifier"""
@@ -22,6 +30,14 @@ class ClientRepository(ABC):
     async def get_all_registered_clients(self) -> List[Client]:
         """Business rule: client.listing - retrieve all registered clients"""
         pass
+    
+    async def start(self) -> None:
+        """Lifecycle: start background maintenance tasks (no-op by default)"""
+        pass
+    
+    async def close(self) -> None:
+        """Lifecycle: stop background tasks and flush pending state (no-op by default)"""
+        pass
 
 
 class InMemoryClientRepository(ClientRepository):
@@ -43,44 +59,38 @@ class InMemoryClientRepository(ClientRepository):
 
 
 class FileBasedClientRepository(ClientRepository):
-    def __init__(self, data_dir: str = "data") -> None:
+    """Client store kept in memory and persisted to ``clients.json``"""
+    
+    # Blocking file work runs on the storage thread pool
+    _run_io = staticmethod(run_storage_io)
+    
+    def __init__(self, data_dir: str = "data", flush_interval: float = DEFAULT_FILE_FLUSH_INTERVAL) -> None:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.clients_file = self.data_dir / "clients.json"
-        self._lock = asyncio.Lock()
-    
-    async def _load_clients(self) -> dict[str, dict]:
-        """Load clients from JSON file"""
-        if not self.clients_file.exists():
-            return {}
-        
-        try:
-            with open(self.clients_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"Warning: Failed to load clients file: {e}")
-            return {}
-    
-    async def _save_clients(self, clients_data: dict[str, dict]) -> None:
-        """Save clients to JSON file"""
-        try:
-            # Atomic write: write to temp file first, then rename
-            temp_file = self.clients_file.with_suffix('.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(clients_data, f, indent=2, ensure_ascii=False)
-            
-            # Atomic rename
-            temp_file.replace(self.clients_file)
-        except OSError as e:
-            print(f"Error: Failed to save clients file: {e}")
-            raise
+        self._store = JsonFileStore(self.clients_file, self._run_io, flush_interval)
     
     def _dict_to_client(self, client_data: dict) -> Client:
-        """Convert dictionary to Client object"""
-        # Use Client.register_new_client factory method to maintain business rules
-        return Client.register_new_client(
+        """Convert dictionary to Client object, preserving stored status and last_seen"""
+        # Records written before last_seen was stored load as freshly registered clients
+        if "last_seen" not in client_data:
+            return Client.register_new_client(
+                client_id=client_data["client_id"],
+                name=client_data.get("name")
+            )
+        last_seen = None
+        if client_data["last_seen"]:
+            try:
+                last_seen = datetime.fromisoformat(client_data["last_seen"])
+            except ValueError:
+                last_seen = None
+        if last_seen and last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        return Client(
             client_id=client_data["client_id"],
-            name=client_data.get("name")
+            name=client_data.get("name"),
+            status=client_data.get("status", "online"),
+            last_seen=last_seen
         )
     
     def _client_to_dict(self, client: Client) -> dict:
@@ -88,28 +98,124 @@ class FileBasedClientRepository(ClientRepository):
         return {
             "client_id": client.client_id,
             "name": client.name,
-            "status": client.status
+            "status": client.status,
+            "last_seen": client.last_seen.isoformat() if client.last_seen else None
         }
     
+    async def start(self) -> None:
+        """Lifecycle: start the background flusher (if writes are deferred)"""
+        await self._store.start()
+    
+    async def close(self) -> None:
+        """Lifecycle: write any unflushed clients"""
+        await self._store.close()
+    
     async def save_registered_client(self, client: Client) -> Client:
         """Business rule: client.registration - persist client to file"""
+        await self._store.put({client.client_id: self._client_to_dict(client)})
+        return client
+    
+    async def save_clients(self, clients: List[Client]) -> List[Client]:
+        """Business rule: client.activity_tracking - persist several clients with one file rewrite"""
+        await self._store.put({client.client_id: self._client_to_dict(client) for client in clients})
+        return clients
+    
+    async def find_client_by_id(self, client_id: str) -> Optional[Client]:
+        """Business rule: client.lookup - find client by ID from the in-memory records"""
+        client_dict = (await self._store.records()).get(client_id)
+        return self._dict_to_client(client_dict) if client_dict else None
+    
+    async def get_all_registered_clients(self) -> List[Client]:
+        """Business rule: client.listing - return all clients from the in-memory records"""
+        return [self._dict_to_client(data) for data in (await self._store.records()).values()]
+
+
+class SqliteClientRepository(ClientRepository):
+    """SQLite client store sharing the database file used by SqliteCommandRepository"""
+    
+    # Queries run on the storage thread pool; self._lock keeps the connection single-user
+    _run_io = staticmethod(run_storage_io)
+    
+    def __init__(self, data_dir: str = "data", database_name: str = "brief_bridge.db") -> None:
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.database_file = self.data_dir / database_name
+        self._lock = asyncio.Lock()
+        self._connection = sqlite3.connect(str(self.database_file), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS clients (
+                    client_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    status TEXT NOT NULL DEFAULT 'online',
+                    last_seen TEXT
+                )
+            """)
+    
+    def _row_to_client(self, row: sqlite3.Row) -> Client:
+        """Convert database row to Client object, preserving stored status and last_seen"""
+        last_seen = None
+        if row["last_seen"]:
+            try:
+                last_seen = datetime.fromisoformat(row["last_seen"])
+            except ValueError:
+                last_seen = None
+        return Client(
+            client_id=row["client_id"],
+            name=row["name"],
+            status=row["status"],
+            last_seen=last_seen
+        )
+    
+    def _upsert_clients(self, clients: List[Client]) -> None:
+        """Upsert client rows in a single transaction (blocking)"""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO clients (client_id, name, status, last_seen) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        client.client_id,
+                        client.name,
+                        client.status,
+                        client.last_seen.isoformat() if client.last_seen else None
+                    )
+                    for client in clients
+                ]
+            )
+    
+    def _select_clients(self, where: str = "", params: tuple = ()) -> List[Client]:
+        """Run a SELECT over the clients table ordered by client ID (blocking)"""
+        rows = self._connection.execute(
+            f"SELECT client_id, name, status, last_seen FROM clients {where} ORDER BY client_id", params
+        ).fetchall()
+        return [self._row_to_client(row) for row in rows]
+    
+    async def save_registered_client(self, client: Client) -> Client:
+        """Business rule: client.registration - upsert client row"""
         async with self._lock:
-            clients_data = await self._load_clients()
-            clients_data[client.client_id] = self._client_to_dict(client)
-            await self._save_clients(clients_data)
+            await self._run_io(self._upsert_clients, [client])
             return client
     
+    async def save_clients(self, clients: List[Client]) -> List[Client]:
+        """Business rule: client.activity_tracking - upsert several client rows in one transaction"""
+        async with self._lock:
+            await self._run_io(self._upsert_clients, clients)
+            return clients
+    
+    async def close(self) -> None:
+        """Lifecycle: close the database connection"""
+        async with self._lock:
+            await self._run_io(self._connection.close)
+    
     async def find_client_by_id(self, client_id: str) -> Optional[Client]:
-        """Business rule: client.lookup - find client by ID from file store"""
+        """Business rule: client.lookup - find client by primary key"""
         async with self._lock:
-            clients_data = await self._load_clients()
-            client_dict = clients_data.get(client_id)
-            if client_dict:
-                return self._dict_to_client(client_dict)
-            return None
+            clients = await self._run_io(self._select_clients, "WHERE client_id = ?", (client_id,))
+            return clients[0] if clients else None
     
     async def get_all_registered_clients(self) -> List[Client]:
-        """Business rule: client.listing - return all clients from file store"""
+        """Business rule: client.listing - return all clients from database"""
         async with self._lock:
-            clients_data = await self._load_clients()
-            return [self._dict_to_client(data) for data in clients_data.values()]
\ No newline at end of file
+            return await self._run_io(self._select_clients)
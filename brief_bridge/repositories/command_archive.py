@@ -0,0 +1,147 @@
+"""Compressed, date-partitioned archive of commands removed from the live store
+
+Each retention sweep writes one gzip-compressed JSON-lines segment per
+completion date under ``<data_dir>/archive/<YYYY-MM-DD>/``. Segments are
+immutable and written atomically, so archiving never rewrites older data.
+The live repositories stay proportional to recent work; archived commands are
+read back only when explicitly queried, by day or by ID.
+
+``index.tsv`` maps every archived command ID to its segment, so a lookup by
+ID decompresses one segment at most, and an unknown ID none. Index lines are
+appended before their segment is written: an entry whose segment is missing
+after a crash belongs to a command that is still in the live store.
+"""
+import gzip
+import json
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.command_repository import _CommandRecordCodec
+from brief_bridge.repositories.storage_io import run_storage_io
+
+
+class CommandArchive(_CommandRecordCodec):
+    # Segments are gzip files already; records keep results as plain text
+    _compression_level = 0
+    # Segment reads, writes and their (de)serialization run on the storage thread pool
+    _run_io = staticmethod(run_storage_io)
+
+    def __init__(self, data_dir: str = "data") -> None:
+        self.archive_dir = Path(data_dir) / "archive"
+        self.index_file = self.archive_dir / "index.tsv"
+        # command_id -> "<day>/<segment file name>"; loaded on first use
+        self._index: Optional[Dict[str, str]] = None
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def _partition_day(command: Command) -> date:
+        """Business rule: command.retention - commands are filed under the day they completed"""
+        return (command.completed_at or command.created_at or datetime.utcnow()).date()
+
+    def _write_segments(self, commands: List[Command]) -> None:
+        """Write one new segment per day, indexing it first (blocking)"""
+        by_day: Dict[date, List[Command]] = defaultdict(list)
+        for command in commands:
+            by_day[self._partition_day(command)].append(command)
+
+        index = self._load_index()
+        for day, day_commands in by_day.items():
+            day_dir = self.archive_dir / day.isoformat()
+            day_dir.mkdir(parents=True, exist_ok=True)
+            segment_file = day_dir / f"{datetime.utcnow():%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+            location = f"{day.isoformat()}/{segment_file.name}"
+            with self._index_lock, open(self.index_file, 'a', encoding='utf-8') as f:
+                f.writelines(f"{command.command_id}\t{location}\n" for command in day_commands)
+                index.update((command.command_id, location) for command in day_commands)
+            # Atomic write: write to temp file first, then rename
+            temp_file = segment_file.with_name(segment_file.name + '.tmp')
+            with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+                for command in day_commands:
+                    f.write(json.dumps(self._command_to_dict(command), ensure_ascii=False, default=str) + "\n")
+            temp_file.replace(segment_file)
+
+    def _read_segment(self, segment_file: Path) -> List[Command]:
+        """Commands of one segment; empty if it is missing or unreadable (blocking)"""
+        try:
+            with gzip.open(segment_file, 'rt', encoding='utf-8') as f:
+                return [self._dict_to_command(json.loads(line)) for line in f if line.strip()]
+        except (OSError, EOFError, json.JSONDecodeError, KeyError) as e:
+            print(f"Warning: Failed to read archive segment {segment_file.name}: {e}")
+            return []
+
+    def _read_day(self, day: str) -> List[Command]:
+        """All commands archived for a day, oldest segment first (blocking)"""
+        commands = []
+        for segment_file in sorted((self.archive_dir / day).glob("*.jsonl.gz")):
+            commands.extend(self._read_segment(segment_file))
+        return commands
+
+    def _load_index(self) -> Dict[str, str]:
+        """The ID index, read once; archives written before it existed are indexed on first use (blocking)"""
+        with self._index_lock:
+            if self._index is None:
+                self._index = self._read_index() if self.index_file.exists() else self._build_index()
+            return self._index
+
+    def _read_index(self) -> Dict[str, str]:
+        index = {}
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                command_id, separator, location = line.rstrip("\n").partition("\t")
+                if separator and location:  # Skip a torn final line
+                    index[command_id] = location
+        return index
+
+    def _build_index(self) -> Dict[str, str]:
+        """Index every existing segment once and write the index file"""
+        index = {}
+        for day in sorted(self._list_days()):
+            for segment_file in sorted((self.archive_dir / day).glob("*.jsonl.gz")):
+                for command in self._read_segment(segment_file):
+                    index[command.command_id] = f"{day}/{segment_file.name}"
+        if index:
+            temp_file = self.index_file.with_name(self.index_file.name + '.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.writelines(f"{command_id}\t{location}\n" for command_id, location in index.items())
+            temp_file.replace(self.index_file)
+        return index
+
+    def _list_days(self) -> List[str]:
+        """Archived days, newest first (blocking)"""
+        if not self.archive_dir.exists():
+            return []
+        return sorted((path.name for path in self.archive_dir.iterdir() if path.is_dir()), reverse=True)
+
+    def _find(self, command_id: str) -> Optional[Command]:
+        """Read the one segment the index points to (blocking)"""
+        location = self._load_index().get(command_id)
+        if location is None:
+            return None
+        for command in self._read_segment(self.archive_dir / location):
+            if command.command_id == command_id:
+                return command
+        return None
+
+    async def archive_commands(self, commands: List[Command]) -> None:
+        """Business rule: command.retention - persist commands before they leave the live store"""
+        if commands:
+            await self._run_io(self._write_segments, commands)
+
+    async def list_days(self) -> List[str]:
+        """Business rule: command.archive_query - days that have archived commands"""
+        return await self._run_io(self._list_days)
+
+    async def get_commands_for_day(self, day: str, client_id: Optional[str] = None) -> List[Command]:
+        """Business rule: command.archive_query - commands archived for a day, optionally for one client"""
+        commands = await self._run_io(self._read_day, day)
+        if client_id:
+            commands = [command for command in commands if command.target_client_id == client_id]
+        return commands
+
+    async def find_command_by_id(self, command_id: str) -> Optional[Command]:
+        """Business rule: command.archive_query - look an archived command up through the ID index"""
+        return await self._run_io(self._find, command_id)
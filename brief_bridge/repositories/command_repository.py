@@ -1,19 +1,39 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, TextIO
 import json
 import os
 from pathlib import Path
 import asyncio
+import sqlite3
+from collections import deque
+from dataclasses import replace
 from datetime import datetime
 from brief_bridge.entities.command import Command
+from brief_bridge.entities.command_query import CommandQuery
+from brief_bridge.entities.result_slice import ResultRange, ResultSlice, slice_text
+from brief_bridge.repositories.storage_io import run_storage_io
+from brief_bridge.repositories.json_file_store import JsonFileStore, DEFAULT_FILE_FLUSH_INTERVAL
+from brief_bridge.repositories.blob_store import BlobStore, DEFAULT_BLOB_THRESHOLD
+from brief_bridge.repositories.result_compression import encode_result, decode_result, DEFAULT_RESULT_COMPRESSION_LEVEL
+
+# Configuration constants for the write-ahead log backend
+DEFAULT_COMPACTION_INTERVAL = float(os.getenv('BRIEF_BRIDGE_WAL_COMPACTION_INTERVAL', '60.0'))  # seconds
+DEFAULT_COMPACTION_THRESHOLD = int(os.getenv('BRIEF_BRIDGE_WAL_COMPACTION_THRESHOLD', '1000'))  # log records
 
 
 class CommandRepository(ABC):
+    def __init__(self) -> None:
+        self._client_locks: dict[str, asyncio.Lock] = {}  # client_id -> lock handed out by client_lock
+    
     @abstractmethod
     async def save_command(self, command: Command) -> Command:
         """Business rule: command.persistence - store command for execution"""
         pass
     
+    async def save_commands(self, commands: List[Command]) -> List[Command]:
+        """Business rule: command.persistence - store several commands as one write"""
+        return [await self.save_command(command) for command in commands]
+    
     @abstractmethod
     async def find_command_by_id(self, command_id: str) -> Optional[Command]:
         """Business rule: command.lookup - retrieve command by unique identifier"""
@@ -24,6 +44,11 @@ class CommandRepository(ABC):
         """Business rule: command.dispatch - get commands waiting for client execution"""
         pass
     
+    async def get_next_pending_command_for_client(self, client_id: str) -> Optional[Command]:
+        """Business rule: command.dispatch - oldest pending command for client, if any"""
+        pending_commands = await self.get_pending_commands_for_client(client_id)
+        return pending_commands[0] if pending_commands else None
+    
     @abstractmethod
     async def get_all_commands(self) -> List[Command]:
         """Business rule: command.listing - retrieve all commands"""
@@ -33,15 +58,142 @@ class CommandRepository(ABC):
     async def find_commands_by_client_id(self, client_id: str) -> List[Command]:
         """Business rule: command.client_filtering - retrieve all commands for specific client"""
         pass
+    
+    async def query_commands(self, query: CommandQuery) -> List[Command]:
+        """Business rule: command.listing - one filtered, ordered page of commands"""
+        return query.select(await self.get_all_commands(), query.matches, query.command_key)
+    
+    async def iter_commands(self, query: CommandQuery, batch_size: int = 500) -> AsyncIterator[List[Command]]:
+        """Business rule: command.export - all matching commands in listing order, batch_size at a time
+        
+        Pages through query_commands with a cursor, so only one batch is
+        materialized at a time. query.limit is ignored.
+        """
+        page_query = replace(query, limit=batch_size)
+        while True:
+            batch = await self.query_commands(page_query)
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            page_query.after = CommandQuery.command_key(batch[-1])
+    
+    @abstractmethod
+    async def delete_commands(self, command_ids: List[str]) -> None:
+        """Business rule: command.retention - remove commands from the live store (after archiving)"""
+        pass
+    
+    async def load_result(self, command: Command) -> Optional[str]:
+        """Business rule: command.result_capture - full result, loading it if stored outside the record"""
+        return command.result
+    
+    async def delete_results(self, result_refs: List[str], unused_since: float) -> None:
+        """Business rule: command.retention - remove stored results no command refers to any more
+        
+        Results stored again since unused_since (a time.time()) are kept. No-op
+        for repositories that keep every result in the command record.
+        """
+        pass
+    
+    async def load_result_slice(self, command: Command, result_range: ResultRange) -> Optional[ResultSlice]:
+        """Business rule: command.result_range - requested part of the result, None if there is no result"""
+        result = await self.load_result(command)
+        return slice_text(result, result_range) if result is not None else None
+    
+    async def get_processing_commands(self) -> List[Command]:
+        """Business rule: command.lease - commands currently handed out to clients"""
+        return [command for command in await self.get_all_commands() if command.status == "processing"]
+    
+    def client_lock(self, client_id: str) -> asyncio.Lock:
+        """Lock held while reading, changing and saving one client's commands
+        
+        Saves yield while storage I/O runs, so callers that decide on a
+        command's state and then write it (dispatch, results, lease sweeps)
+        hold the lock of the command's client to not act on stale state.
+        """
+        return self._client_locks.setdefault(client_id, asyncio.Lock())
+    
+    async def start(self) -> None:
+        """Lifecycle: start background maintenance tasks (no-op by default)"""
+        pass
+    
+    async def close(self) -> None:
+        """Lifecycle: stop background tasks and flush pending state (no-op by default)"""
+        pass
+
+
+class _PendingCommandIndex:
+    """Per-client FIFO of pending command IDs, ordered by creation time
+    
+    Kept in sync by calling ``update`` whenever a command is saved, so dispatch
+    reads the head of one client's queue instead of scanning all history.
+    """
+    
+    def __init__(self) -> None:
+        self._queues: dict[str, deque] = {}  # client_id -> deque of (created_at, command_id)
+        self._queued_client: dict[str, str] = {}  # command_id -> client_id of the queue holding it
+    
+    def update(self, command: Command) -> None:
+        """Enqueue newly pending commands and drop commands that left the pending state"""
+        queued_client = self._queued_client.get(command.command_id)
+        if command.is_pending():
+            if queued_client is None:
+                self._enqueue(command)
+        elif queued_client is not None:
+            self._remove(command.command_id, queued_client)
+    
+    def _enqueue(self, command: Command) -> None:
+        entry = (command.created_at or datetime.min, command.command_id)
+        queue = self._queues.setdefault(command.target_client_id, deque())
+        if not queue or queue[-1][0] <= entry[0]:
+            queue.append(entry)
+        else:
+            # Re-queued older command (e.g. redelivery): insert at its creation-order position
+            position = len(queue)
+            while position > 0 and queue[position - 1][0] > entry[0]:
+                position -= 1
+            queue.insert(position, entry)
+        self._queued_client[command.command_id] = command.target_client_id
+    
+    def _remove(self, command_id: str, client_id: str) -> None:
+        queue = self._queues[client_id]
+        if queue[0][1] == command_id:
+            queue.popleft()  # Common case: the dispatched command is the head
+        else:
+            for entry in queue:
+                if entry[1] == command_id:
+                    queue.remove(entry)
+                    break
+        del self._queued_client[command_id]
+        if not queue:
+            del self._queues[client_id]
+    
+    def discard(self, command_id: str) -> None:
+        """Drop a deleted command from its queue, whatever its last saved state"""
+        queued_client = self._queued_client.get(command_id)
+        if queued_client is not None:
+            self._remove(command_id, queued_client)
+    
+    def peek(self, client_id: str) -> Optional[str]:
+        """ID of the oldest pending command for client, in O(1)"""
+        queue = self._queues.get(client_id)
+        return queue[0][1] if queue else None
+    
+    def pending(self, client_id: str) -> List[str]:
+        """IDs of all pending commands for client in creation order"""
+        return [command_id for _, command_id in self._queues.get(client_id, ())]
 
 
 class InMemoryCommandRepository(CommandRepository):
     def __init__(self) -> None:
+        super().__init__()
         self._commands: dict[str, Command] = {}
+        self._pending_index = _PendingCommandIndex()
     
     async def save_command(self, command: Command) -> Command:
         """Business rule: command.persistence - store command in memory"""
         self._commands[command.command_id] = command
+        self._pending_index.update(command)
         return command
     
     async def find_command_by_id(self, command_id: str) -> Optional[Command]:
@@ -49,56 +201,49 @@ class InMemoryCommandRepository(CommandRepository):
         return self._commands.get(command_id)
     
     async def get_pending_commands_for_client(self, client_id: str) -> List[Command]:
-        """Business rule: command.dispatch - filter pending commands for specific client"""
-        return [
-            cmd for cmd in self._commands.values()
-            if cmd.target_client_id == client_id and cmd.status == "pending"
-        ]
+        """Business rule: command.dispatch - pending commands for client from the FIFO index"""
+        return [self._commands[command_id] for command_id in self._pending_index.pending(client_id)]
+    
+    async def get_next_pending_command_for_client(self, client_id: str) -> Optional[Command]:
+        """Business rule: command.dispatch - head of the client's pending FIFO"""
+        command_id = self._pending_index.peek(client_id)
+        return self._commands[command_id] if command_id else None
     
     async def get_all_commands(self) -> List[Command]:
         """Business rule: command.listing - return all commands from memory store"""
         return list(self._commands.values())
     
+    async def get_processing_commands(self) -> List[Command]:
+        """Business rule: command.lease - processing commands without copying the whole store"""
+        return [command for command in self._commands.values() if command.status == "processing"]
+    
     async def find_commands_by_client_id(self, client_id: str) -> List[Command]:
         """Business rule: command.client_filtering - filter all commands for specific client"""
         return [
             cmd for cmd in self._commands.values()
             if cmd.target_client_id == client_id
         ]
+    
+    async def query_commands(self, query: CommandQuery) -> List[Command]:
+        """Business rule: command.listing - filter the memory store without copying it"""
+        return query.select(self._commands.values(), query.matches, query.command_key)
+    
+    async def iter_commands(self, query: CommandQuery, batch_size: int = 500) -> AsyncIterator[List[Command]]:
+        """Business rule: command.export - select once; the commands are already in memory"""
+        query = replace(query, limit=None)
+        matching = query.select(self._commands.values(), query.matches, query.command_key)
+        for start in range(0, len(matching), batch_size):
+            yield matching[start:start + batch_size]
+    
+    async def delete_commands(self, command_ids: List[str]) -> None:
+        """Business rule: command.retention - remove commands from memory store"""
+        for command_id in command_ids:
+            self._commands.pop(command_id, None)
+            self._pending_index.discard(command_id)
 
 
-class FileBasedCommandRepository(CommandRepository):
-    def __init__(self, data_dir: str = "data") -> None:
-        self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
-        self.commands_file = self.data_dir / "commands.json"
-        self._lock = asyncio.Lock()
-    
-    async def _load_commands(self) -> dict[str, dict]:
-        """Load commands from JSON file"""
-        if not self.commands_file.exists():
-            return {}
-        
-        try:
-            with open(self.commands_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"Warning: Failed to load commands file: {e}")
-            return {}
-    
-    async def _save_commands(self, commands_data: dict[str, dict]) -> None:
-        """Save commands to JSON file"""
-        try:
-            # Atomic write: write to temp file first, then rename
-            temp_file = self.commands_file.with_suffix('.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(commands_data, f, indent=2, ensure_ascii=False, default=str)
-            
-            # Atomic rename
-            temp_file.replace(self.commands_file)
-        except OSError as e:
-            print(f"Error: Failed to save commands file: {e}")
-            raise
+class _CommandRecordCodec:
+    """Shared conversion between Command entities and JSON-serializable records"""
     
     def _dict_to_command(self, command_data: dict) -> Command:
         """Convert dictionary to Command object"""
@@ -123,9 +268,14 @@ class FileBasedCommandRepository(CommandRepository):
         # Set new fields
         command.started_at = started_at
         command.completed_at = completed_at
-        command.result = command_data.get("result")
+        command.result = decode_result(command_data.get("result"), command_data.get("result_encoding"))
         command.error = command_data.get("error")
         command.execution_time = command_data.get("execution_time")
+        command.lease_expires_at = self._parse_datetime(command_data.get("lease_expires_at"))
+        command.delivery_attempts = command_data.get("delivery_attempts") or 0
+        command.result_ref = command_data.get("result_ref")
+        command.result_size = command_data.get("result_size")
+        command.result_sha256 = command_data.get("result_sha256")
         
         return command
     
@@ -140,7 +290,8 @@ class FileBasedCommandRepository(CommandRepository):
             return None
     
     def _command_to_dict(self, command: Command) -> dict:
-        """Convert Command object to dictionary"""
+        """Convert Command object to dictionary (result compressed per the configured level)"""
+        result, result_encoding = encode_result(command.result, self._compression_level)
         return {
             "command_id": command.command_id,
             "target_client_id": command.target_client_id,
@@ -150,50 +301,582 @@ class FileBasedCommandRepository(CommandRepository):
             "created_at": command.created_at.isoformat() if command.created_at else None,
             "started_at": command.started_at.isoformat() if command.started_at else None,
             "completed_at": command.completed_at.isoformat() if command.completed_at else None,
-            "result": command.result,
+            "result": result,
+            "result_encoding": result_encoding,
             "error": command.error,
-            "execution_time": command.execution_time
+            "execution_time": command.execution_time,
+            "lease_expires_at": command.lease_expires_at.isoformat() if command.lease_expires_at else None,
+            "delivery_attempts": command.delivery_attempts,
+            "result_ref": command.result_ref,
+            "result_size": command.result_size,
+            "result_sha256": command.result_sha256
         }
     
+    def _init_blob_store(self, data_dir: Path, blob_threshold: int, compression_level: int) -> None:
+        """Keep results above blob_threshold characters in blob files under data_dir"""
+        self._blob_store = BlobStore(data_dir / "blobs", compression_level)
+        self._blob_threshold = blob_threshold
+        self._compression_level = compression_level
+    
+    async def _externalize_results(self, commands: List[Command]) -> None:
+        """Move large results out of the records into blobs (before the records are written)"""
+        for command in commands:
+            if command.result is not None and len(command.result) > self._blob_threshold:
+                reference = await self._run_io(self._blob_store.put, command.result)
+                command.result = None
+                command.result_ref = reference.ref
+                command.result_size = reference.size
+                command.result_sha256 = reference.sha256
+    
+    async def load_result(self, command: Command) -> Optional[str]:
+        """Business rule: command.result_capture - full result, reading its blob only when needed"""
+        if command.has_stored_result():
+            return await self._run_io(self._blob_store.get, command.result_ref, command.result_sha256)
+        return command.result
+    
+    async def delete_results(self, result_refs: List[str], unused_since: float) -> None:
+        """Business rule: command.retention - delete result blobs of pruned commands"""
+        for ref in result_refs:
+            await self._run_io(self._blob_store.delete, ref, unused_since)
+    
+    async def load_result_slice(self, command: Command, result_range: ResultRange) -> Optional[ResultSlice]:
+        """Business rule: command.result_range - read only the requested lines of a stored result"""
+        if command.has_stored_result():
+            return await self._run_io(self._blob_store.read_slice, command.result_ref, result_range)
+        return slice_text(command.result, result_range) if command.result is not None else None
+
+
+class FileBasedCommandRepository(_CommandRecordCodec, CommandRepository):
+    """Command store kept in memory and persisted to ``commands.json``"""
+    
+    # Blocking file work and bulk (de)serialization run on the storage thread pool
+    _run_io = staticmethod(run_storage_io)
+    
+    def __init__(self, data_dir: str = "data", flush_interval: float = DEFAULT_FILE_FLUSH_INTERVAL,
+                 blob_threshold: int = DEFAULT_BLOB_THRESHOLD,
+                 compression_level: int = DEFAULT_RESULT_COMPRESSION_LEVEL) -> None:
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.commands_file = self.data_dir / "commands.json"
+        self._store = JsonFileStore(self.commands_file, self._run_io, flush_interval, json_default=str)
+        self._init_blob_store(self.data_dir, blob_threshold, compression_level)
+    
+    def _records_to_commands(self, records: List[dict]) -> List[Command]:
+        """Convert stored records to Command objects (blocking for large lists)"""
+        return [self._dict_to_command(record) for record in records]
+    
+    async def start(self) -> None:
+        """Lifecycle: start the background flusher (if writes are deferred)"""
+        await self._store.start()
+    
+    async def close(self) -> None:
+        """Lifecycle: write any unflushed commands"""
+        await self._store.close()
+    
     async def save_command(self, command: Command) -> Command:
         """Business rule: command.persistence - persist command to file"""
+        await self._externalize_results([command])
+        await self._store.put({command.command_id: self._command_to_dict(command)})
+        return command
+    
+    async def save_commands(self, commands: List[Command]) -> List[Command]:
+        """Business rule: command.persistence - persist several commands with one file rewrite"""
+        await self._externalize_results(commands)
+        await self._store.put({command.command_id: self._command_to_dict(command) for command in commands})
+        return commands
+    
+    def _query_records(self, records: List[dict], query: CommandQuery) -> List[Command]:
+        """Filter and page raw records, converting only the page (blocking for large lists)"""
+        return self._records_to_commands(query.select(records, query.matches_record, query.record_key))
+    
+    async def query_commands(self, query: CommandQuery) -> List[Command]:
+        """Business rule: command.listing - filter records before building Command objects"""
+        records = await self._store.records()
+        return await self._run_io(self._query_records, list(records.values()), query)
+    
+    async def iter_commands(self, query: CommandQuery, batch_size: int = 500) -> AsyncIterator[List[Command]]:
+        """Business rule: command.export - select records once, build Command objects one batch at a time"""
+        records = await self._store.records()
+        query = replace(query, limit=None)
+        matching = await self._run_io(query.select, list(records.values()), query.matches_record, query.record_key)
+        for start in range(0, len(matching), batch_size):
+            yield await self._run_io(self._records_to_commands, matching[start:start + batch_size])
+    
+    async def delete_commands(self, command_ids: List[str]) -> None:
+        """Business rule: command.retention - remove commands with one file rewrite"""
+        await self._store.remove(command_ids)
+    
+    async def find_command_by_id(self, command_id: str) -> Optional[Command]:
+        """Business rule: command.lookup - find command by ID from the in-memory records"""
+        command_dict = (await self._store.records()).get(command_id)
+        return self._dict_to_command(command_dict) if command_dict else None
+    
+    async def get_pending_commands_for_client(self, client_id: str) -> List[Command]:
+        """Business rule: command.dispatch - filter pending commands for specific client"""
+        records = await self._store.records()
+        return self._records_to_commands([
+            data for data in records.values()
+            if data.get("target_client_id") == client_id and data.get("status", "pending") == "pending"
+        ])
+    
+    async def get_all_commands(self) -> List[Command]:
+        """Business rule: command.listing - return all commands from the in-memory records"""
+        records = await self._store.records()
+        return await self._run_io(self._records_to_commands, list(records.values()))
+    
+    async def find_commands_by_client_id(self, client_id: str) -> List[Command]:
+        """Business rule: command.client_filtering - filter all commands for specific client"""
+        records = await self._store.records()
+        return self._records_to_commands([
+            data for data in records.values() if data.get("target_client_id") == client_id
+        ])
+
+
+class WriteAheadLogCommandRepository(_CommandRecordCodec, CommandRepository):
+    """Log-structured command store
+    
+    Every save appends a single JSON line to ``commands.log`` and updates the
+    in-memory state, so writes cost O(1) regardless of history size. A background
+    compactor periodically writes the full state to ``commands.json`` (same format
+    as FileBasedCommandRepository) and discards the log records it covers, so a
+    restart only replays the records written since the last snapshot.
+    
+    Appends are fsynced before a save returns (one fsync per save_commands
+    batch), so an acknowledged write survives a crash. The log is opened on
+    the first write, so merely constructing the repository (e.g. on import of
+    the web dependencies) creates no log file.
+    """
+    
+    # Log appends, snapshots and their (de)serialization run on the storage thread pool
+    _run_io = staticmethod(run_storage_io)
+    
+    def __init__(self, data_dir: str = "data",
+                 compaction_interval: float = DEFAULT_COMPACTION_INTERVAL,
+                 compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD,
+                 blob_threshold: int = DEFAULT_BLOB_THRESHOLD,
+                 compression_level: int = DEFAULT_RESULT_COMPRESSION_LEVEL) -> None:
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self._init_blob_store(self.data_dir, blob_threshold, compression_level)
+        self.snapshot_file = self.data_dir / "commands.json"
+        self.log_file = self.data_dir / "commands.log"
+        # Log segment being folded into a snapshot (present only while compacting or after a crash)
+        self.compacting_log_file = self.data_dir / "commands.log.compacting"
+        self._compaction_interval = compaction_interval
+        self._compaction_threshold = compaction_threshold
+        self._lock = asyncio.Lock()
+        # Serializes compactions; the snapshot is written outside self._lock
+        self._compaction_lock = asyncio.Lock()
+        self._commands: dict[str, Command] = {}
+        self._pending_index = _PendingCommandIndex()
+        self._records_since_snapshot = 0
+        self._compactor_task: Optional[asyncio.Task] = None
+        self._replay()
+        self._log: Optional[TextIO] = None
+    
+    def _replay(self) -> None:
+        """Rebuild in-memory state from the latest snapshot plus the log written after it"""
+        if self.snapshot_file.exists():
+            try:
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    for command_data in json.load(f).values():
+                        command = self._dict_to_command(command_data)
+                        self._commands[command.command_id] = command
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Warning: Failed to load commands snapshot: {e}")
+        
+        for log_file in (self.compacting_log_file, self.log_file):
+            self._records_since_snapshot += self._replay_log(log_file)
+        
+        for command in self._commands.values():
+            self._pending_index.update(command)
+    
+    def _replay_log(self, log_file: Path) -> int:
+        """Apply log records in order; later records for the same command win"""
+        if not log_file.exists():
+            return 0
+        
+        applied = 0
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        self._commands.pop(record["command_id"], None)
+                        applied += 1
+                        continue
+                    command = self._dict_to_command(record)
+                except (json.JSONDecodeError, KeyError) as e:
+                    # A torn final line after a crash is expected; skip it
+                    print(f"Warning: Skipping unreadable command log record: {e}")
+                    continue
+                self._commands[command.command_id] = command
+                applied += 1
+        return applied
+    
+    def _append_lines(self, lines: List[str]) -> None:
+        """Append log lines and force them to disk (blocking; caller holds the lock)"""
+        if self._log is None:
+            self._log = open(self.log_file, 'a', encoding='utf-8')
+        self._log.write("".join(line + "\n" for line in lines))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._records_since_snapshot += len(lines)
+    
+    def _append_records(self, commands: List[Command]) -> None:
+        """Append one compact JSON line per command describing its full state"""
+        self._append_lines([
+            json.dumps(self._command_to_dict(command), ensure_ascii=False, default=str)
+            for command in commands
+        ])
+    
+    def _append_deletions(self, command_ids: List[str]) -> None:
+        """Append one tombstone line per deleted command"""
+        self._append_lines([json.dumps({"command_id": command_id, "deleted": True}) for command_id in command_ids])
+    
+    def _write_snapshot(self, commands_data: dict[str, dict]) -> None:
+        """Write snapshot atomically: temp file first, then rename"""
+        temp_file = self.snapshot_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(commands_data, f, indent=2, ensure_ascii=False, default=str)
+            # On disk before the log segment it replaces is removed
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(self.snapshot_file)
+    
+    def _snapshot_records(self) -> dict:
+        """Serializable copy of the current state (blocking; caller holds the lock)"""
+        return {
+            command_id: self._command_to_dict(command)
+            for command_id, command in self._commands.items()
+        }
+    
+    def _rotate_log(self) -> None:
+        """Move the active log aside as the segment being compacted (blocking; caller holds the lock)"""
+        if self._log is not None:
+            self._log.close()
+        self.log_file.touch()
+        if self.compacting_log_file.exists():
+            # Leftover from an interrupted compaction: keep its records in order
+            with open(self.compacting_log_file, 'a', encoding='utf-8') as dest, \
+                    open(self.log_file, 'r', encoding='utf-8') as src:
+                dest.write(src.read())
+                dest.flush()
+                os.fsync(dest.fileno())
+            self.log_file.unlink()
+        else:
+            self.log_file.replace(self.compacting_log_file)
+        self._log = open(self.log_file, 'a', encoding='utf-8')
+    
+    def _finish_compaction(self, commands_data: dict) -> None:
+        """Write the snapshot, then drop the log segment it covers (blocking)"""
+        try:
+            self._write_snapshot(commands_data)
+            self.compacting_log_file.unlink()
+        except OSError as e:
+            print(f"Error: Failed to write commands snapshot: {e}")
+    
+    async def compact(self) -> None:
+        """Fold the log into a fresh snapshot
+        
+        The active log is rotated aside under the lock so concurrent saves keep
+        appending to a new log; the snapshot is then written and the rotated
+        segment removed. If the process dies in between, replay applies the
+        rotated segment on top of the previous snapshot, which is idempotent.
+        """
+        async with self._compaction_lock:
+            async with self._lock:
+                if self._records_since_snapshot == 0:
+                    return
+                commands_data = await self._run_io(self._snapshot_records)
+                await self._run_io(self._rotate_log)
+                self._records_since_snapshot = 0
+            
+            await self._run_io(self._finish_compaction, commands_data)
+    
+    async def _run_compactor(self) -> None:
+        """Background loop: compact once enough records have accumulated"""
+        while True:
+            await asyncio.sleep(self._compaction_interval)
+            if self._records_since_snapshot >= self._compaction_threshold:
+                await self.compact()
+    
+    async def start(self) -> None:
+        """Lifecycle: start the background compactor"""
+        if self._compactor_task is None:
+            self._compactor_task = asyncio.create_task(self._run_compactor())
+    
+    async def close(self) -> None:
+        """Lifecycle: stop the compactor and leave a snapshot covering all writes"""
+        if self._compactor_task is not None:
+            self._compactor_task.cancel()
+            try:
+                await self._compactor_task
+            except asyncio.CancelledError:
+                pass
+            self._compactor_task = None
+        await self.compact()
+    
+    async def save_command(self, command: Command) -> Command:
+        """Business rule: command.persistence - append command state to the log"""
+        await self._externalize_results([command])
         async with self._lock:
-            commands_data = await self._load_commands()
-            commands_data[command.command_id] = self._command_to_dict(command)
-            await self._save_commands(commands_data)
+            await self._run_io(self._append_records, [command])
+            self._commands[command.command_id] = command
+            self._pending_index.update(command)
             return command
     
+    async def save_commands(self, commands: List[Command]) -> List[Command]:
+        """Business rule: command.persistence - append several commands with one flush"""
+        await self._externalize_results(commands)
+        async with self._lock:
+            await self._run_io(self._append_records, commands)
+            for command in commands:
+                self._commands[command.command_id] = command
+                self._pending_index.update(command)
+            return commands
+    
+    async def query_commands(self, query: CommandQuery) -> List[Command]:
+        """Business rule: command.listing - filter replayed state without copying it"""
+        return query.select(self._commands.values(), query.matches, query.command_key)
+    
+    async def iter_commands(self, query: CommandQuery, batch_size: int = 500) -> AsyncIterator[List[Command]]:
+        """Business rule: command.export - select once; the commands are already in memory"""
+        query = replace(query, limit=None)
+        matching = query.select(self._commands.values(), query.matches, query.command_key)
+        for start in range(0, len(matching), batch_size):
+            yield matching[start:start + batch_size]
+    
+    async def delete_commands(self, command_ids: List[str]) -> None:
+        """Business rule: command.retention - log tombstones and drop commands from memory"""
+        async with self._lock:
+            await self._run_io(self._append_deletions, command_ids)
+            for command_id in command_ids:
+                self._commands.pop(command_id, None)
+                self._pending_index.discard(command_id)
+    
     async def find_command_by_id(self, command_id: str) -> Optional[Command]:
-        """Business rule: command.lookup - find command by ID from file store"""
+        """Business rule: command.lookup - find command by ID from replayed state"""
+        return self._commands.get(command_id)
+    
+    async def get_pending_commands_for_client(self, client_id: str) -> List[Command]:
+        """Business rule: command.dispatch - pending commands for client from the FIFO index"""
+        return [self._commands[command_id] for command_id in self._pending_index.pending(client_id)]
+    
+    async def get_next_pending_command_for_client(self, client_id: str) -> Optional[Command]:
+        """Business rule: command.dispatch - head of the client's pending FIFO"""
+        command_id = self._pending_index.peek(client_id)
+        return self._commands[command_id] if command_id else None
+    
+    async def get_all_commands(self) -> List[Command]:
+        """Business rule: command.listing - return all commands from replayed state"""
+        return list(self._commands.values())
+    
+    async def get_processing_commands(self) -> List[Command]:
+        """Business rule: command.lease - processing commands without copying the whole store"""
+        return [command for command in self._commands.values() if command.status == "processing"]
+    
+    async def find_commands_by_client_id(self, client_id: str) -> List[Command]:
+        """Business rule: command.client_filtering - filter all commands for specific client"""
+        return [
+            cmd for cmd in self._commands.values()
+            if cmd.target_client_id == client_id
+        ]
+
+
+class SqliteCommandRepository(_CommandRecordCodec, CommandRepository):
+    """SQLite command store (WAL journal) with indexed dispatch queries"""
+    
+    # Queries run on the storage thread pool; self._lock keeps the shared connection single-user
+    _run_io = staticmethod(run_storage_io)
+    
+    _COLUMNS = (
+        "command_id", "target_client_id", "content", "type", "status", "created_at",
+        "started_at", "completed_at", "result", "error", "execution_time",
+        "lease_expires_at", "delivery_attempts", "result_ref", "result_size", "result_sha256",
+        "result_encoding"
+    )
+    # Columns added after the first schema version: name -> definition
+    _ADDED_COLUMNS = {
+        "lease_expires_at": "TEXT",
+        "delivery_attempts": "INTEGER NOT NULL DEFAULT 0",
+        "result_ref": "TEXT",
+        "result_size": "INTEGER",
+        "result_sha256": "TEXT",
+        "result_encoding": "TEXT",
+    }
+    
+    def __init__(self, data_dir: str = "data", database_name: str = "brief_bridge.db",
+                 blob_threshold: int = DEFAULT_BLOB_THRESHOLD,
+                 compression_level: int = DEFAULT_RESULT_COMPRESSION_LEVEL) -> None:
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self._init_blob_store(self.data_dir, blob_threshold, compression_level)
+        self.database_file = self.data_dir / database_name
+        self._lock = asyncio.Lock()
+        self._connection = sqlite3.connect(str(self.database_file), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._create_schema()
+    
+    def _create_schema(self) -> None:
+        """Create table and dispatch indexes if missing"""
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS commands (
+                    command_id TEXT PRIMARY KEY,
+                    target_client_id TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    type TEXT NOT NULL DEFAULT 'shell',
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    created_at TEXT,
+                    started_at TEXT,
+                    completed_at TEXT,
+                    result TEXT,
+                    error TEXT,
+                    execution_time REAL,
+                    lease_expires_at TEXT,
+                    delivery_attempts INTEGER NOT NULL DEFAULT 0,
+                    result_ref TEXT,
+                    result_size INTEGER,
+                    result_sha256 TEXT,
+                    result_encoding TEXT
+                )
+            """)
+            existing_columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(commands)")}
+            for column, definition in self._ADDED_COLUMNS.items():
+                if column not in existing_columns:
+                    self._connection.execute(f"ALTER TABLE commands ADD COLUMN {column} {definition}")
+            # Serves command.dispatch: pending commands for one client in creation order
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_commands_dispatch "
+                "ON commands (target_client_id, status, created_at)"
+            )
+            # Serves command.client_filtering: full history for one client in creation order
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_commands_client_history "
+                "ON commands (target_client_id, created_at)"
+            )
+            # Serves command.lease: the sweeper scans processing commands only
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_commands_status ON commands (status)"
+            )
+            # Serves command.listing: pages in (created_at, command_id) order and created_since
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_commands_listing ON commands (created_at, command_id)"
+            )
+    
+    def _row_to_command(self, row: sqlite3.Row) -> Command:
+        """Convert database row to Command object"""
+        return self._dict_to_command(dict(row))
+    
+    def _select(self, where: str = "", params: tuple = (), order_by: str = "created_at") -> List[Command]:
+        """Run a SELECT over the commands table ordered by creation time"""
+        query = f"SELECT {', '.join(self._COLUMNS)} FROM commands {where} ORDER BY {order_by}"
+        rows = self._connection.execute(query, params).fetchall()
+        return [self._row_to_command(row) for row in rows]
+    
+    async def close(self) -> None:
+        """Lifecycle: close the database connection"""
         async with self._lock:
-            commands_data = await self._load_commands()
-            command_dict = commands_data.get(command_id)
-            if command_dict:
-                return self._dict_to_command(command_dict)
-            return None
+            await self._run_io(self._connection.close)
+    
+    def _upsert_rows(self, commands: List[Command]) -> None:
+        """Upsert command rows in a single transaction"""
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        rows = []
+        for command in commands:
+            record = self._command_to_dict(command)
+            rows.append(tuple(record[column] for column in self._COLUMNS))
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO commands ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+    
+    async def save_command(self, command: Command) -> Command:
+        """Business rule: command.persistence - upsert command row"""
+        await self._externalize_results([command])
+        async with self._lock:
+            await self._run_io(self._upsert_rows, [command])
+            return command
+    
+    async def save_commands(self, commands: List[Command]) -> List[Command]:
+        """Business rule: command.persistence - upsert several command rows in one transaction"""
+        await self._externalize_results(commands)
+        async with self._lock:
+            await self._run_io(self._upsert_rows, commands)
+            return commands
+    
+    def _query_rows(self, query: CommandQuery) -> List[Command]:
+        """Filter, order and limit in SQL (blocking)"""
+        conditions, params = [], []
+        for column, value in (("status", query.status), ("target_client_id", query.target_client_id),
+                              ("type", query.command_type)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if query.created_since:
+            conditions.append("created_at >= ?")
+            params.append(query.created_since.isoformat())
+        if query.after:
+            comparison = "<" if query.descending else ">"
+            conditions.append(f"(created_at, command_id) {comparison} (?, ?)")
+            params.extend(query.after)
+        direction = "DESC" if query.descending else "ASC"
+        order_by = f"created_at {direction}, command_id {direction}"
+        if query.limit is not None:
+            order_by += " LIMIT ?"
+            params.append(query.limit)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(where, tuple(params), order_by)
+    
+    async def query_commands(self, query: CommandQuery) -> List[Command]:
+        """Business rule: command.listing - filtered page selected by the database"""
+        async with self._lock:
+            return await self._run_io(self._query_rows, query)
+    
+    def _delete_rows(self, command_ids: List[str]) -> None:
+        """Delete command rows in a single transaction"""
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM commands WHERE command_id = ?",
+                [(command_id,) for command_id in command_ids]
+            )
+    
+    async def delete_commands(self, command_ids: List[str]) -> None:
+        """Business rule: command.retention - delete command rows in one transaction"""
+        async with self._lock:
+            await self._run_io(self._delete_rows, command_ids)
+    
+    async def find_command_by_id(self, command_id: str) -> Optional[Command]:
+        """Business rule: command.lookup - find command by primary key"""
+        async with self._lock:
+            commands = await self._run_io(self._select, "WHERE command_id = ?", (command_id,))
+            return commands[0] if commands else None
     
     async def get_pending_commands_for_client(self, client_id: str) -> List[Command]:
-        """Business rule: command.dispatch - filter pending commands for specific client from file"""
+        """Business rule: command.dispatch - indexed lookup of pending commands for client"""
         async with self._lock:
-            commands_data = await self._load_commands()
-            commands = [self._dict_to_command(data) for data in commands_data.values()]
-            return [
-                cmd for cmd in commands
-                if cmd.target_client_id == client_id and cmd.status == "pending"
-            ]
+            return await self._run_io(self._select, "WHERE target_client_id = ? AND status = 'pending'", (client_id,))
     
     async def get_all_commands(self) -> List[Command]:
-        """Business rule: command.listing - return all commands from file store"""
+        """Business rule: command.listing - return all commands from database"""
         async with self._lock:
-            commands_data = await self._load_commands()
-            return [self._dict_to_command(data) for data in commands_data.values()]
+            return await self._run_io(self._select)
     
     async def find_commands_by_client_id(self, client_id: str) -> List[Command]:
-        """Business rule: command.client_filtering - filter all commands for specific client from file"""
+        """Business rule: command.client_filtering - indexed lookup of all commands for client"""
+        async with self._lock:
+            return await self._run_io(self._select, "WHERE target_client_id = ?", (client_id,))
+    
+    async def get_processing_commands(self) -> List[Command]:
+        """Business rule: command.lease - processing commands only"""
         async with self._lock:
-            commands_data = await self._load_commands()
-            commands = [self._dict_to_command(data) for data in commands_data.values()]
-            return [
-                cmd for cmd in commands
-                if cmd.target_client_id == client_id
-            ]
\ No newline at end of file
+            return await self._run_io(self._select, "WHERE status = 'processing'")
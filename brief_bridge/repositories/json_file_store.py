@@ -0,0 +1,149 @@
+"""In-memory record store backed by a single JSON file
+
+The file repositories are the only writers of their JSON files, so the
+records are loaded once and then served from memory; reads cost no disk I/O.
+Writes update memory and mark the store dirty. The file is then rewritten
+(temp file + atomic rename) either before the save returns (flush_interval 0),
+or by a background flusher every flush_interval seconds and on shutdown,
+trading that window of durability for fewer rewrites.
+
+Durable saves are group-committed: saves arriving within group_commit_window
+of each other (or while a rewrite is in progress) share one rewrite, and each
+caller returns once a rewrite that includes its records has completed.
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+# Seconds between background flushes; 0 writes the file before each save returns
+DEFAULT_FILE_FLUSH_INTERVAL = float(os.getenv('BRIEF_BRIDGE_FILE_FLUSH_INTERVAL', '0'))
+# Seconds a durable save waits for others to join the same rewrite
+DEFAULT_GROUP_COMMIT_WINDOW = float(os.getenv('BRIEF_BRIDGE_GROUP_COMMIT_WINDOW', '0.002'))
+
+
+class JsonFileStore:
+    def __init__(self, path: Path, run_io: Callable[..., Awaitable[Any]],
+                 flush_interval: float = DEFAULT_FILE_FLUSH_INTERVAL,
+                 json_default: Optional[Callable[[Any], Any]] = None,
+                 group_commit_window: float = DEFAULT_GROUP_COMMIT_WINDOW) -> None:
+        self.path = path
+        self._run_io = run_io
+        self._flush_interval = flush_interval
+        self._json_default = json_default
+        self._group_commit_window = group_commit_window
+        self._records: Optional[Dict[str, dict]] = None
+        # Every put bumps the write generation; a rewrite makes durable the generation it snapshotted
+        self._write_generation = 0
+        self._flushed_generation = 0
+        self._pending_commit: Optional[asyncio.Future] = None
+        self._load_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flusher_task: Optional[asyncio.Task] = None
+
+    def _read_file(self) -> Dict[str, dict]:
+        """Load records from the JSON file (blocking)"""
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: Failed to load {self.path.name}: {e}")
+            return {}
+
+    def _write_file(self, records: Dict[str, dict]) -> None:
+        """Save records to the JSON file (blocking)"""
+        try:
+            # Atomic write: write to temp file first, then rename
+            temp_file = self.path.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=2, ensure_ascii=False, default=self._json_default)
+
+            # Atomic rename
+            temp_file.replace(self.path)
+        except OSError as e:
+            print(f"Error: Failed to save {self.path.name}: {e}")
+            raise
+
+    async def records(self) -> Dict[str, dict]:
+        """Authoritative records by ID, loaded from disk on first use
+
+        Records are replaced, never modified in place, so callers may hand
+        them to other threads without copying.
+        """
+        if self._records is None:
+            async with self._load_lock:
+                if self._records is None:
+                    self._records = await self._run_io(self._read_file)
+        return self._records
+
+    async def put(self, records: Dict[str, dict]) -> None:
+        """Store records; returns once durable unless a flush interval is configured"""
+        current = await self.records()
+        current.update(records)
+        await self._changed()
+
+    async def remove(self, record_ids: Iterable[str]) -> None:
+        """Delete records; returns once durable unless a flush interval is configured"""
+        current = await self.records()
+        for record_id in record_ids:
+            current.pop(record_id, None)
+        await self._changed()
+
+    async def _changed(self) -> None:
+        self._write_generation += 1
+        if self._flush_interval <= 0:
+            await self._commit(self._write_generation)
+
+    async def _commit(self, generation: int) -> None:
+        """Wait until a rewrite covering ``generation`` completes, joining the forming group"""
+        while self._flushed_generation < generation:
+            if self._pending_commit is None:
+                self._pending_commit = asyncio.ensure_future(self._group_commit())
+            # Shielded: a cancelled caller must not cancel the rewrite others wait on
+            await asyncio.shield(self._pending_commit)
+
+    async def _group_commit(self) -> None:
+        """Let concurrent saves join for a moment, then rewrite once for all of them"""
+        await asyncio.sleep(self._group_commit_window)
+        # Saves from now on form the next group (written after this rewrite)
+        self._pending_commit = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Rewrite the file if anything changed since the last flush"""
+        async with self._flush_lock:
+            generation = self._write_generation
+            if generation == self._flushed_generation:
+                return
+            snapshot = dict(self._records)
+            await self._run_io(self._write_file, snapshot)
+            self._flushed_generation = generation
+
+    async def _run_flusher(self) -> None:
+        """Background loop: flush every flush_interval seconds"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except OSError:
+                pass  # Already reported; retried on the next interval
+
+    async def start(self) -> None:
+        """Lifecycle: start the background flusher when writes are deferred"""
+        if self._flush_interval > 0 and self._flusher_task is None:
+            self._flusher_task = asyncio.create_task(self._run_flusher())
+
+    async def close(self) -> None:
+        """Lifecycle: stop the flusher and write any unflushed records"""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        await self.flush()
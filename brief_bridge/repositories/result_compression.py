@@ -0,0 +1,36 @@
+"""zlib compression of stored command results
+
+Shell output is highly repetitive, so results are compressed before they are
+written: inline results as base64 text inside the command record, blobs as
+independently compressed frames so ranged reads still decompress only the
+frames they touch. Reads detect the encoding, so stores written with any
+level (or none) stay readable after the setting changes.
+"""
+import base64
+import os
+import zlib
+from typing import Optional, Tuple
+
+# zlib level 1-9 for newly stored results; 0 stores them uncompressed
+DEFAULT_RESULT_COMPRESSION_LEVEL = int(os.getenv('BRIEF_BRIDGE_RESULT_COMPRESSION_LEVEL', '6'))
+# Shorter results are kept as plain text: compression would barely pay for the base64 overhead
+MIN_COMPRESSED_RESULT_LENGTH = 256
+
+ZLIB_ENCODING = "zlib"
+
+
+def encode_result(result: Optional[str], level: int) -> Tuple[Optional[str], Optional[str]]:
+    """Stored form of a result and its encoding (None when kept as plain text)"""
+    if result is None or level <= 0 or len(result) < MIN_COMPRESSED_RESULT_LENGTH:
+        return result, None
+    encoded = base64.b64encode(zlib.compress(result.encode('utf-8'), level)).decode('ascii')
+    if len(encoded) >= len(result):
+        return result, None
+    return encoded, ZLIB_ENCODING
+
+
+def decode_result(stored: Optional[str], encoding: Optional[str]) -> Optional[str]:
+    """Result text from its stored form"""
+    if stored is None or encoding != ZLIB_ENCODING:
+        return stored
+    return zlib.decompress(base64.b64decode(stored)).decode('utf-8')
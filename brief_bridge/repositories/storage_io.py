@@ -0,0 +1,21 @@
+"""Dedicated thread pool for blocking repository I/O
+
+File reads/writes, JSON (de)serialization and SQLite queries run here so a
+slow disk or a large store never stalls the event loop that serves polls,
+health checks and install-script downloads.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+STORAGE_IO_THREADS = int(os.getenv('BRIEF_BRIDGE_STORAGE_IO_THREADS', '4'))
+
+_storage_executor = ThreadPoolExecutor(max_workers=STORAGE_IO_THREADS, thread_name_prefix="brief-bridge-storage")
+
+
+async def run_storage_io(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking storage call on the storage thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_storage_executor, functools.partial(func, *args))
@@ -0,0 +1,198 @@
+"""In-process presence table: when each client was last seen polling
+
+Polls are the most frequent request the server handles, so recording them
+must not touch storage. The table is updated in memory and marked dirty; the
+presence use case persists dirty entries to the client repository in the
+background. Reads overlay the table onto stored clients, so the API always
+shows the latest activity even before it is flushed.
+
+Offline detection is driven by a min-heap of deadlines (last_seen plus the
+offline threshold) instead of scanning every client. Each tracked client has
+at most one heap entry: a heartbeat only moves last_seen, and an entry that
+comes due for a client seen since is pushed back to its new deadline.
+
+Poll responses tell each client when to poll next (``next_poll_after``). The
+table remembers when that poll is due, so a client obeying a long hint is
+not taken for silent before the hint has run out.
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import heapq
+import os
+from brief_bridge.entities.client import Client
+from brief_bridge.services.poll_pacing import DEFAULT_MAX_POLL_DELAY
+
+# Seconds without a poll after which a client is marked offline
+DEFAULT_CLIENT_OFFLINE_THRESHOLD = float(os.getenv('CLIENT_OFFLINE_THRESHOLD_SECONDS', '600'))
+# Poll interval assumed until a client's own is observed (the bundled clients' default)
+DEFAULT_CLIENT_POLL_INTERVAL = float(os.getenv('BRIEF_BRIDGE_CLIENT_POLL_INTERVAL', '5.0'))
+# Missed poll intervals after which a client counts as unresponsive
+DEFAULT_UNRESPONSIVE_POLL_INTERVALS = float(os.getenv('BRIEF_BRIDGE_UNRESPONSIVE_POLL_INTERVALS', '3'))
+# Weight of the newest gap in the smoothed poll interval
+_POLL_INTERVAL_SMOOTHING = 0.3
+
+
+@dataclass
+class ClientPresence:
+    last_seen: datetime
+    status: str = "online"
+    # Smoothed gap between consecutive polls, None until two polls were seen
+    poll_interval: Optional[float] = None
+    # Last poll; None while the client is busy (other activity since its last poll)
+    last_polled: Optional[datetime] = None
+    # When the last poll response told the client to poll again; None if no hint is known
+    next_poll_at: Optional[datetime] = None
+
+
+@dataclass
+class PickupEstimate:
+    responsive: bool
+    # Seconds until the client is expected to fetch a new command, None if unknown
+    expected_seconds: Optional[float] = None
+    silent_seconds: Optional[float] = None
+
+
+class ClientPresenceTable:
+    def __init__(self, offline_threshold: float = DEFAULT_CLIENT_OFFLINE_THRESHOLD,
+                 default_poll_interval: float = DEFAULT_CLIENT_POLL_INTERVAL,
+                 unresponsive_poll_intervals: float = DEFAULT_UNRESPONSIVE_POLL_INTERVALS,
+                 max_poll_hint: float = DEFAULT_MAX_POLL_DELAY) -> None:
+        self.offline_threshold = offline_threshold
+        self.default_poll_interval = default_poll_interval
+        self.unresponsive_poll_intervals = unresponsive_poll_intervals
+        # Longest next_poll_after assumed for a client whose last hint is unknown
+        self.max_poll_hint = max_poll_hint
+        self._entries: Dict[str, ClientPresence] = {}
+        self._dirty: Set[str] = set()
+        # (deadline timestamp, client_id); at most one entry per client in _scheduled
+        self._deadlines: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+
+    def record_seen(self, client_id: str, seen_at: Optional[datetime] = None, polled: bool = True) -> ClientPresence:
+        """Business rule: client.activity_tracking - note a poll (or other activity); offline clients come back online"""
+        seen_at = seen_at or datetime.now(timezone.utc)
+        previous = self._entries.get(client_id)
+        presence = ClientPresence(last_seen=seen_at)
+        if previous is not None and previous.status == "online":
+            presence.poll_interval = previous.poll_interval
+            if polled and previous.last_polled is not None:
+                # Gaps spanning a busy period or an offline spell say nothing about the poll loop
+                gap = (seen_at - previous.last_polled).total_seconds()
+                presence.poll_interval = gap if previous.poll_interval is None else (
+                    _POLL_INTERVAL_SMOOTHING * gap + (1 - _POLL_INTERVAL_SMOOTHING) * previous.poll_interval)
+        presence.last_polled = seen_at if polled else None
+        self._entries[client_id] = presence
+        self._dirty.add(client_id)
+        self._schedule(client_id, presence)
+        return presence
+
+    def record_poll_hint(self, client_id: str, next_poll_after: float, issued_at: Optional[datetime] = None) -> None:
+        """Business rule: client.poll_pacing - the client was told to wait next_poll_after seconds before polling"""
+        presence = self._entries.get(client_id)
+        if presence is not None:
+            issued_at = issued_at or datetime.now(timezone.utc)
+            presence.next_poll_at = issued_at + timedelta(seconds=next_poll_after)
+
+    def track(self, client: Client) -> None:
+        """Start watching a stored client that has not polled since startup (not marked dirty)"""
+        if client.client_id in self._entries or client.last_seen is None:
+            return
+        presence = ClientPresence(last_seen=client.last_seen, status=client.status)
+        self._entries[client.client_id] = presence
+        if presence.status == "online":
+            self._schedule(client.client_id, presence)
+
+    def estimate_pickup(self, client: Client, now: Optional[datetime] = None) -> PickupEstimate:
+        """Business rule: client.availability - judge from poll history whether and when the client fetches new work
+
+        A client is unresponsive once it is offline or has missed its next
+        poll by more than unresponsive_poll_intervals poll intervals. The next
+        poll is due when the last poll hint runs out; without a known hint (new
+        client, restart, busy client) the client may be sleeping the longest
+        hint. Its own interval only ever extends the default, so heartbeats of
+        a busy client keep it responsive.
+        """
+        self.apply(client)
+        if client.status != "online":
+            return PickupEstimate(responsive=False)
+        if client.last_seen is None:
+            return PickupEstimate(responsive=True)
+        now = now or datetime.now(timezone.utc)
+        last_seen = client.last_seen if client.last_seen.tzinfo else client.last_seen.replace(tzinfo=timezone.utc)
+        silent = max((now - last_seen).total_seconds(), 0.0)
+        presence = self._entries.get(client.client_id)
+        interval = (presence.poll_interval if presence else None) or self.default_poll_interval
+        hinted_poll_at = presence.next_poll_at if presence else None
+        next_poll_at = hinted_poll_at or last_seen + timedelta(seconds=self.max_poll_hint)
+        overdue = (now - next_poll_at).total_seconds()
+        if overdue > max(interval, self.default_poll_interval) * self.unresponsive_poll_intervals:
+            return PickupEstimate(responsive=False, silent_seconds=silent)
+        busy = presence is not None and presence.last_polled is None
+        if busy:
+            expected = None
+        elif hinted_poll_at is not None:
+            expected = max(-overdue, 0.0)
+        else:
+            expected = max(interval - silent, 0.0)
+        return PickupEstimate(responsive=True, expected_seconds=expected, silent_seconds=silent)
+
+    def _deadline(self, presence: ClientPresence) -> float:
+        return presence.last_seen.timestamp() + self.offline_threshold
+
+    def _schedule(self, client_id: str, presence: ClientPresence) -> None:
+        if client_id not in self._scheduled:
+            self._scheduled.add(client_id)
+            heapq.heappush(self._deadlines, (self._deadline(presence), client_id))
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest time (timestamp) a client may go offline; None when nobody is online"""
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def expire_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Business rule: client.offline_detection - mark clients past their deadline offline; returns their IDs"""
+        current = (now or datetime.now(timezone.utc)).timestamp()
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= current:
+            _, client_id = heapq.heappop(self._deadlines)
+            self._scheduled.discard(client_id)
+            presence = self._entries.get(client_id)
+            if presence is None or presence.status != "online":
+                continue
+            deadline = self._deadline(presence)
+            if deadline > current:
+                # Seen again since this entry was pushed - wait for the new deadline
+                self._scheduled.add(client_id)
+                heapq.heappush(self._deadlines, (deadline, client_id))
+                continue
+            presence.status = "offline"
+            self._dirty.add(client_id)
+            expired.append(client_id)
+        return expired
+
+    def get(self, client_id: str) -> Optional[ClientPresence]:
+        return self._entries.get(client_id)
+
+    def forget(self, client_id: str) -> None:
+        """Drop a client the repository does not know"""
+        self._entries.pop(client_id, None)
+        self._dirty.discard(client_id)
+        # A leftover heap entry is skipped when it comes due
+
+    def take_dirty(self) -> Dict[str, ClientPresence]:
+        """Entries changed since the last call (copies), for persisting"""
+        dirty = {client_id: replace(self._entries[client_id]) for client_id in self._dirty if client_id in self._entries}
+        self._dirty.clear()
+        return dirty
+
+    def mark_dirty(self, client_ids) -> None:
+        """Persist these entries again on the next flush (e.g. after a failed write)"""
+        self._dirty.update(client_id for client_id in client_ids if client_id in self._entries)
+
+    def apply(self, client: Client) -> Client:
+        """Overlay recorded activity newer than the stored client onto it"""
+        presence = self._entries.get(client.client_id)
+        if presence and (client.last_seen is None or presence.last_seen >= client.last_seen):
+            client.last_seen = presence.last_seen
+            client.status = presence.status
+        return client
@@ -0,0 +1,139 @@
+"""In-process notifications for command lifecycle events"""
+import asyncio
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EventWaiter:
+    """Single-use wakeup bound to the event loop that created it"""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def signal(self) -> None:
+        """Wake the waiter; safe to call from any thread or event loop"""
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # Waiter's event loop already closed - nobody is waiting any more
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until signalled or timeout expires; returns True if signalled"""
+        if self._event.is_set():
+            self._event.clear()
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class _WaiterRegistry:
+    """Waiters grouped by key (command ID, client ID, ...)"""
+
+    def __init__(self) -> None:
+        self._waiters: Dict[str, Set[EventWaiter]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, key: str) -> Iterator[EventWaiter]:
+        waiter = EventWaiter()
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+    def has_waiters(self, key: str) -> bool:
+        with self._lock:
+            return bool(self._waiters.get(key))
+
+    def notify(self, key: str) -> int:
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+        for waiter in waiters:
+            waiter.signal()
+        return len(waiters)
+
+
+class CommandEventBus:
+    """Registry of in-process waiters for command lifecycle events
+
+    Waiters subscribe before checking the repository and then sleep until
+    notified, so a result is observed as soon as it is stored instead of on
+    the next repository poll.
+
+    The bus also keeps a queue version per client, bumped on every queued
+    notification. A poll that saw an empty queue at some version can skip the
+    repository until the version moves. Versions restart with the process, so
+    tokens carry a per-process epoch.
+    """
+
+    def __init__(self) -> None:
+        self._epoch = uuid.uuid4().hex[:8]
+        self._queue_versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._completions = _WaiterRegistry()
+        self._queued = _WaiterRegistry()
+        self._output = _WaiterRegistry()
+        self._client_status = _WaiterRegistry()
+
+    def completion_waiter(self, command_id: str):
+        """Subscribe to completion of a command (use as a context manager)"""
+        return self._completions.subscribe(command_id)
+
+    def notify_command_completed(self, command_id: str) -> None:
+        """Wake everyone waiting for this command to complete"""
+        woken = self._completions.notify(command_id)
+        logger.debug(f"Command {command_id} completed, woke {woken} waiter(s)")
+
+    def command_queued_waiter(self, client_id: str):
+        """Subscribe to new commands queued for a client (use as a context manager)"""
+        return self._queued.subscribe(client_id)
+
+    def notify_command_queued(self, client_id: str) -> None:
+        """Wake long-polling requests of the client a command was queued for"""
+        with self._versions_lock:
+            self._queue_versions[client_id] = self._queue_versions.get(client_id, 0) + 1
+        woken = self._queued.notify(client_id)
+        logger.debug(f"Command queued for {client_id}, woke {woken} poller(s)")
+
+    def queue_token(self, client_id: str) -> str:
+        """Current queue version of a client; read it before looking at the repository"""
+        return f"{self._epoch}:{self._queue_versions.get(client_id, 0)}"
+
+    def is_client_polling(self, client_id: str) -> bool:
+        """True while the client holds a long poll open (a queued command reaches it at once)"""
+        return self._queued.has_waiters(client_id)
+
+    def output_waiter(self, command_id: str):
+        """Subscribe to new output chunks of a command (use as a context manager)"""
+        return self._output.subscribe(command_id)
+
+    def notify_output_appended(self, command_id: str) -> None:
+        """Wake everyone tailing this command's output"""
+        self._output.notify(command_id)
+
+    def client_status_waiter(self, client_id: str):
+        """Subscribe to online/offline changes of a client (use as a context manager)"""
+        return self._client_status.subscribe(client_id)
+
+    def notify_client_status_changed(self, client_id: str) -> None:
+        """Wake everyone watching this client's presence"""
+        woken = self._client_status.notify(client_id)
+        logger.debug(f"Client {client_id} changed status, woke {woken} waiter(s)")
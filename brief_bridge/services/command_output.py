@@ -0,0 +1,94 @@
+"""In-process buffer for output streamed by clients while a command runs"""
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+# Per-command bytes of live output kept for tailing; older chunks are dropped first
+DEFAULT_MAX_RETAINED_OUTPUT = int(os.getenv('BRIEF_BRIDGE_MAX_LIVE_OUTPUT_BYTES', str(1024 * 1024)))
+# Number of commands whose live output is tracked before the least recently written is evicted
+DEFAULT_MAX_TRACKED_COMMANDS = int(os.getenv('BRIEF_BRIDGE_MAX_LIVE_OUTPUT_COMMANDS', '1000'))
+
+
+@dataclass
+class OutputChunk:
+    sequence: int
+    data: str
+
+
+@dataclass
+class OutputSlice:
+    chunks: List[OutputChunk]
+    next_since: int          # pass back as ``since`` to continue tailing
+    truncated: bool = False  # chunks after ``since`` were dropped to bound memory
+
+
+@dataclass
+class _CommandOutput:
+    chunks: Deque[Tuple[int, str]] = field(default_factory=deque)
+    retained_bytes: int = 0
+    last_sequence: int = -1
+    dropped_through: int = -1  # highest sequence evicted from the buffer
+
+
+class CommandOutputBuffer:
+    """Bounded, sequence-numbered output chunks per command
+
+    Clients post chunks with increasing sequence numbers; re-sent chunks are
+    ignored, so retries are safe. Readers tail with ``since`` (the last
+    sequence they saw). Memory is bounded per command and in the number of
+    commands tracked; the complete output still arrives with the final result.
+    """
+
+    def __init__(self, max_retained_bytes: int = DEFAULT_MAX_RETAINED_OUTPUT,
+                 max_tracked_commands: int = DEFAULT_MAX_TRACKED_COMMANDS) -> None:
+        self._max_retained_bytes = max_retained_bytes
+        self._max_tracked_commands = max_tracked_commands
+        self._outputs: "OrderedDict[str, _CommandOutput]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, command_id: str, sequence: int, data: str) -> bool:
+        """Store a chunk; returns False if this sequence was already received"""
+        with self._lock:
+            output = self._outputs.get(command_id)
+            if output is None:
+                output = self._outputs[command_id] = _CommandOutput()
+                while len(self._outputs) > self._max_tracked_commands:
+                    self._outputs.popitem(last=False)
+            else:
+                self._outputs.move_to_end(command_id)
+
+            if sequence <= output.last_sequence:
+                return False
+            output.chunks.append((sequence, data))
+            output.retained_bytes += len(data.encode('utf-8'))
+            output.last_sequence = sequence
+            while output.retained_bytes > self._max_retained_bytes and len(output.chunks) > 1:
+                dropped_sequence, dropped_data = output.chunks.popleft()
+                output.retained_bytes -= len(dropped_data.encode('utf-8'))
+                output.dropped_through = dropped_sequence
+            return True
+
+    def read_since(self, command_id: str, since: int = -1) -> OutputSlice:
+        """Chunks with sequence greater than ``since``, oldest first"""
+        with self._lock:
+            output = self._outputs.get(command_id)
+            if output is None:
+                return OutputSlice(chunks=[], next_since=since)
+            chunks = [OutputChunk(sequence, data) for sequence, data in output.chunks if sequence > since]
+            return OutputSlice(
+                chunks=chunks,
+                next_since=max(since, output.last_sequence),
+                truncated=output.dropped_through > since
+            )
+
+    def discard(self, command_id: str) -> None:
+        """Forget live output of a command"""
+        with self._lock:
+            self._outputs.pop(command_id, None)
+
+    def last_sequence(self, command_id: str) -> Optional[int]:
+        with self._lock:
+            output = self._outputs.get(command_id)
+            return output.last_sequence if output else None
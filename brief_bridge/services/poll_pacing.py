@@ -0,0 +1,90 @@
+"""Server-driven poll pacing: how long a client should wait before its next poll
+
+Every poll response carries a ``next_poll_after`` hint. A client with more
+commands queued is told to poll again at once. Otherwise the delay follows
+the client's recent command rate: a client that just received work polls
+again quickly, and an idle client backs off to the maximum delay. A long
+poll is re-armed right away, since the server holds it until work arrives.
+While more polls are in flight than the server is sized for, every delay is
+stretched (long polls included) so the fleet sheds load.
+"""
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import math
+import os
+import time
+
+# Longest delay a client is told to wait between polls in normal operation
+DEFAULT_MAX_POLL_DELAY = float(os.getenv('BRIEF_BRIDGE_MAX_POLL_DELAY', '30.0'))
+# Concurrent polls (including held long polls) the server handles without shedding load
+DEFAULT_POLL_LOAD_TARGET = int(os.getenv('BRIEF_BRIDGE_POLL_LOAD_TARGET', '500'))
+# Upper bound for delays stretched by load shedding
+MAX_SHED_POLL_DELAY = 120.0
+# Seconds over which past commands stop counting towards a client's rate
+_RATE_WINDOW = 60.0
+# Fraction of the expected gap between commands a client waits before polling
+_DELAY_FRACTION = 0.05
+
+
+@dataclass
+class _CommandRate:
+    """Exponentially decaying count of delivered commands"""
+    count: float = 0.0
+    updated_at: float = 0.0
+
+    def decayed(self, now: float) -> float:
+        return self.count * math.exp(-(now - self.updated_at) / _RATE_WINDOW)
+
+
+class PollPacer:
+    def __init__(self, max_delay: float = DEFAULT_MAX_POLL_DELAY,
+                 load_target: int = DEFAULT_POLL_LOAD_TARGET) -> None:
+        self.max_delay = max_delay
+        self.load_target = load_target
+        self._rates: Dict[str, _CommandRate] = {}
+        self._polls_in_flight = 0
+
+    @contextmanager
+    def tracking_poll(self) -> Iterator[None]:
+        """Count a poll request as in flight for the duration of the block"""
+        self._polls_in_flight += 1
+        try:
+            yield
+        finally:
+            self._polls_in_flight -= 1
+
+    def record_command_delivered(self, client_id: str, now: Optional[float] = None) -> None:
+        """Business rule: client.poll_pacing - a poll handed the client a command"""
+        now = time.monotonic() if now is None else now
+        rate = self._rates.setdefault(client_id, _CommandRate(updated_at=now))
+        rate.count = rate.decayed(now) + 1.0
+        rate.updated_at = now
+
+    def commands_per_second(self, client_id: str, now: Optional[float] = None) -> float:
+        rate = self._rates.get(client_id)
+        if rate is None:
+            return 0.0
+        return rate.decayed(time.monotonic() if now is None else now) / _RATE_WINDOW
+
+    def load_factor(self) -> float:
+        """How far concurrent polls exceed the load target (1.0 when within it)"""
+        return max(1.0, self._polls_in_flight / self.load_target) if self.load_target > 0 else 1.0
+
+    def next_poll_after(self, client_id: str, queue_depth: int, long_polled: bool = False,
+                        now: Optional[float] = None) -> float:
+        """Business rule: client.poll_pacing - seconds the client should wait before polling again
+
+        A long poll already held the client's request open, so unless the
+        server is shedding load the client re-arms it at once; sleeping
+        instead would leave nobody waiting on the server for new commands.
+        """
+        if queue_depth > 0:
+            return 0.0
+        load_factor = self.load_factor()
+        if long_polled and load_factor <= 1.0:
+            return 0.0
+        rate = self.commands_per_second(client_id, now)
+        delay = min(_DELAY_FRACTION / rate, self.max_delay) if rate > 0 else self.max_delay
+        delay = min(delay * load_factor, max(MAX_SHED_POLL_DELAY, self.max_delay))
+        return round(delay, 1)
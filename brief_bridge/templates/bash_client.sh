@@ -7,7 +7,10 @@ SERVER_URL="http://localhost:8000"
 CLIENT_ID=""
 CLIENT_NAME="Bash Client"
 POLL_INTERVAL=5
+LONG_POLL_WAIT=20
+MAX_COMMANDS=10
 IDLE_TIMEOUT_MINUTES=10
+OUTPUT_FLUSH_INTERVAL=1
 DEBUG_MODE=false
 
 # Parse command line arguments
@@ -29,6 +32,18 @@ while [[ $# -gt 0 ]]; do
             POLL_INTERVAL="$2"
             shift 2
             ;;
+        --long-poll-wait)
+            LONG_POLL_WAIT="$2"
+            shift 2
+            ;;
+        --max-commands)
+            MAX_COMMANDS="$2"
+            shift 2
+            ;;
+        --output-flush-interval)
+            OUTPUT_FLUSH_INTERVAL="$2"
+            shift 2
+            ;;
         --idle-timeout-minutes)
             IDLE_TIMEOUT_MINUTES="$2"
             shift 2
@@ -62,6 +77,9 @@ echo "Server: $SERVER_URL"
 echo "Client ID: $CLIENT_ID"
 echo "Client Name: $CLIENT_NAME"
 echo "Poll Interval: $POLL_INTERVAL seconds"
+echo "Long Poll Wait: $LONG_POLL_WAIT seconds"
+echo "Max Commands per Poll: $MAX_COMMANDS"
+echo "Output Flush Interval: $OUTPUT_FLUSH_INTERVAL seconds"
 echo "Idle Timeout: $IDLE_TIMEOUT_MINUTES minutes"
 echo "Press Ctrl+C to stop"
 echo ""
@@ -71,6 +89,11 @@ LAST_COMMAND_TIME=$(date +%s)
 CONSECUTIVE_404_COUNT=0
 SHOULD_TERMINATE=false
 
+# Commands of the batch being executed: not started yet, and finished but not reported
+BATCH_WAITING_IDS=""
+BATCH_UNREPORTED_IDS=()
+BATCH_UNREPORTED_RESULTS=()
+
 # Function to check idle timeout
 check_idle_timeout() {
     local current_time=$(date +%s)
@@ -173,10 +196,106 @@ register_client() {
     fi
 }
 
+# Function to JSON-escape stdin (without surrounding quotes), keeping line breaks as \n
+json_escape_lines() {
+    sed 's/\\/\\\\/g; s/"/\\"/g; s/\t/\\t/g; s/\r/\\r/g' | awk '{ printf "%s\\n", $0 }'
+}
+
+# Function to JSON-escape a string (without surrounding quotes); other control
+# characters (terminal escapes and the like) are dropped as JSON forbids them raw
+json_escape_string() {
+    printf '%s' "$1" | tr -d '\000-\010\013\014\016-\037' \
+        | sed 's/\\/\\\\/g; s/"/\\"/g; s/\t/\\t/g; s/\r/\\r/g' \
+        | awk 'NR > 1 { printf "\\n" } { printf "%s", $0 }'
+}
+
+# Function to append output written to a capture file since the last upload
+# Usage: append_new_output <file> <offset variable name> <final> <chunk file>
+append_new_output() {
+    local file="$1"
+    local offset_var="$2"
+    local final="$3"
+    local chunk_file="$4"
+    local offset=${!offset_var}
+    
+    if [ ! -f "$file" ]; then
+        return 0
+    fi
+    
+    local new_file="$chunk_file.new"
+    tail -c +$((offset + 1)) "$file" > "$new_file"
+    if [ "$final" != "true" ]; then
+        # Hold back a partial last line until it is complete
+        head -n "$(wc -l < "$new_file")" "$new_file" > "$new_file.lines"
+        mv "$new_file.lines" "$new_file"
+    fi
+    printf -v "$offset_var" '%d' $((offset + $(wc -c < "$new_file")))
+    cat "$new_file" >> "$chunk_file"
+    rm -f "$new_file"
+}
+
+# Function to upload output produced since the last upload (best effort)
+stream_output_chunk() {
+    local command_id="$1"
+    local final="$2"
+    local chunk_file="/tmp/bb_chunk_$$"
+    
+    : > "$chunk_file"
+    append_new_output "$STREAM_STDOUT_FILE" STREAM_STDOUT_OFFSET "$final" "$chunk_file"
+    append_new_output "$STREAM_STDERR_FILE" STREAM_STDERR_OFFSET "$final" "$chunk_file"
+    
+    if [ -s "$chunk_file" ]; then
+        local json_file="$chunk_file.json"
+        printf '{"sequence": %d, "data": "%s"}' "$STREAM_SEQUENCE" "$(json_escape_lines < "$chunk_file")" > "$json_file"
+        
+        # Live output is informational; the result still carries the complete output
+        curl -s -o /dev/null --connect-timeout 5 --max-time 10 \
+            -X POST -H 'Content-Type: application/json' \
+            -d @"$json_file" \
+            "$API_BASE/commands/$command_id/output" 2>/dev/null
+        
+        if [ "$DEBUG_MODE" = "true" ]; then
+            echo "[DEBUG] Uploaded output chunk $STREAM_SEQUENCE for command $command_id" >&2
+        fi
+        STREAM_SEQUENCE=$((STREAM_SEQUENCE + 1))
+        rm -f "$json_file"
+    fi
+    rm -f "$chunk_file"
+}
+
+# Function to renew the lease of a running command (best effort)
+send_heartbeat() {
+    local command_id="$1"
+    
+    curl -s -o /dev/null --connect-timeout 5 --max-time 10 -X POST \
+        "$API_BASE/commands/$command_id/heartbeat" 2>/dev/null
+    
+    if [ "$DEBUG_MODE" = "true" ]; then
+        echo "[DEBUG] Heartbeat sent for command $command_id" >&2
+    fi
+}
+
+# Function to print how often to renew a lease of lease_seconds (0: no lease)
+heartbeat_interval_for() {
+    local lease_seconds="$1"
+    local interval=0
+    if [ -n "$lease_seconds" ]; then
+        interval=$(( ${lease_seconds%.*} / 3 ))
+        if [ $interval -lt 1 ]; then
+            interval=1
+        fi
+    fi
+    echo $interval
+}
+
 # Function to execute bash command
+# Sets RESULT_SUCCESS, RESULT_OUTPUT, RESULT_ERROR (empty for none) and
+# RESULT_EXECUTION_TIME; run it in the current shell, not in $(...)
 execute_bash_command() {
     local command="$1"
     local timeout_seconds="$2"
+    local command_id="$3"
+    local lease_seconds="$4"
     
     if [ -z "$timeout_seconds" ]; then
         timeout_seconds=30
@@ -190,8 +309,10 @@ execute_bash_command() {
         echo "[LIFECYCLE] Client terminating gracefully..."
         SHOULD_TERMINATE=true
         
-        local result="{\"success\": true, \"output\": \"Client terminating gracefully on server request\", \"error\": null, \"execution_time\": 0.1}"
-        echo "$result"
+        RESULT_SUCCESS=true
+        RESULT_OUTPUT="Client terminating gracefully on server request"
+        RESULT_ERROR=""
+        RESULT_EXECUTION_TIME=0.1
         return 0
     fi
     
@@ -209,13 +330,54 @@ execute_bash_command() {
     local stdout_file="/tmp/bb_stdout_$$"
     local stderr_file="/tmp/bb_stderr_$$"
     
-    # Execute command with timeout if available
+    # Execute command in the background (with timeout if available) so output
+    # can be uploaded while it runs
     if command -v timeout >/dev/null 2>&1; then
-        timeout "${timeout_seconds}s" bash -c "$command" >"$stdout_file" 2>"$stderr_file"
-        exit_code=$?
+        timeout "${timeout_seconds}s" bash -c "$command" >"$stdout_file" 2>"$stderr_file" &
     else
-        bash -c "$command" >"$stdout_file" 2>"$stderr_file"
-        exit_code=$?
+        bash -c "$command" >"$stdout_file" 2>"$stderr_file" &
+    fi
+    local command_pid=$!
+    
+    STREAM_STDOUT_FILE="$stdout_file"
+    STREAM_STDERR_FILE="$stderr_file"
+    STREAM_STDOUT_OFFSET=0
+    STREAM_STDERR_OFFSET=0
+    STREAM_SEQUENCE=0
+    local last_flush=$SECONDS
+    local run_started=$SECONDS
+    
+    # Renew the dispatch lease a few times per lease period so the server
+    # does not take this client for dead while the command runs
+    local heartbeat_interval=$(heartbeat_interval_for "$lease_seconds")
+    local last_heartbeat=$SECONDS
+    
+    while kill -0 "$command_pid" 2>/dev/null; do
+        sleep 0.1
+        if [ -n "$command_id" ] && [ $((SECONDS - last_flush)) -ge $OUTPUT_FLUSH_INTERVAL ]; then
+            stream_output_chunk "$command_id" false
+            last_flush=$SECONDS
+        fi
+        # Report the batch's finished commands once this one runs a while, so
+        # their submitters do not wait for the rest of the batch
+        if [ ${#BATCH_UNREPORTED_IDS[@]} -gt 0 ] && [ $((SECONDS - run_started)) -ge $OUTPUT_FLUSH_INTERVAL ]; then
+            report_batch_results
+        fi
+        if [ $heartbeat_interval -gt 0 ] && [ $((SECONDS - last_heartbeat)) -ge $heartbeat_interval ]; then
+            send_heartbeat "$command_id"
+            # Commands of the same batch waiting their turn or to be reported hold leases too
+            for waiting_id in $BATCH_WAITING_IDS "${BATCH_UNREPORTED_IDS[@]}"; do
+                send_heartbeat "$waiting_id"
+            done
+            last_heartbeat=$SECONDS
+        fi
+    done
+    wait "$command_pid"
+    exit_code=$?
+    
+    # Upload the tail of the output if anything was streamed (short commands skip streaming)
+    if [ $STREAM_SEQUENCE -gt 0 ]; then
+        stream_output_chunk "$command_id" true
     fi
     
     # Read output files
@@ -233,76 +395,61 @@ execute_bash_command() {
     local execution_time=$((end_time - start_time))
     
     # Combine stdout and stderr for output
-    local combined_output=""
+    RESULT_OUTPUT=""
     if [ -n "$output" ]; then
-        combined_output="$output"
+        RESULT_OUTPUT="$output"
     fi
     if [ -n "$error_output" ]; then
-        if [ -n "$combined_output" ]; then
-            combined_output="$combined_output\n$error_output"
+        if [ -n "$RESULT_OUTPUT" ]; then
+            RESULT_OUTPUT="$RESULT_OUTPUT"$'\n'"$error_output"
         else
-            combined_output="$error_output"
+            RESULT_OUTPUT="$error_output"
         fi
     fi
-    
-    # Escape JSON special characters
-    combined_output=$(echo "$combined_output" | sed 's/\\/\\\\/g; s/"/\\"/g; s/\t/\\t/g; s/\n/\\n/g; s/\r/\\r/g')
+    RESULT_EXECUTION_TIME=$execution_time
     
     if [ $exit_code -eq 0 ]; then
         echo "[SUCCESS] Execution time: ${execution_time}s"
-        local result="{\"success\": true, \"output\": \"$combined_output\", \"error\": null, \"execution_time\": $execution_time}"
+        RESULT_SUCCESS=true
+        RESULT_ERROR=""
     else
         echo "[ERROR] Command failed with exit code $exit_code"
-        local error_msg="Command failed with exit code $exit_code"
-        error_msg=$(echo "$error_msg" | sed 's/\\/\\\\/g; s/"/\\"/g')
-        local result="{\"success\": false, \"output\": \"$combined_output\", \"error\": \"$error_msg\", \"execution_time\": $execution_time}"
+        RESULT_SUCCESS=false
+        RESULT_ERROR="Command failed with exit code $exit_code"
     fi
+    return 0
+}
+
+# Function to print the result set by execute_bash_command as the JSON object
+# /commands/result expects (each field is escaped here, exactly once)
+build_result_json() {
+    local command_id="$1"
+    local delivery_attempt="$2"
     
-    if [ "$DEBUG_MODE" = "true" ]; then
-        echo "[DEBUG] Generated result JSON: $result" >&2
+    local error_json="null"
+    if [ -n "$RESULT_ERROR" ]; then
+        error_json="\"$(json_escape_string "$RESULT_ERROR")\""
     fi
     
-    echo "$result"
-    return 0
+    # Echo the delivery so the server can refuse a result whose lease already lapsed
+    local delivery_field=""
+    if [ -n "$delivery_attempt" ]; then
+        delivery_field=", \"delivery_attempt\": $delivery_attempt"
+    fi
+    
+    printf '{"command_id": "%s"%s, "success": %s, "output": "%s", "error": %s, "execution_time": %s}' \
+        "$command_id" "$delivery_field" "$RESULT_SUCCESS" "$(json_escape_string "$RESULT_OUTPUT")" \
+        "$error_json" "$RESULT_EXECUTION_TIME"
 }
 
 # Function to submit command result
 submit_command_result() {
     local command_id="$1"
-    local result="$2"
+    local result_json="$2"
     
     # Create temp file for JSON payload
     local json_file="/tmp/bb_result_$$"
-    
-    # Parse individual fields from result JSON
-    local success=$(echo "$result" | grep -o '"success":[^,}]*' | cut -d: -f2 | tr -d ' ')
-    local output=$(echo "$result" | grep -o '"output":"[^"]*"' | cut -d'"' -f4)
-    local error=$(echo "$result" | grep -o '"error":"[^"]*"' | cut -d'"' -f4)
-    local execution_time=$(echo "$result" | grep -o '"execution_time":[^,}]*' | cut -d: -f2 | tr -d ' ')
-    
-    # Handle null values and escape for JSON
-    if [ "$error" = "null" ] || [ -z "$error" ]; then
-        error_json="null"
-    else
-        error_json="\"$(echo "$error" | sed 's/\\/\\\\/g; s/"/\\"/g')\""
-    fi
-    
-    if [ -z "$output" ]; then
-        output_json="\"\""
-    else
-        output_json="\"$(echo "$output" | sed 's/\\/\\\\/g; s/"/\\"/g')\""
-    fi
-    
-    # Write JSON to temp file (without quotes to allow variable expansion)
-    cat > "$json_file" << RESULT_EOF
-{
-  "command_id": "$command_id",
-  "success": $success,
-  "output": $output_json,
-  "error": $error_json,
-  "execution_time": $execution_time
-}
-RESULT_EOF
+    printf '%s' "$result_json" > "$json_file"
     
     # Log the JSON payload being sent
     if [ "$DEBUG_MODE" = "true" ]; then
@@ -340,9 +487,108 @@ RESULT_EOF
     return 1
 }
 
-# Function to poll for commands
+# Function to submit the results of a command batch in one request
+# (falls back to one request per result on servers without /commands/result/batch)
+submit_command_results() {
+    local -n batch_ids=$1
+    local -n batch_results=$2
+    local json_file="/tmp/bb_results_$$"
+    local index
+    
+    printf '{"results": [' > "$json_file"
+    for index in "${!batch_ids[@]}"; do
+        if [ $index -gt 0 ]; then
+            printf ', ' >> "$json_file"
+        fi
+        printf '%s' "${batch_results[$index]}" >> "$json_file"
+    done
+    printf ']}' >> "$json_file"
+    
+    local http_status
+    http_status=$(curl -s -o /dev/null -w '%{http_code}' --connect-timeout 30 --max-time 30 \
+        -X POST -H 'Content-Type: application/json' \
+        -d @"$json_file" \
+        "$API_BASE/commands/result/batch" 2>/dev/null)
+    rm -f "$json_file"
+    
+    if [ -n "$http_status" ] && [ "$http_status" -ge 200 ] && [ "$http_status" -lt 300 ]; then
+        echo "[RESULT] Submitted ${#batch_ids[@]} results in one request"
+        return 0
+    fi
+    
+    local failed=0
+    for index in "${!batch_ids[@]}"; do
+        if ! submit_command_result "${batch_ids[$index]}" "${batch_results[$index]}"; then
+            failed=1
+        fi
+    done
+    return $failed
+}
+
+# Function to report the results of a batch's finished commands in one request
+report_batch_results() {
+    if [ ${#BATCH_UNREPORTED_IDS[@]} -eq 0 ]; then
+        return 0
+    fi
+    if ! submit_command_results BATCH_UNREPORTED_IDS BATCH_UNREPORTED_RESULTS; then
+        echo "Failed to submit some results, but continuing..."
+    fi
+    BATCH_UNREPORTED_IDS=()
+    BATCH_UNREPORTED_RESULTS=()
+}
+
+# Function to run every command of a batched poll; results of consecutive
+# short commands are reported together, and none waits on a long command
+execute_command_batch() {
+    local response="$1"
+    local lease_seconds="$2"
+    local command_ids=()
+    local command_contents=()
+    local delivery_attempts=()
+    mapfile -t command_ids < <(echo "$response" | grep -o '"command_id":"[^"]*"' | cut -d'"' -f4)
+    mapfile -t command_contents < <(echo "$response" | grep -o '"command_content":"[^"]*"' | cut -d'"' -f4)
+    mapfile -t delivery_attempts < <(echo "$response" | grep -o '"delivery_attempt":[0-9]*' | cut -d: -f2)
+    local timeout=$(echo "$response" | grep -o '"timeout":[0-9]*' | head -1 | cut -d: -f2)
+    local heartbeat_interval=$(heartbeat_interval_for "$lease_seconds")
+    local last_heartbeat=$SECONDS
+    local index
+    
+    BATCH_UNREPORTED_IDS=()
+    BATCH_UNREPORTED_RESULTS=()
+    for index in "${!command_ids[@]}"; do
+        # Short commands never heartbeat themselves; keep the other leases alive here
+        if [ $heartbeat_interval -gt 0 ] && [ $((SECONDS - last_heartbeat)) -ge $heartbeat_interval ]; then
+            for waiting_id in "${BATCH_UNREPORTED_IDS[@]}" "${command_ids[@]:$index}"; do
+                send_heartbeat "$waiting_id"
+            done
+            last_heartbeat=$SECONDS
+        fi
+        BATCH_WAITING_IDS="${command_ids[*]:$((index + 1))}"
+        execute_bash_command "${command_contents[$index]}" "${timeout:-30}" "${command_ids[$index]}" "$lease_seconds"
+        BATCH_UNREPORTED_IDS+=("${command_ids[$index]}")
+        BATCH_UNREPORTED_RESULTS+=("$(build_result_json "${command_ids[$index]}" "${delivery_attempts[$index]}")")
+        if [ "$SHOULD_TERMINATE" = "true" ]; then
+            break
+        fi
+    done
+    BATCH_WAITING_IDS=""
+    
+    # Commands skipped after a terminate are requeued by the server once their leases lapse
+    report_batch_results
+}
+
+# Function to poll for commands (server holds the request up to LONG_POLL_WAIT seconds)
 get_pending_command() {
-    local body="{\"client_id\": \"$CLIENT_ID\"}"
+    local batch_field=""
+    if [ "$MAX_COMMANDS" -gt 1 ]; then
+        # Fetch up to MAX_COMMANDS queued commands in one round trip
+        batch_field=", \"max_commands\": $MAX_COMMANDS"
+    fi
+    local body="{\"client_id\": \"$CLIENT_ID\", \"wait\": $LONG_POLL_WAIT, \"lease\": true$batch_field}"
+    if [ -n "$QUEUE_VERSION" ]; then
+        # Lets the server answer without a queue lookup while nothing new was queued
+        body="{\"client_id\": \"$CLIENT_ID\", \"wait\": $LONG_POLL_WAIT, \"lease\": true$batch_field, \"queue_version\": \"$QUEUE_VERSION\"}"
+    fi
     
     local response
     response=$(make_http_request "$API_BASE/commands/poll" "POST" "$body")
@@ -356,6 +602,8 @@ get_pending_command() {
             echo "$response"
             return 0
         fi
+        # Empty poll: still pass on the server's next_poll_after hint
+        echo "$response"
     fi
     
     return 1
@@ -387,6 +635,7 @@ fi
 
 # Main polling loop with lifecycle management
 consecutive_errors=0
+QUEUE_VERSION=""
 max_consecutive_errors=5
 
 echo "Starting polling loop..."
@@ -403,27 +652,42 @@ while [ "$SHOULD_TERMINATE" != "true" ]; do
     fi
     
     # Poll for pending commands
+    poll_started=$(date +%s)
+    command_executed=false
     command_response=$(get_pending_command)
+    poll_status=$?
+    # Only responses that left the queue empty carry a version; anything else forces a full poll
+    QUEUE_VERSION=$(parse_json_field "$command_response" "queue_version")
     
-    if [ $? -eq 0 ] && [ -n "$command_response" ]; then
+    if [ $poll_status -eq 0 ] && [ -n "$command_response" ]; then
+        command_executed=true
+
         # Reset error counter on successful poll
         consecutive_errors=0
         
-        # Extract command details
-        command_id=$(parse_json_field "$command_response" "command_id")
-        command_content=$(parse_json_field "$command_response" "command_content")
-        timeout=$(parse_json_field "$command_response" "timeout")
-        
-        if [ -z "$timeout" ]; then
-            timeout=30
-        fi
-        
-        # Execute the command
-        result=$(execute_bash_command "$command_content" "$timeout")
+        lease_seconds=$(echo "$command_response" | grep -o '"lease_seconds":[0-9.]*' | cut -d: -f2)
         
-        # Submit the result
-        if ! submit_command_result "$command_id" "$result"; then
-            echo "Failed to submit result, but continuing..."
+        if echo "$command_response" | grep -q '"commands":\['; then
+            # Several queued commands in one poll (max_commands)
+            execute_command_batch "$command_response" "$lease_seconds"
+        else
+            # Extract command details
+            command_id=$(parse_json_field "$command_response" "command_id")
+            command_content=$(parse_json_field "$command_response" "command_content")
+            timeout=$(parse_json_field "$command_response" "timeout")
+            delivery_attempt=$(echo "$command_response" | grep -o '"delivery_attempt":[0-9]*' | cut -d: -f2)
+            
+            if [ -z "$timeout" ]; then
+                timeout=30
+            fi
+            
+            # Execute the command
+            execute_bash_command "$command_content" "$timeout" "$command_id" "$lease_seconds"
+            
+            # Submit the result
+            if ! submit_command_result "$command_id" "$(build_result_json "$command_id" "$delivery_attempt")"; then
+                echo "Failed to submit result, but continuing..."
+            fi
         fi
         
         # Check if command triggered termination
@@ -452,8 +716,23 @@ while [ "$SHOULD_TERMINATE" != "true" ]; do
         fi
     fi
     
-    # Wait before next poll
-    sleep $POLL_INTERVAL
+    # Wait as long as the server asks (next_poll_after). Without a hint, poll
+    # again right away after a command or a full long poll; otherwise
+    # (server without long-poll support, errors) keep the regular interval
+    next_poll_after=$(echo "$command_response" | grep -o '"next_poll_after":[0-9.]*' | cut -d: -f2)
+    if [ -n "$next_poll_after" ]; then
+        if [ "$next_poll_after" != "0" ] && [ "$next_poll_after" != "0.0" ]; then
+            if [ "$DEBUG_MODE" = "true" ]; then
+                echo "[DEBUG] Next poll in ${next_poll_after}s (server hint)"
+            fi
+            sleep "$next_poll_after"
+        fi
+    elif [ "$command_executed" != "true" ]; then
+        poll_elapsed=$(( $(date +%s) - poll_started ))
+        if [ $poll_elapsed -lt $POLL_INTERVAL ]; then
+            sleep $((POLL_INTERVAL - poll_elapsed))
+        fi
+    fi
 done
 
 cleanup
\ No newline at end of file
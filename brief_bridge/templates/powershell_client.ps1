@@ -5,7 +5,10 @@ param(
     [Parameter(Mandatory=$true)][string]$ClientId,
     [string]$ClientName = "PowerShell Client",
     [int]$PollInterval = 5,
+    [int]$LongPollWait = 20,
+    [int]$MaxCommands = 10,
     [int]$IdleTimeoutMinutes = 10,
+    [int]$OutputFlushSeconds = 1,
     [switch]$DebugMode
 )
 
@@ -28,6 +31,9 @@ Write-Host "Server: $ServerUrl" -ForegroundColor Cyan
 Write-Host "Client ID: $ClientId" -ForegroundColor Cyan
 Write-Host "Client Name: $ClientName" -ForegroundColor Cyan
 Write-Host "Poll Interval: $PollInterval seconds" -ForegroundColor Cyan
+Write-Host "Long Poll Wait: $LongPollWait seconds" -ForegroundColor Cyan
+Write-Host "Max Commands per Poll: $MaxCommands" -ForegroundColor Cyan
+Write-Host "Output Flush Interval: $OutputFlushSeconds seconds" -ForegroundColor Cyan
 Write-Host "Idle Timeout: $IdleTimeoutMinutes minutes" -ForegroundColor Cyan
 Write-Host "Press Ctrl+C to stop" -ForegroundColor Yellow
 Write-Host ""
@@ -133,11 +139,148 @@ function Register-Client {
     }
 }
 
+# Function to upload output produced so far by a running command (best effort)
+function Send-OutputChunk {
+    param(
+        [string]$CommandId,
+        [int]$Sequence,
+        [string]$Data
+    )
+    
+    try {
+        # Live output is informational; the result still carries the complete output
+        $jsonBody = @{ sequence = $Sequence; data = $Data } | ConvertTo-Json -Compress
+        $headers = @{ "Content-Type" = "application/json; charset=utf-8" }
+        Invoke-RestMethod -Uri "$ApiBase/commands/$CommandId/output" -Method "POST" -Body ([System.Text.Encoding]::UTF8.GetBytes($jsonBody)) -Headers $headers -TimeoutSec 10 | Out-Null
+        
+        if ($DebugMode) {
+            Write-Host "[DEBUG] Uploaded output chunk $Sequence for command $CommandId" -ForegroundColor Gray
+        }
+    }
+    catch {
+        if ($DebugMode) {
+            Write-Host "[DEBUG] Output chunk upload failed: $($_.Exception.Message)" -ForegroundColor Gray
+        }
+    }
+}
+
+# Function to start uploading buffered output from a background runspace every
+# $OutputFlushSeconds (the command blocks this runspace, so a timer here could
+# only fire when the command prints its next line)
+function Start-OutputFlushLoop {
+    param(
+        [string]$CommandId,
+        [hashtable]$Output
+    )
+    
+    $flusher = [powershell]::Create()
+    [void]$flusher.AddScript({
+        param($Uri, $Output, $IntervalSeconds)
+        $headers = @{ "Content-Type" = "application/json; charset=utf-8" }
+        $lastFlush = Get-Date
+        while (-not $Output.Stopping) {
+            Start-Sleep -Milliseconds 100
+            if (((Get-Date) - $lastFlush).TotalSeconds -lt $IntervalSeconds) {
+                continue
+            }
+            $lastFlush = Get-Date
+            
+            [System.Threading.Monitor]::Enter($Output.SyncRoot)
+            try {
+                $data = $Output.Pending.ToString()
+                [void]$Output.Pending.Clear()
+                $sequence = $Output.Sequence
+                if ($data) {
+                    $Output.Sequence++
+                }
+            }
+            finally {
+                [System.Threading.Monitor]::Exit($Output.SyncRoot)
+            }
+            
+            if ($data) {
+                try {
+                    # Live output is informational; the result still carries the complete output
+                    $jsonBody = @{ sequence = $sequence; data = $data } | ConvertTo-Json -Compress
+                    Invoke-RestMethod -Uri $Uri -Method "POST" -Body ([System.Text.Encoding]::UTF8.GetBytes($jsonBody)) -Headers $headers -TimeoutSec 10 | Out-Null
+                }
+                catch {
+                    # Best effort: the chunk is lost, the result is not
+                }
+            }
+        }
+    }).AddArgument("$ApiBase/commands/$CommandId/output").AddArgument($Output).AddArgument($OutputFlushSeconds)
+    $handle = $flusher.BeginInvoke()
+    
+    if ($DebugMode) {
+        Write-Host "[DEBUG] Output uploads every $OutputFlushSeconds s for command $CommandId" -ForegroundColor Gray
+    }
+    return @{ PowerShell = $flusher; Handle = $handle }
+}
+
+# Function to stop an upload loop started by Start-OutputFlushLoop, letting an
+# upload in progress finish so chunks reach the server in sequence order
+function Stop-OutputFlushLoop {
+    param($Flusher, [hashtable]$Output)
+    
+    if ($Flusher) {
+        $Output.Stopping = $true
+        [void]$Flusher.PowerShell.EndInvoke($Flusher.Handle)
+        $Flusher.PowerShell.Dispose()
+    }
+}
+
+# Function to start renewing the leases of commands from a background runspace
+# (the command itself blocks this runspace until it finishes; a batch passes
+# all its command IDs so the ones still waiting their turn keep their leases)
+function Start-HeartbeatLoop {
+    param(
+        [string[]]$CommandId,
+        [double]$LeaseSeconds
+    )
+    
+    $intervalSeconds = [math]::Max(1, [math]::Floor($LeaseSeconds / 3))
+    $uris = @($CommandId | ForEach-Object { "$ApiBase/commands/$_/heartbeat" })
+    $heartbeat = [powershell]::Create()
+    [void]$heartbeat.AddScript({
+        param($Uris, $IntervalSeconds)
+        while ($true) {
+            Start-Sleep -Seconds $IntervalSeconds
+            foreach ($uri in $Uris) {
+                try {
+                    Invoke-RestMethod -Uri $uri -Method "POST" -TimeoutSec 10 | Out-Null
+                }
+                catch {
+                    # Best effort: a missed heartbeat is covered by the next one
+                    # (finished commands of a batch answer 409)
+                }
+            }
+        }
+    }).AddArgument($uris).AddArgument($intervalSeconds)
+    [void]$heartbeat.BeginInvoke()
+    
+    if ($DebugMode) {
+        Write-Host "[DEBUG] Heartbeat every $intervalSeconds s for command $($CommandId -join ', ')" -ForegroundColor Gray
+    }
+    return $heartbeat
+}
+
+# Function to stop a heartbeat loop started by Start-HeartbeatLoop
+function Stop-HeartbeatLoop {
+    param($Heartbeat)
+    
+    if ($Heartbeat) {
+        $Heartbeat.Stop()
+        $Heartbeat.Dispose()
+    }
+}
+
 # Function to execute PowerShell command
 function Invoke-PowerShellCommand {
     param(
         [string]$Command,
-        [int]$TimeoutSeconds = 30
+        [int]$TimeoutSeconds = 30,
+        [string]$CommandId
     )
     
     $startTime = Get-Date
@@ -162,8 +305,40 @@ function Invoke-PowerShellCommand {
         # Update last command time for idle tracking
         $global:lastCommandTime = Get-Date
         
-        # Execute command and capture output
-        $output = Invoke-Expression $Command 2>&1 | Out-String
+        # Execute command and capture output line by line; a background loop
+        # uploads what accumulated every $OutputFlushSeconds while it runs
+        $outputLines = New-Object System.Collections.Generic.List[string]
+        $streamedOutput = [hashtable]::Synchronized(@{
+            Pending = New-Object System.Text.StringBuilder
+            Sequence = 0
+            Stopping = $false
+        })
+        $flusher = $null
+        if ($CommandId) {
+            $flusher = Start-OutputFlushLoop -CommandId $CommandId -Output $streamedOutput
+        }
+        
+        try {
+            Invoke-Expression $Command 2>&1 | Out-String -Stream | ForEach-Object {
+                $outputLines.Add($_)
+                [System.Threading.Monitor]::Enter($streamedOutput.SyncRoot)
+                try {
+                    [void]$streamedOutput.Pending.AppendLine($_)
+                }
+                finally {
+                    [System.Threading.Monitor]::Exit($streamedOutput.SyncRoot)
+                }
+            }
+        }
+        finally {
+            Stop-OutputFlushLoop -Flusher $flusher -Output $streamedOutput
+        }
+        
+        # Upload the tail of the output if anything was streamed (short commands skip streaming)
+        if ($streamedOutput.Sequence -gt 0 -and $streamedOutput.Pending.Length -gt 0) {
+            Send-OutputChunk -CommandId $CommandId -Sequence $streamedOutput.Sequence -Data $streamedOutput.Pending.ToString()
+        }
+        $output = $outputLines -join "`n"
         
         $executionTime = ((Get-Date) - $startTime).TotalSeconds
         
@@ -195,12 +370,15 @@ function Invoke-PowerShellCommand {
 function Submit-CommandResult {
     param(
         [string]$CommandId,
-        [hashtable]$Result
+        [hashtable]$Result,
+        # Echoed so the server can refuse a result whose lease already lapsed
+        $DeliveryAttempt = $null
     )
     
     try {
         $body = @{
             command_id = $CommandId
+            delivery_attempt = $DeliveryAttempt
             success = $Result.success
             output = $Result.output
             error = $Result.error
@@ -232,6 +410,7 @@ function Submit-CommandResult {
             
             $errorBody = @{
                 command_id = $CommandId
+                delivery_attempt = $DeliveryAttempt
                 success = $false
                 output = ""
                 error = $errorMessage
@@ -254,19 +433,106 @@ function Submit-CommandResult {
     }
 }
 
-# Function to poll for commands
+# Function to submit the results of a command batch in one request
+# (falls back to one request per result on servers without /commands/result/batch)
+function Submit-CommandResults {
+    param(
+        [array]$Results
+    )
+    
+    try {
+        $items = @($Results | ForEach-Object {
+            @{
+                command_id = $_.command_id
+                delivery_attempt = $_.delivery_attempt
+                success = $_.result.success
+                output = $_.result.output
+                error = $_.result.error
+                execution_time = $_.result.execution_time
+            }
+        })
+        $jsonBody = @{ results = $items } | ConvertTo-Json -Depth 10
+        $headers = @{ "Content-Type" = "application/json; charset=utf-8" }
+        Invoke-RestMethod -Uri "$ApiBase/commands/result/batch" -Method "POST" -Body ([System.Text.Encoding]::UTF8.GetBytes($jsonBody)) -Headers $headers -TimeoutSec 30 | Out-Null
+        Write-Host "[RESULT] Submitted $($items.Count) results in one request" -ForegroundColor Cyan
+        return $true
+    }
+    catch {
+        if ($DebugMode) {
+            Write-Host "[DEBUG] Batch result submission failed, submitting one by one: $($_.Exception.Message)" -ForegroundColor Gray
+        }
+    }
+    
+    $allSubmitted = $true
+    foreach ($entry in $Results) {
+        if (-not (Submit-CommandResult -CommandId $entry.command_id -Result $entry.result -DeliveryAttempt $entry.delivery_attempt)) {
+            $allSubmitted = $false
+        }
+    }
+    return $allSubmitted
+}
+
+# Function to run every command of a batched poll, then report all results together
+function Invoke-CommandBatch {
+    param($Response)
+    
+    $commands = @($Response.commands)
+    $heartbeat = $null
+    if ($Response.lease_seconds) {
+        $heartbeat = Start-HeartbeatLoop -CommandId @($commands | ForEach-Object { $_.command_id }) -LeaseSeconds $Response.lease_seconds
+    }
+    $results = @()
+    try {
+        foreach ($command in $commands) {
+            $result = Invoke-PowerShellCommand -Command $command.command_content -TimeoutSeconds $command.timeout -CommandId $command.command_id
+            $results += @{ command_id = $command.command_id; delivery_attempt = $command.delivery_attempt; result = $result }
+            if ($shouldTerminate) {
+                # Skipped commands are requeued by the server once their leases lapse
+                break
+            }
+        }
+    }
+    finally {
+        Stop-HeartbeatLoop -Heartbeat $heartbeat
+    }
+    
+    if (-not (Submit-CommandResults -Results $results)) {
+        Write-Warning "Failed to submit some results, but continuing..."
+    }
+}
+
+# Function to poll for commands (server holds the request up to $LongPollWait seconds)
 function Get-PendingCommand {
     try {
         $body = @{
             client_id = $ClientId
+            wait = $LongPollWait
+            lease = $true
         }
+        if ($MaxCommands -gt 1) {
+            # Fetch up to $MaxCommands queued commands in one round trip
+            $body.max_commands = $MaxCommands
+        }
+        if ($script:queueVersion) {
+            # Lets the server answer without a queue lookup while nothing new was queued
+            $body.queue_version = $script:queueVersion
+        }
+        $script:queueVersion = $null
         
         $response = Invoke-HttpRequest -Uri "$ApiBase/commands/poll" -Method "POST" -Body $body
+        # Server's hint for when to poll again (absent on older servers)
+        $script:nextPollAfter = $response.next_poll_after
+        # Only responses that left the queue empty carry a version; anything else forces a full poll
+        $script:queueVersion = $response.queue_version
         
         if ($response.command_id) {
             Write-Host "[POLL] Received command: $($response.command_id)" -ForegroundColor Magenta
             return $response
         }
+        if ($response.commands -and @($response.commands).Count -gt 0) {
+            Write-Host "[POLL] Received $(@($response.commands).Count) commands" -ForegroundColor Magenta
+            return $response
+        }
         
         return $null
     }
@@ -302,20 +568,39 @@ try {
             }
             
             # Poll for pending commands
+            $pollStarted = Get-Date
+            $commandExecuted = $false
+            $script:nextPollAfter = $null
             $command = Get-PendingCommand
             
             if ($command) {
+                $commandExecuted = $true
+
                 # Reset error counter on successful poll
                 $consecutiveErrors = 0
                 
-                # Execute the command
-                $result = Invoke-PowerShellCommand -Command $command.command_content -TimeoutSeconds $command.timeout
-                
-                # Submit the result
-                $submitted = Submit-CommandResult -CommandId $command.command_id -Result $result
-                
-                if (-not $submitted) {
-                    Write-Warning "Failed to submit result, but continuing..."
+                if ($command.commands) {
+                    # Several queued commands in one poll (max_commands)
+                    Invoke-CommandBatch -Response $command
+                } else {
+                    # Execute the command, renewing its lease while it runs
+                    $heartbeat = $null
+                    if ($command.lease_seconds) {
+                        $heartbeat = Start-HeartbeatLoop -CommandId $command.command_id -LeaseSeconds $command.lease_seconds
+                    }
+                    try {
+                        $result = Invoke-PowerShellCommand -Command $command.command_content -TimeoutSeconds $command.timeout -CommandId $command.command_id
+                    }
+                    finally {
+                        Stop-HeartbeatLoop -Heartbeat $heartbeat
+                    }
+                    
+                    # Submit the result
+                    $submitted = Submit-CommandResult -CommandId $command.command_id -Result $result -DeliveryAttempt $command.delivery_attempt
+                    
+                    if (-not $submitted) {
+                        Write-Warning "Failed to submit result, but continuing..."
+                    }
                 }
                 
                 # Check if command triggered termination
@@ -344,8 +629,23 @@ try {
             }
         }
         
-        # Wait before next poll
-        Start-Sleep -Seconds $PollInterval
+        # Wait as long as the server asks (next_poll_after). Without a hint, poll
+        # again right away after a command or a full long poll; otherwise
+        # (server without long-poll support, errors) keep the regular interval
+        if ($null -ne $script:nextPollAfter) {
+            if ($script:nextPollAfter -gt 0) {
+                if ($DebugMode) {
+                    Write-Host "[DEBUG] Next poll in $($script:nextPollAfter)s (server hint)" -ForegroundColor DarkGray
+                }
+                Start-Sleep -Milliseconds ([int]([double]$script:nextPollAfter * 1000))
+            }
+        }
+        elseif (-not $commandExecuted) {
+            $pollElapsed = ((Get-Date) - $pollStarted).TotalSeconds
+            if ($pollElapsed -lt $PollInterval) {
+                Start-Sleep -Seconds ([math]::Ceiling($PollInterval - $pollElapsed))
+            }
+        }
     }
 }
 catch {
@@ -0,0 +1,126 @@
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import logging
+import os
+import time
+from brief_bridge.entities.client import Client
+from brief_bridge.repositories.client_repository import ClientRepository
+from brief_bridge.services.client_presence import ClientPresenceTable
+from brief_bridge.services.command_events import CommandEventBus
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background writes of recorded client activity
+DEFAULT_PRESENCE_FLUSH_INTERVAL = float(os.getenv('BRIEF_BRIDGE_PRESENCE_FLUSH_INTERVAL', '30.0'))
+
+
+class ClientPresenceUseCase:
+    """Business rule: client.activity_tracking - polls update presence in memory, storage catches up later
+
+    Recording a poll costs no I/O. Changed entries are written to the client
+    repository in one batch every flush interval (and at shutdown), so at
+    most one interval of last_seen updates is lost on a crash.
+    """
+
+    def __init__(self, client_repository: ClientRepository, presence_table: ClientPresenceTable,
+                 event_bus: Optional[CommandEventBus] = None) -> None:
+        self._client_repository = client_repository
+        self._presence_table = presence_table
+        self._event_bus = event_bus
+
+    def _publish_status_change(self, client_id: str) -> None:
+        if self._event_bus is not None:
+            self._event_bus.notify_client_status_changed(client_id)
+
+    def _record_seen(self, client_id: str, polled: bool) -> None:
+        previous = self._presence_table.get(client_id)
+        self._presence_table.record_seen(client_id, polled=polled)
+        # Business rule: client.auto_recovery - offline clients become online when they poll
+        if previous is not None and previous.status != "online":
+            self._publish_status_change(client_id)
+
+    def record_poll(self, client_id: str) -> None:
+        """Business rule: client.activity_tracking - client polled just now"""
+        self._record_seen(client_id, polled=True)
+
+    def record_activity(self, client_id: str) -> None:
+        """Business rule: client.activity_tracking - client is alive but busy (e.g. heartbeat while executing)"""
+        self._record_seen(client_id, polled=False)
+
+    def record_registration(self, client_id: str) -> None:
+        """Business rule: client.offline_detection - start the offline deadline of a client that just registered"""
+        self._record_seen(client_id, polled=False)
+
+    def record_poll_hint(self, client_id: str, next_poll_after: float) -> None:
+        """Business rule: client.poll_pacing - remember when the client was told to poll again"""
+        self._presence_table.record_poll_hint(client_id, next_poll_after)
+
+    async def find_client(self, client_id: str) -> Optional[Client]:
+        """Business rule: client.lookup - stored client with its latest recorded activity"""
+        client = await self._client_repository.find_client_by_id(client_id)
+        return self._presence_table.apply(client) if client else None
+
+    async def get_all_clients(self) -> List[Client]:
+        """Business rule: client.listing - stored clients with their latest recorded activity"""
+        return [self._presence_table.apply(client) for client in await self._client_repository.get_all_registered_clients()]
+
+    async def flush_presence(self) -> int:
+        """Business rule: client.activity_tracking - persist activity recorded since the last flush"""
+        dirty = self._presence_table.take_dirty()
+        if not dirty:
+            return 0
+        clients = []
+        try:
+            for client_id, presence in dirty.items():
+                client = await self._client_repository.find_client_by_id(client_id)
+                if client is None:
+                    # Polls from unregistered clients are not stored
+                    self._presence_table.forget(client_id)
+                    continue
+                client.last_seen = presence.last_seen
+                client.status = presence.status
+                clients.append(client)
+            await self._client_repository.save_clients(clients)
+        except Exception:
+            self._presence_table.mark_dirty(dirty)
+            raise
+        return len(clients)
+
+    async def run_presence_flusher(self, interval: float = DEFAULT_PRESENCE_FLUSH_INTERVAL) -> None:
+        """Background task: flush recorded activity every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_presence()
+            except Exception:
+                logger.exception("Client presence flush failed")
+
+    async def track_stored_clients(self) -> None:
+        """Business rule: client.offline_detection - watch stored clients from startup, even if they never poll again"""
+        for client in await self._client_repository.get_all_registered_clients():
+            self._presence_table.track(client)
+
+    def expire_offline_clients(self, now: Optional[datetime] = None) -> List[str]:
+        """Business rule: client.offline_detection - mark clients past the threshold offline and publish it"""
+        expired = self._presence_table.expire_due(now)
+        for client_id in expired:
+            logger.info(f"Client {client_id} marked offline")
+            self._publish_status_change(client_id)
+        return expired
+
+    async def run_offline_sweeper(self) -> None:
+        """Background task: mark clients offline as their deadlines expire
+
+        Sleeps until the earliest deadline, never longer than the threshold
+        itself: a client first seen during the sleep cannot be due before then.
+        """
+        threshold = self._presence_table.offline_threshold
+        while True:
+            next_deadline = self._presence_table.next_deadline()
+            delay = threshold if next_deadline is None else min(threshold, next_deadline - time.time())
+            await asyncio.sleep(max(delay, 0.0))
+            try:
+                self.expire_offline_clients()
+            except Exception:
+                logger.exception("Offline sweep failed")
@@ -0,0 +1,173 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import logging
+import os
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.command_repository import CommandRepository
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.command_output import CommandOutputBuffer
+
+logger = logging.getLogger(__name__)
+
+# Configuration constants for dispatch leases
+DEFAULT_LEASE_SECONDS = float(os.getenv('BRIEF_BRIDGE_LEASE_SECONDS', '30.0'))
+DEFAULT_LEASE_SWEEP_INTERVAL = float(os.getenv('BRIEF_BRIDGE_LEASE_SWEEP_INTERVAL', '5.0'))
+# Deliveries before an abandoned command fails; 1 = never re-run a command automatically
+DEFAULT_MAX_DELIVERY_ATTEMPTS = int(os.getenv('BRIEF_BRIDGE_MAX_DELIVERY_ATTEMPTS', '1'))
+
+
+@dataclass
+class LeaseSweepResult:
+    requeued: List[Command] = field(default_factory=list)
+    failed: List[Command] = field(default_factory=list)
+
+
+class CommandLeaseUseCase:
+    """Business rule: command.lease - processing commands are held by a renewable lease
+
+    A client that picks up a command must keep renewing its lease (heartbeats
+    or output uploads). When the lease runs out the client is assumed dead:
+    the command is returned to pending for another delivery, or failed once
+    max_delivery_attempts is used up, so waiting submitters are released.
+    """
+
+    def __init__(self, command_repository: CommandRepository, event_bus: Optional[CommandEventBus] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_delivery_attempts: int = DEFAULT_MAX_DELIVERY_ATTEMPTS,
+                 output_buffer: Optional[CommandOutputBuffer] = None) -> None:
+        self._command_repository = command_repository
+        self._event_bus = event_bus
+        self._output_buffer = output_buffer
+        self._lease_seconds = lease_seconds
+        self._max_delivery_attempts = max_delivery_attempts
+
+    @property
+    def lease_seconds(self) -> float:
+        return self._lease_seconds
+
+    async def dispatch_command(self, command: Command, with_lease: bool = True) -> Command:
+        """Business rule: command.status_flow - hand a pending command to its client
+
+        Clients that do not send heartbeats get no lease, so their long
+        commands are not mistaken for abandoned ones.
+        """
+        command.mark_as_processing(self._lease_seconds if with_lease else None)
+        return await self._command_repository.save_command(command)
+
+    async def dispatch_commands(self, commands: List[Command], with_lease: bool = True) -> List[Command]:
+        """Business rule: command.status_flow - hand several pending commands to their client in one write"""
+        for command in commands:
+            command.mark_as_processing(self._lease_seconds if with_lease else None)
+        return await self._command_repository.save_commands(commands)
+
+    async def claim_pending_commands(self, client_id: str, max_commands: Optional[int] = None,
+                                     with_lease: bool = True) -> List[Command]:
+        """Business rule: command.dispatch - take the client's oldest pending commands and mark them processing
+
+        Without max_commands at most one command is claimed. The lookup and the
+        status update run under a per-client lock, so concurrent polls of one
+        client never receive the same command.
+        """
+        async with self._command_repository.client_lock(client_id):
+            if max_commands is None:
+                command = await self._command_repository.get_next_pending_command_for_client(client_id)
+                if command:
+                    await self.dispatch_command(command, with_lease)
+                return [command] if command else []
+            commands = (await self._command_repository.get_pending_commands_for_client(client_id))[:max_commands]
+            if commands:
+                await self.dispatch_commands(commands, with_lease)
+            return commands
+
+    @staticmethod
+    def is_current_delivery(command: Command, delivery_attempt: Optional[int] = None) -> bool:
+        """Business rule: command.lease - only the delivery a command is processing may report its result
+
+        A command whose lease lapsed was requeued or failed; results from that
+        delivery arrive too late. Clients that echo delivery_attempt are also
+        told apart from a later delivery of the same command.
+        """
+        if command.status != "processing":
+            return False
+        return delivery_attempt is None or delivery_attempt == command.delivery_attempts
+
+    async def renew_lease(self, command: Command, force: bool = False) -> bool:
+        """Business rule: command.lease - extend the lease of a processing command
+
+        Unless forced (explicit heartbeat), only an existing lease is renewed and
+        only once less than half of it remains, so frequent output uploads do
+        not each cost a repository write. Returns False if the command is not
+        processing (e.g. already requeued).
+        """
+        if command.status != "processing":
+            return False
+        if command.lease_expires_at is None and not force:
+            return True
+        half_lease = timedelta(seconds=self._lease_seconds / 2)
+        if force or command.lease_expires_at - datetime.utcnow() < half_lease:
+            async with self._command_repository.client_lock(command.target_client_id):
+                # Re-read under the lock: the sweeper may have requeued the command since it was read
+                current = await self._command_repository.find_command_by_id(command.command_id)
+                if current is None or not self.is_current_delivery(current, command.delivery_attempts):
+                    return False
+                current.extend_lease(self._lease_seconds)
+                await self._command_repository.save_command(current)
+            command.lease_expires_at = current.lease_expires_at
+        return True
+
+    async def sweep_expired_leases(self, now: Optional[datetime] = None) -> LeaseSweepResult:
+        """Business rule: command.redelivery - requeue or fail commands whose lease expired
+
+        Each client's expired commands are re-read and saved under its lock, so
+        a result or heartbeat stored since the scan is never overwritten.
+        """
+        now = now or datetime.utcnow()
+        result = LeaseSweepResult()
+        expired = [command for command in await self._command_repository.get_processing_commands()
+                   if command.is_lease_expired(now)]
+        for client_id in dict.fromkeys(command.target_client_id for command in expired):
+            async with self._command_repository.client_lock(client_id):
+                swept = []
+                for scanned in expired:
+                    if scanned.target_client_id != client_id:
+                        continue
+                    command = await self._command_repository.find_command_by_id(scanned.command_id)
+                    if command is None or not command.is_lease_expired(now):
+                        continue
+                    if command.delivery_attempts < self._max_delivery_attempts:
+                        command.return_to_pending()
+                        result.requeued.append(command)
+                    else:
+                        command.mark_as_failed(
+                            f"Command lease expired after {command.delivery_attempts} delivery attempt(s): "
+                            f"client stopped responding",
+                            (now - command.started_at).total_seconds() if command.started_at else 0.0
+                        )
+                        result.failed.append(command)
+                    swept.append(command)
+                if swept:
+                    await self._command_repository.save_commands(swept)
+        if self._output_buffer:
+            # A requeued command's next delivery numbers its output from 0 again
+            for command in result.requeued + result.failed:
+                self._output_buffer.discard(command.command_id)
+        if self._event_bus:
+            for command in result.requeued:
+                self._event_bus.notify_command_queued(command.target_client_id)
+            for command in result.failed:
+                self._event_bus.notify_command_completed(command.command_id)
+                self._event_bus.notify_output_appended(command.command_id)
+        return result
+
+    async def run_lease_sweeper(self, interval: float = DEFAULT_LEASE_SWEEP_INTERVAL) -> None:
+        """Background task: sweep expired leases every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = await self.sweep_expired_leases()
+                if result.requeued or result.failed:
+                    logger.info(f"Lease sweep: {len(result.requeued)} requeued, {len(result.failed)} failed")
+            except Exception:
+                logger.exception("Lease sweep failed")
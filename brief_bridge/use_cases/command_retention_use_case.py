@@ -0,0 +1,108 @@
+from collections import defaultdict
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.command_archive import CommandArchive
+from brief_bridge.repositories.command_repository import CommandRepository
+
+logger = logging.getLogger(__name__)
+
+# Configuration constants for command history retention (0 disables a limit)
+DEFAULT_RETENTION_MAX_AGE_DAYS = float(os.getenv('BRIEF_BRIDGE_RETENTION_MAX_AGE_DAYS', '30'))
+DEFAULT_RETENTION_MAX_PER_CLIENT = int(os.getenv('BRIEF_BRIDGE_RETENTION_MAX_PER_CLIENT', '1000'))
+DEFAULT_RETENTION_MAX_TOTAL_BYTES = int(os.getenv('BRIEF_BRIDGE_RETENTION_MAX_TOTAL_BYTES', str(256 * 1024 * 1024)))
+DEFAULT_RETENTION_INTERVAL = float(os.getenv('BRIEF_BRIDGE_RETENTION_INTERVAL', '300.0'))  # seconds
+
+
+class CommandRetentionUseCase:
+    """Business rule: command.retention - finished commands beyond the retention limits are archived
+
+    Only completed and failed commands are eligible. Keeping the newest ones
+    first, a command is archived once it is older than max_age_days, beyond
+    the newest max_per_client of its client, or beyond max_total_bytes of
+    retained history, results stored as blobs included. Archived commands are
+    written to the archive before they are deleted, so a crash in between
+    leaves a duplicate rather than a gap. Blob results are archived inline and
+    their blobs deleted once no live command refers to them.
+    """
+
+    def __init__(self, command_repository: CommandRepository, command_archive: CommandArchive,
+                 max_age_days: float = DEFAULT_RETENTION_MAX_AGE_DAYS,
+                 max_per_client: int = DEFAULT_RETENTION_MAX_PER_CLIENT,
+                 max_total_bytes: int = DEFAULT_RETENTION_MAX_TOTAL_BYTES) -> None:
+        self._command_repository = command_repository
+        self._command_archive = command_archive
+        self._max_age_days = max_age_days
+        self._max_per_client = max_per_client
+        self._max_total_bytes = max_total_bytes
+
+    @staticmethod
+    def _finished_at(command: Command) -> datetime:
+        return command.completed_at or command.created_at or datetime.min
+
+    @staticmethod
+    def _retained_size(command: Command) -> int:
+        """Approximate characters a command keeps in storage, counting a blob result by its size"""
+        return len(command.content) + len(command.result or "") + (command.result_size or 0) + len(command.error or "")
+
+    def _select_expired(self, commands: List[Command], now: datetime) -> List[Command]:
+        """Finished commands beyond any retention limit, newest kept first"""
+        oldest_kept = now - timedelta(days=self._max_age_days) if self._max_age_days > 0 else None
+        kept_per_client: Dict[str, int] = defaultdict(int)
+        kept_bytes = 0
+        expired = []
+        finished = sorted((command for command in commands if command.is_completed()),
+                          key=self._finished_at, reverse=True)
+        for command in finished:
+            size = self._retained_size(command)
+            if ((oldest_kept and self._finished_at(command) < oldest_kept)
+                    or (self._max_per_client > 0 and kept_per_client[command.target_client_id] >= self._max_per_client)
+                    or (self._max_total_bytes > 0 and kept_bytes + size > self._max_total_bytes)):
+                expired.append(command)
+                continue
+            kept_per_client[command.target_client_id] += 1
+            kept_bytes += size
+        return expired
+
+    async def apply_retention(self, now: Optional[datetime] = None) -> List[Command]:
+        """Business rule: command.retention - move expired commands to the archive; returns them"""
+        started = time.time()
+        commands = await self._command_repository.get_all_commands()
+        expired = self._select_expired(commands, now or datetime.utcnow())
+        if not expired:
+            return expired
+
+        # The archive keeps blob results inline (copies: repositories may hand out their live objects)
+        archived = [
+            replace(command, result=await self._command_repository.load_result(command), result_ref=None)
+            if command.has_stored_result() else command
+            for command in expired
+        ]
+        await self._command_archive.archive_commands(archived)
+        await self._command_repository.delete_commands([command.command_id for command in expired])
+
+        # Blobs are shared by commands with identical results; keep those still referenced
+        expired_ids = {command.command_id for command in expired}
+        referenced = {command.result_ref for command in commands
+                      if command.command_id not in expired_ids and command.result_ref}
+        unreferenced = [ref for ref in dict.fromkeys(command.result_ref for command in expired if command.result_ref)
+                        if ref not in referenced]
+        if unreferenced:
+            await self._command_repository.delete_results(unreferenced, unused_since=started)
+        return expired
+
+    async def run_retention_sweeper(self, interval: float = DEFAULT_RETENTION_INTERVAL) -> None:
+        """Background task: apply retention every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                archived = await self.apply_retention()
+                if archived:
+                    logger.info(f"Retention sweep: {len(archived)} commands archived")
+            except Exception:
+                logger.exception("Retention sweep failed")
@@ -1,12 +1,16 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple, Union
 from brief_bridge.repositories.command_repository import CommandRepository
 from brief_bridge.repositories.client_repository import ClientRepository
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.client_presence import ClientPresenceTable, PickupEstimate
+from brief_bridge.entities.command import Command
+from brief_bridge.entities.result_slice import ResultRange
 
 # Configuration constants for command execution waiting
 import os
 DEFAULT_MAX_WAIT_TIME = float(os.getenv('BRIEF_BRIDGE_COMMAND_TIMEOUT', '300.0'))  # 5 minutes default
-DEFAULT_POLL_INTERVAL = 0.5   # seconds
+DEFAULT_POLL_INTERVAL = 0.5   # seconds, only used when no event bus is wired in
 
 
 @dataclass
@@ -15,6 +19,8 @@ class CommandSubmissionRequest:
     command_content: str
     command_type: Optional[str] = "shell"
     # encoding removed - no longer supporting base64
+    result_range: Optional[ResultRange] = None  # Part of the result to return (default: all)
+    pickup_deadline: Optional[float] = None  # Seconds an unresponsive target gets to fetch the command (default: reject)
 
 
 @dataclass
@@ -27,52 +33,80 @@ class CommandSubmissionResponse:
     result: Optional[str] = None
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    # Set when only part of the result was requested
+    result_offset: Optional[int] = None
+    result_total_length: Optional[int] = None
+    # Seconds until the target was expected to fetch the command, from its poll history
+    expected_pickup_seconds: Optional[float] = None
 
 
 class SubmitCommandUseCase:
-    def __init__(self, client_repository: ClientRepository, command_repository: CommandRepository, max_wait_time: float = DEFAULT_MAX_WAIT_TIME, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+    def __init__(self, client_repository: ClientRepository, command_repository: CommandRepository, max_wait_time: float = DEFAULT_MAX_WAIT_TIME, poll_interval: float = DEFAULT_POLL_INTERVAL, event_bus: Optional[CommandEventBus] = None, presence_table: Optional[ClientPresenceTable] = None) -> None:
         self._client_repository = client_repository
         self._command_repository = command_repository
         self._max_wait_time = max_wait_time
         self._poll_interval = poll_interval
+        self._event_bus = event_bus
+        self._presence_table = presence_table
     
-    async def _wait_for_command_completion(self, command_id: str, max_wait_time: float = None, poll_interval: float = None) -> CommandSubmissionResponse:
-        """Wait for command completion and return appropriate response"""
+    async def _wait_until_completed(self, command_id: str, max_wait_time: float, poll_interval: float = None) -> Optional[Command]:
+        """Return the latest command state once it completes or max_wait_time expires
+        
+        With an event bus the wait sleeps until the result is reported; without
+        one it falls back to re-reading the repository every poll_interval.
+        """
         import asyncio
+        from contextlib import nullcontext
         
-        # Use instance settings or provided parameters
-        max_wait_time = max_wait_time or self._max_wait_time
         poll_interval = poll_interval or self._poll_interval
-        waited_time = 0.0
-        
-        while waited_time < max_wait_time:
-            # Refresh command from repository to check for updates
-            refreshed_command = await self._command_repository.find_command_by_id(command_id)
-            if refreshed_command and refreshed_command.is_completed():
-                if refreshed_command.error:
-                    # Command completed with error
-                    return CommandSubmissionResponse(
-                        command_id=refreshed_command.command_id,
-                        target_client_id=refreshed_command.target_client_id,
-                        submission_successful=False,
-                        submission_message=f"Command execution failed: {refreshed_command.error}",
-                        error=refreshed_command.error,
-                        execution_time=refreshed_command.execution_time
-                    )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait_time
+        
+        # Subscribe before the first lookup so a result landing in between is not missed
+        subscription = self._event_bus.completion_waiter(command_id) if self._event_bus else nullcontext()
+        with subscription as waiter:
+            while True:
+                # Refresh command from repository to check for updates
+                refreshed_command = await self._command_repository.find_command_by_id(command_id)
+                if refreshed_command is None or refreshed_command.is_completed():
+                    return refreshed_command
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return refreshed_command
+                if waiter is not None:
+                    await waiter.wait(remaining)
                 else:
-                    # Command completed successfully
-                    return CommandSubmissionResponse(
-                        command_id=refreshed_command.command_id,
-                        target_client_id=refreshed_command.target_client_id,
-                        submission_successful=True,
-                        submission_message="Command executed successfully",
-                        result=refreshed_command.result,
-                        execution_time=refreshed_command.execution_time
-                    )
-            
-            # Wait for next poll
-            await asyncio.sleep(poll_interval)
-            waited_time += poll_interval
+                    await asyncio.sleep(min(poll_interval, remaining))
+    
+    async def _wait_for_command_completion(self, command_id: str, max_wait_time: float = None, poll_interval: float = None,
+                                           result_range: Optional[ResultRange] = None,
+                                           pickup_deadline: Optional[float] = None) -> CommandSubmissionResponse:
+        """Wait for command completion and return appropriate response
+        
+        With a pickup_deadline the command is failed if it is still pending
+        when the deadline passes, instead of waiting out max_wait_time.
+        """
+        import asyncio
+        
+        # Use instance settings or provided parameters
+        max_wait_time = max_wait_time or self._max_wait_time
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        
+        refreshed_command = None
+        if pickup_deadline is not None and pickup_deadline < max_wait_time:
+            refreshed_command = await self._wait_until_completed(command_id, pickup_deadline, poll_interval)
+            if refreshed_command and refreshed_command.is_pending():
+                withdrawn_command = await self._withdraw_unpicked_command(refreshed_command, pickup_deadline)
+                if withdrawn_command:
+                    return await self._completed_command_response(withdrawn_command)
+                # Picked up just before the deadline: wait for its result after all
+                refreshed_command = None
+        if refreshed_command is None or not refreshed_command.is_completed():
+            refreshed_command = await self._wait_until_completed(command_id, max_wait_time - (loop.time() - started_at), poll_interval)
+        if refreshed_command and refreshed_command.is_completed():
+            return await self._completed_command_response(refreshed_command, result_range)
         
         # Timeout occurred - command did not complete within max_wait_time
         return CommandSubmissionResponse(
@@ -80,13 +114,67 @@ class SubmitCommandUseCase:
             target_client_id=refreshed_command.target_client_id if refreshed_command else None,
             submission_successful=False,
             submission_message=f"Command execution timeout after {max_wait_time} seconds",
-            execution_time=waited_time
+            execution_time=loop.time() - started_at
         )
     
-    async def execute_command_submission(self, request: CommandSubmissionRequest) -> CommandSubmissionResponse:
-        """Business rule: command.target_validation - submit command and wait for results"""
-        from brief_bridge.entities.command import Command
-        import asyncio
+    async def _withdraw_unpicked_command(self, command: Command, pickup_deadline: float) -> Optional[Command]:
+        """Business rule: command.fail_fast - fail a command its unresponsive target did not fetch in time
+        
+        The command is re-read under its client's lock, so a poll claiming it
+        at the same moment either wins (None is returned) or finds it failed.
+        """
+        async with self._command_repository.client_lock(command.target_client_id):
+            command = await self._command_repository.find_command_by_id(command.command_id)
+            if command is None or not command.is_pending():
+                return None
+            command.mark_as_failed(f"Target client did not pick up the command within {pickup_deadline} seconds")
+            await self._command_repository.save_command(command)
+        if self._event_bus:
+            self._event_bus.notify_command_completed(command.command_id)
+        return command
+    
+    async def wait_for_command(self, command_id: str, timeout: float) -> Optional[Command]:
+        """Business rule: command.execution_wait - wait up to timeout for a queued command to finish
+        
+        Returns the command in whatever state it reached (completed or still
+        pending/processing), or None if it does not exist. The wait never
+        exceeds the configured command timeout.
+        """
+        return await self._wait_until_completed(command_id, min(max(timeout, 0.0), self._max_wait_time))
+    
+    async def _completed_command_response(self, command, result_range: Optional[ResultRange] = None) -> CommandSubmissionResponse:
+        """Build response for a command that finished (success or failure)"""
+        if command.error:
+            # Command completed with error
+            return CommandSubmissionResponse(
+                command_id=command.command_id,
+                target_client_id=command.target_client_id,
+                submission_successful=False,
+                submission_message=f"Command execution failed: {command.error}",
+                error=command.error,
+                execution_time=command.execution_time
+            )
+        # Command completed successfully
+        response = CommandSubmissionResponse(
+            command_id=command.command_id,
+            target_client_id=command.target_client_id,
+            submission_successful=True,
+            submission_message="Command executed successfully",
+            execution_time=command.execution_time
+        )
+        if result_range is None or result_range.is_full():
+            response.result = await self._command_repository.load_result(command)
+        else:
+            # Business rule: command.result_range - return only the requested part of a long output
+            result_slice = await self._command_repository.load_result_slice(command, result_range)
+            if result_slice:
+                response.result = result_slice.content
+                response.result_offset = result_slice.offset
+                response.result_total_length = result_slice.total_length
+        return response
+    
+    async def _reject_invalid_submission(self, request: CommandSubmissionRequest) -> Optional[CommandSubmissionResponse]:
+        """Business rule: command.target_validation - failure response for an invalid request, None if valid"""
         # Business rule: command.target_validation - validate target client ID not empty
         if not request.target_client_id or request.target_client_id.strip() == "":
             return CommandSubmissionResponse(
@@ -103,9 +191,6 @@ class SubmitCommandUseCase:
                 submission_message="Command content cannot be empty"
             )
         
-        # Use command content directly (no base64 decoding)
-        decoded_content = request.command_content
-        
         # Business rule: command.target_validation - check if client exists
         target_client = await self._client_repository.find_client_by_id(request.target_client_id)
         if not target_client:
@@ -114,16 +199,156 @@ class SubmitCommandUseCase:
                 submission_successful=False,
                 submission_message="Target client not found"
             )
-        
-        # Business rule: command.unique_id - create command with unique ID
-        command = Command.create_new_command(
+        return None
+    
+    async def _estimate_pickup(self, target_client_id: str) -> Optional[PickupEstimate]:
+        """Business rule: client.availability - pickup estimate for the target, None without presence tracking"""
+        if self._presence_table is None:
+            return None
+        if self._event_bus and self._event_bus.is_client_polling(target_client_id):
+            return PickupEstimate(responsive=True, expected_seconds=0.0, silent_seconds=0.0)
+        target_client = await self._client_repository.find_client_by_id(target_client_id)
+        return self._presence_table.estimate_pickup(target_client) if target_client else None
+    
+    @staticmethod
+    def _reject_unresponsive_target(request: CommandSubmissionRequest, estimate: PickupEstimate) -> CommandSubmissionResponse:
+        """Business rule: command.fail_fast - refuse to wait on a target that stopped polling"""
+        if estimate.silent_seconds is None:
+            reason = "is offline"
+        else:
+            reason = f"has not polled for {estimate.silent_seconds:.0f} seconds"
+        return CommandSubmissionResponse(
             target_client_id=request.target_client_id,
-            content=decoded_content,  # Use command content directly
+            submission_successful=False,
+            submission_message=f"Target client {reason}; set pickup_deadline to queue the command anyway"
+        )
+    
+    def _create_command(self, request: CommandSubmissionRequest) -> Command:
+        """Business rule: command.unique_id - create command with unique ID"""
+        # Use command content directly (no base64 decoding)
+        return Command.create_new_command(
+            target_client_id=request.target_client_id,
+            content=request.command_content,
             command_type=request.command_type or "shell"
         )
+    
+    def _notify_queued(self, commands: List[Command]) -> None:
+        """Business rule: command.dispatch - wake the target clients' long polls"""
+        if self._event_bus:
+            for command in commands:
+                self._event_bus.notify_command_queued(command.target_client_id)
+    
+    async def _queue_command(self, request: CommandSubmissionRequest) -> CommandSubmissionResponse:
+        """Business rule: command.persistence - save command to repository"""
+        saved_command = await self._command_repository.save_command(self._create_command(request))
+        self._notify_queued([saved_command])
+        
+        return CommandSubmissionResponse(
+            command_id=saved_command.command_id,
+            target_client_id=saved_command.target_client_id,
+            submission_successful=True,
+            submission_message="Command queued for execution"
+        )
+    
+    async def queue_command_submission(self, request: CommandSubmissionRequest) -> CommandSubmissionResponse:
+        """Business rule: command.target_validation - validate and queue command without waiting"""
+        rejection = await self._reject_invalid_submission(request)
+        if rejection:
+            return rejection
+        
+        estimate = await self._estimate_pickup(request.target_client_id)
+        queued_response = await self._queue_command(request)
+        queued_response.expected_pickup_seconds = estimate.expected_seconds if estimate else None
+        return queued_response
+    
+    async def execute_command_submission(self, request: CommandSubmissionRequest) -> CommandSubmissionResponse:
+        """Business rule: command.target_validation - submit command and wait for results
         
-        # Business rule: command.persistence - save command to repository
-        saved_command = await self._command_repository.save_command(command)
+        Business rule: command.fail_fast - a target that stopped polling is
+        rejected at once, or given only request.pickup_deadline seconds to
+        fetch the command when the caller sets one.
+        """
+        rejection = await self._reject_invalid_submission(request)
+        if rejection:
+            return rejection
+        
+        estimate = await self._estimate_pickup(request.target_client_id)
+        pickup_deadline = None
+        if estimate and not estimate.responsive:
+            if not request.pickup_deadline:
+                return self._reject_unresponsive_target(request, estimate)
+            pickup_deadline = request.pickup_deadline
+        queued_response = await self._queue_command(request)
         
         # Business rule: command.execution_wait - wait for execution completion
-        return await self._wait_for_command_completion(saved_command.command_id)
\ No newline at end of file
+        response = await self._wait_for_command_completion(queued_response.command_id, result_range=request.result_range,
+                                                           pickup_deadline=pickup_deadline)
+        response.expected_pickup_seconds = estimate.expected_seconds if estimate else None
+        return response
+    
+    async def _queue_batch_submission(self, requests: List[CommandSubmissionRequest]) -> Tuple[List[Optional[CommandSubmissionResponse]], List[Command]]:
+        """Validate and queue batch requests; returns per-request rejections (None if queued) and the queued commands"""
+        rejections: List[Optional[CommandSubmissionResponse]] = []
+        commands: List[Command] = []
+        for request in requests:
+            rejection = await self._reject_invalid_submission(request)
+            rejections.append(rejection)
+            if rejection is None:
+                commands.append(self._create_command(request))
+        
+        # Business rule: command.persistence - save all commands in one repository write
+        saved_commands = await self._command_repository.save_commands(commands)
+        self._notify_queued(saved_commands)
+        return rejections, saved_commands
+    
+    def _batch_wait_time(self, max_wait_time: Optional[float]) -> float:
+        """Caller-chosen batch wait, capped at the configured command timeout"""
+        return min(max_wait_time, self._max_wait_time) if max_wait_time else self._max_wait_time
+    
+    async def execute_batch_submission(self, requests: List[CommandSubmissionRequest], max_wait_time: Optional[float] = None) -> List[CommandSubmissionResponse]:
+        """Business rule: command.fan_out - queue commands for many targets at once and wait for all concurrently
+        
+        Responses are returned in request order. Invalid requests are rejected
+        individually; commands still running when max_wait_time expires are
+        reported as timed out while the others keep their results.
+        """
+        import asyncio
+        
+        rejections, saved_commands = await self._queue_batch_submission(requests)
+        
+        # Business rule: command.execution_wait - wall-clock time is the slowest target, not the sum
+        wait_time = self._batch_wait_time(max_wait_time)
+        completions = iter(await asyncio.gather(*[
+            self._wait_for_command_completion(command.command_id, wait_time)
+            for command in saved_commands
+        ]))
+        return [rejection if rejection is not None else next(completions) for rejection in rejections]
+    
+    async def stream_batch_submission(self, requests: List[CommandSubmissionRequest], max_wait_time: Optional[float] = None) -> AsyncIterator[Union[CommandSubmissionResponse, Command]]:
+        """Business rule: command.fan_out - queue a batch and yield each command as soon as it finishes
+        
+        Rejected requests are yielded first as failed submission responses.
+        Commands are then yielded in completion order; any still unfinished when
+        max_wait_time expires are yielded last in their current state.
+        """
+        import asyncio
+        
+        rejections, saved_commands = await self._queue_batch_submission(requests)
+        for rejection in rejections:
+            if rejection is not None:
+                yield rejection
+        
+        wait_time = self._batch_wait_time(max_wait_time)
+        waits = [
+            asyncio.ensure_future(self._wait_until_completed(command.command_id, wait_time))
+            for command in saved_commands
+        ]
+        try:
+            for next_finished in asyncio.as_completed(waits):
+                command = await next_finished
+                if command is not None:
+                    yield command
+        finally:
+            # Caller stopped consuming (e.g. client disconnected): stop waiting
+            for wait in waits:
+                wait.cancel()
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from brief_bridge.web.schemas import RegisterClientRequestSchema, RegisterClientResponseSchema, ClientSchema
-from brief_bridge.web.dependencies import get_register_client_use_case, get_client_repository
+from brief_bridge.web.dependencies import get_register_client_use_case, get_client_presence_use_case
 from brief_bridge.use_cases.register_client_use_case import RegisterClientUseCase, ClientRegistrationRequest
-from brief_bridge.repositories.client_repository import ClientRepository
+from brief_bridge.use_cases.client_presence_use_case import ClientPresenceUseCase
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -15,7 +15,8 @@ router = APIRouter(prefix="/clients", tags=["clients"])
             tags=["clients"])
 async def register_new_client(
     request: RegisterClientRequestSchema,
-    use_case: RegisterClientUseCase = Depends(get_register_client_use_case)
+    use_case: RegisterClientUseCase = Depends(get_register_client_use_case),
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case)
 ) -> RegisterClientResponseSchema:
     """API endpoint: Register new client in the system"""
     use_case_request: ClientRegistrationRequest = ClientRegistrationRequest(
@@ -24,6 +25,9 @@ async def register_new_client(
     )
     
     registration_response = await use_case.execute_client_registration(use_case_request)
+    if registration_response.registration_successful:
+        # Goes offline after the threshold even if it never polls
+        presence_use_case.record_registration(registration_response.client_id)
     
     return RegisterClientResponseSchema(
         client_id=registration_response.client_id,
@@ -41,10 +45,10 @@ async def register_new_client(
             tags=["clients"])
 async def get_registered_client_by_id(
     client_id: str,
-    repository: ClientRepository = Depends(get_client_repository)
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case)
 ) -> ClientSchema:
     """API endpoint: Retrieve specific client by ID"""
-    client = await repository.find_client_by_id(client_id)
+    client = await presence_use_case.find_client(client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -62,10 +66,10 @@ async def get_registered_client_by_id(
             description="Get a list of all registered clients in the Brief Bridge system with their current status.",
             tags=["clients"])
 async def get_all_registered_clients(
-    repository: ClientRepository = Depends(get_client_repository)
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case)
 ) -> List[ClientSchema]:
     """API endpoint: List all registered clients in the system"""
-    registered_clients = await repository.get_all_registered_clients()
+    registered_clients = await presence_use_case.get_all_clients()
     return [
         ClientSchema(
             client_id=client.client_id,
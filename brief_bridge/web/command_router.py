@@ -1,14 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+import base64
+import binascii
+import json
+import asyncio
 import os
-from brief_bridge.web.schemas import SubmitCommandRequestSchema, SubmitCommandResponseSchema, CommandSchema, SubmitResultRequestSchema, SubmitResultResponseSchema
-from brief_bridge.web.dependencies import get_submit_command_use_case, get_command_repository, get_client_repository
+import zlib
+from brief_bridge.web.schemas import SubmitCommandRequestSchema, SubmitCommandResponseSchema, CommandSchema, SubmitResultRequestSchema, SubmitResultResponseSchema, SubmitResultBatchRequestSchema, SubmitResultBatchResponseSchema, SubmitBatchCommandRequestSchema, SubmitBatchCommandResponseSchema, SubmitOutputChunkRequestSchema, SubmitOutputChunkResponseSchema, CommandOutputChunkSchema, CommandOutputResponseSchema, CommandHeartbeatResponseSchema
+from brief_bridge.web.dependencies import get_submit_command_use_case, get_command_repository, get_command_event_bus, get_command_output_buffer, get_command_lease_use_case, get_command_archive, get_client_presence_use_case, get_poll_pacer
 from brief_bridge.use_cases.submit_command_use_case import SubmitCommandUseCase, CommandSubmissionRequest
+from brief_bridge.use_cases.command_lease_use_case import CommandLeaseUseCase
+from brief_bridge.use_cases.client_presence_use_case import ClientPresenceUseCase
 from brief_bridge.repositories.command_repository import CommandRepository
-from brief_bridge.repositories.client_repository import ClientRepository
+from brief_bridge.repositories.command_archive import CommandArchive
+from brief_bridge.entities.command import Command
+from brief_bridge.entities.command_query import CommandQuery, CommandCursor
+from brief_bridge.entities.result_slice import ResultRange
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.command_output import CommandOutputBuffer
+from brief_bridge.services.poll_pacing import PollPacer
 
 router = APIRouter(prefix="/commands", tags=["commands"])
 
+# Upper bound for long-poll holds; keep below client HTTP timeouts (30s in bundled clients)
+MAX_POLL_WAIT = float(os.getenv('BRIEF_BRIDGE_MAX_POLL_WAIT', '25.0'))
+# Largest page GET /commands/ returns at once
+MAX_LIST_LIMIT = 1000
+# Most commands one poll hands out (max_commands)
+MAX_POLL_BATCH = 50
+
+
+def _to_submit_response_schema(submission_response) -> SubmitCommandResponseSchema:
+    """Convert use case submission response to API schema"""
+    return SubmitCommandResponseSchema(
+        command_id=submission_response.command_id,
+        target_client_id=submission_response.target_client_id,
+        submission_successful=submission_response.submission_successful,
+        submission_message=submission_response.submission_message,
+        result=submission_response.result,
+        error=submission_response.error,
+        execution_time=submission_response.execution_time,
+        result_offset=submission_response.result_offset,
+        result_total_length=submission_response.result_total_length,
+        expected_pickup_seconds=submission_response.expected_pickup_seconds
+    )
+
+
+def _to_command_schema(command: Command, result: Optional[str] = None) -> CommandSchema:
+    """Convert Command entity to API schema (pass result when it was loaded from a blob)"""
+    return CommandSchema(
+        command_id=command.command_id,
+        target_client_id=command.target_client_id,
+        content=command.content,
+        type=command.type,
+        status=command.status,
+        created_at=str(command.created_at) if command.created_at else None,
+        started_at=str(command.started_at) if command.started_at else None,
+        completed_at=str(command.completed_at) if command.completed_at else None,
+        result=result if result is not None else command.result,
+        result_size=command.result_size,
+        result_sha256=command.result_sha256,
+        error=command.error,
+        execution_time=command.execution_time
+    )
+
+
+async def _load_command_schema(repository: CommandRepository, command: Command) -> CommandSchema:
+    """Convert Command entity to API schema with its full result"""
+    return _to_command_schema(command, await repository.load_result(command))
+
 
 @router.post("/submit", 
              response_model=SubmitCommandResponseSchema,
@@ -26,10 +88,19 @@ Submit a command to a target client for execution.
 - Simple command: `"echo 'Hello World'"`
 - Complex command: `"Get-Process | Where-Object Name -like 'powershell*'"`
 
-The API waits for command execution and returns results synchronously.
+By default the API waits for command execution and returns results synchronously.
+With `?wait=false` the command is queued and `202 Accepted` is returned immediately
+with its `command_id`; collect the result later via `GET /commands/{command_id}/wait`.
+
+A waiting submit to a client that is offline or has missed several polls fails at
+once. Set `pickup_deadline` to queue it anyway: the command fails if the client has
+not fetched it within that many seconds. `expected_pickup_seconds` reports when the
+client was expected to fetch the command.
              """)
 async def submit_command_to_client(
     request: SubmitCommandRequestSchema,
+    response: Response,
+    wait: bool = Query(True, description="Wait for execution result (false: return 202 with command_id immediately)"),
     use_case: SubmitCommandUseCase = Depends(get_submit_command_use_case)
 ) -> SubmitCommandResponseSchema:
     """Submit command to target client"""
@@ -37,159 +108,619 @@ async def submit_command_to_client(
         target_client_id=request.target_client_id,
         command_content=request.command_content,
         command_type=request.command_type,
+        result_range=ResultRange(
+            offset=request.result_offset,
+            length=request.result_length,
+            tail_lines=request.result_tail_lines
+        ),
+        pickup_deadline=request.pickup_deadline,
     )
     
-    submission_response = await use_case.execute_command_submission(use_case_request)
+    if wait:
+        submission_response = await use_case.execute_command_submission(use_case_request)
+    else:
+        submission_response = await use_case.queue_command_submission(use_case_request)
+        if submission_response.submission_successful:
+            response.status_code = 202
     
-    return SubmitCommandResponseSchema(
-        command_id=submission_response.command_id,
-        target_client_id=submission_response.target_client_id,
-        submission_successful=submission_response.submission_successful,
-        submission_message=submission_response.submission_message,
-        result=submission_response.result,
-        error=submission_response.error,
-        execution_time=submission_response.execution_time
+    return _to_submit_response_schema(submission_response)
+
+
+@router.post("/submit/batch",
+             response_model=SubmitBatchCommandResponseSchema,
+             summary="Submit Command to Multiple Clients",
+             description="""
+Fan a command out to many clients and wait for all results concurrently.
+
+Either send one `command_content` to every client in `target_client_ids`, or list
+individual `commands` (target/command pairs), or both. All commands are queued in a
+single repository write; the call returns when every target has reported or `timeout`
+expires, so wall-clock time is that of the slowest client. Results are listed in
+request order (`target_client_ids` first, then `commands`); targets that did not
+finish in time are reported as timed out.
+
+**Streaming:** with `?stream=ndjson` (or `Accept: application/x-ndjson`) results are
+streamed one JSON line per command as soon as each client reports, using the
+`CommandSchema` fields. `?stream=sse` (or `Accept: text/event-stream`) sends the same
+objects as Server-Sent Events (`event: result`). Rejected targets come first as
+submission responses without `command_id` (`event: rejected`); commands unfinished at
+`timeout` come last with their current `status`.
+             """)
+async def submit_command_batch(
+    request: SubmitBatchCommandRequestSchema,
+    http_request: Request,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description="Stream results as they complete: ndjson or sse"),
+    use_case: SubmitCommandUseCase = Depends(get_submit_command_use_case),
+    repository: CommandRepository = Depends(get_command_repository)
+):
+    """Submit commands to several target clients"""
+    use_case_requests = _to_batch_submission_requests(request)
+    
+    stream_format = stream or _streaming_format_from_accept(http_request.headers.get("accept", ""))
+    if stream_format:
+        results = use_case.stream_batch_submission(use_case_requests, request.timeout)
+        return StreamingResponse(
+            _encode_batch_stream(results, stream_format, repository),
+            media_type=STREAM_MEDIA_TYPES[stream_format],
+            headers={"Cache-Control": "no-cache"}
+        )
+    
+    submission_responses = await use_case.execute_batch_submission(use_case_requests, request.timeout)
+    
+    results = [_to_submit_response_schema(submission_response) for submission_response in submission_responses]
+    successful_count = sum(1 for result in results if result.submission_successful)
+    return SubmitBatchCommandResponseSchema(
+        results=results,
+        total_count=len(results),
+        successful_count=successful_count,
+        failed_count=len(results) - successful_count
+    )
+
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _streaming_format_from_accept(accept: str) -> Optional[str]:
+    """Pick a streaming format from the Accept header, None for a regular JSON response"""
+    for stream_format, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return stream_format
+    return None
+
+
+async def _encode_batch_stream(results: AsyncIterator, stream_format: str,
+                               repository: CommandRepository) -> AsyncIterator[str]:
+    """Serialize each streamed batch item as it arrives (nothing is buffered)"""
+    async for item in results:
+        if isinstance(item, Command):
+            event, payload = "result", (await _load_command_schema(repository, item)).model_dump()
+        else:
+            event, payload = "rejected", _to_submit_response_schema(item).model_dump()
+        data = json.dumps(payload, ensure_ascii=False)
+        if stream_format == "sse":
+            yield f"event: {event}\ndata: {data}\n\n"
+        else:
+            yield data + "\n"
+    if stream_format == "sse":
+        yield "event: done\ndata: {}\n\n"
+
+
+def _to_batch_submission_requests(request: SubmitBatchCommandRequestSchema) -> List[CommandSubmissionRequest]:
+    """Expand batch request into one use case request per target"""
+    if not request.target_client_ids and not request.commands:
+        raise HTTPException(status_code=400, detail="target_client_ids or commands is required")
+    
+    use_case_requests = [
+        CommandSubmissionRequest(
+            target_client_id=target_client_id,
+            command_content=request.command_content,
+            command_type=request.command_type,
+        )
+        for target_client_id in request.target_client_ids
+    ]
+    use_case_requests.extend(
+        CommandSubmissionRequest(
+            target_client_id=target.target_client_id,
+            command_content=target.command_content or request.command_content,
+            command_type=target.command_type or request.command_type,
+        )
+        for target in request.commands
     )
+    return use_case_requests
+
+
+def _encode_cursor(cursor: CommandCursor) -> str:
+    """Opaque page token for the position after which the next page starts"""
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(token: str) -> CommandCursor:
+    try:
+        created_at, command_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return str(created_at), str(command_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _command_query_filters(
+    status: Optional[str] = Query(None, description="Only commands in this status (pending, processing, completed, failed)"),
+    target_client_id: Optional[str] = Query(None, description="Only commands for this client"),
+    command_type: Optional[str] = Query(None, alias="type", description="Only commands of this type"),
+    created_since: Optional[datetime] = Query(None, description="Only commands created at or after this time (UTC, ISO 8601)")
+) -> CommandQuery:
+    """Listing filters shared by the command list and export endpoints"""
+    if created_since and created_since.tzinfo:
+        # Stored timestamps are naive UTC
+        created_since = created_since.astimezone(timezone.utc).replace(tzinfo=None)
+    return CommandQuery(status=status, target_client_id=target_client_id,
+                        command_type=command_type, created_since=created_since)
 
 
-@router.get("/{command_id}", response_model=CommandSchema)
+async def _encode_export(commands: AsyncIterator[List[Command]], repository: CommandRepository,
+                         compress: bool) -> AsyncIterator[bytes]:
+    """One JSON line per command, encoded (and compressed) one repository batch at a time"""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    async for batch in commands:
+        lines = "".join([
+            json.dumps((await _load_command_schema(repository, command)).model_dump(), ensure_ascii=False) + "\n"
+            for command in batch
+        ]).encode('utf-8')
+        chunk = compressor.compress(lines) if compressor else lines
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+@router.get("/export",
+            summary="Export Command History",
+            description="Stream every matching command (oldest first) as NDJSON, one `CommandSchema` object per "
+                        "line, including full results. Accepts the same filters as `GET /commands/`. With "
+                        "`compress=true` the stream is gzip-encoded (`Content-Encoding: gzip`). Server memory "
+                        "stays flat whatever the history size.")
+async def export_commands(
+    query: CommandQuery = Depends(_command_query_filters),
+    compress: bool = Query(False, description="gzip-compress the stream"),
+    repository: CommandRepository = Depends(get_command_repository)
+) -> StreamingResponse:
+    """API endpoint: Stream the command history for audits"""
+    headers = {"Content-Disposition": 'attachment; filename="commands.ndjson"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _encode_export(repository.iter_commands(query), repository, compress),
+        media_type=STREAM_MEDIA_TYPES["ndjson"],
+        headers=headers
+    )
+
+
+@router.get("/archive/days",
+            response_model=List[str],
+            summary="List Archived Days")
+async def get_archived_days(
+    command_archive: CommandArchive = Depends(get_command_archive)
+) -> List[str]:
+    """API endpoint: Days (YYYY-MM-DD, newest first) with commands moved out by the retention policy"""
+    return await command_archive.list_days()
+
+
+@router.get("/archive/{day}",
+            response_model=List[CommandSchema],
+            summary="List Archived Commands")
+async def get_archived_commands(
+    day: str = Path(..., pattern=r"^\d{4}-\d{2}-\d{2}$", description="Completion day (YYYY-MM-DD)"),
+    client_id: Optional[str] = Query(None, description="Only commands for this client"),
+    repository: CommandRepository = Depends(get_command_repository),
+    command_archive: CommandArchive = Depends(get_command_archive)
+) -> List[CommandSchema]:
+    """API endpoint: Commands archived for one day"""
+    commands = await command_archive.get_commands_for_day(day, client_id)
+    return [await _load_command_schema(repository, command) for command in commands]
+
+
+@router.get("/{command_id}",
+            response_model=CommandSchema,
+            description="Retrieve a command and its result. For long outputs pass `tail_lines` (last N lines) or "
+                        "`offset`/`length` (characters) to receive only that part; `result_offset` and "
+                        "`result_total_length` then locate it within the full result.")
 async def get_command_by_id(
     command_id: str,
-    repository: CommandRepository = Depends(get_command_repository)
+    offset: Optional[int] = Query(None, ge=0, description="Return the result from this character offset"),
+    length: Optional[int] = Query(None, ge=0, description="Return at most this many characters of the result"),
+    tail_lines: Optional[int] = Query(None, ge=1, description="Return only the last N lines of the result (overrides offset)"),
+    repository: CommandRepository = Depends(get_command_repository),
+    command_archive: CommandArchive = Depends(get_command_archive)
 ) -> CommandSchema:
-    """API endpoint: Retrieve specific command by ID"""
-    command = await repository.find_command_by_id(command_id)
+    """API endpoint: Retrieve specific command by ID (live store first, then the archive)"""
+    command = await repository.find_command_by_id(command_id) or await command_archive.find_command_by_id(command_id)
     if not command:
         raise HTTPException(status_code=404, detail="Command not found")
     
-    return CommandSchema(
-        command_id=command.command_id,
-        target_client_id=command.target_client_id,
-        content=command.content,
-        type=command.type,
-        status=command.status,
-        created_at=str(command.created_at) if command.created_at else None,
-        started_at=str(command.started_at) if command.started_at else None,
-        completed_at=str(command.completed_at) if command.completed_at else None,
-        result=command.result,
-        error=command.error,
-        execution_time=command.execution_time
-    )
+    result_range = ResultRange(offset=offset, length=length, tail_lines=tail_lines)
+    if result_range.is_full():
+        return await _load_command_schema(repository, command)
+    
+    # Business rule: command.result_range - only the requested part is read and encoded
+    command_schema = _to_command_schema(command)
+    result_slice = await repository.load_result_slice(command, result_range)
+    if result_slice:
+        command_schema.result = result_slice.content
+        command_schema.result_offset = result_slice.offset
+        command_schema.result_total_length = result_slice.total_length
+    return command_schema
 
 
-@router.get("/", response_model=List[CommandSchema])
+@router.get("/",
+            response_model=List[CommandSchema],
+            description="List commands ordered by creation time. Filter with `status`, `target_client_id`, `type` "
+                        "and `created_since`. With `limit` the response is one page; when more commands follow, "
+                        "the `X-Next-Cursor` response header holds the `cursor` for the next page. `fields` "
+                        "returns only the listed fields (e.g. `fields=command_id,status,created_at` drops "
+                        "`content` and `result`).")
 async def get_all_commands(
+    response: Response,
+    query: CommandQuery = Depends(_command_query_filters),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIST_LIMIT, description="Maximum commands to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value of the previous page"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc: oldest first, desc: newest first"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (command_id is always included)"),
     repository: CommandRepository = Depends(get_command_repository)
-) -> List[CommandSchema]:
-    """API endpoint: List all commands in the system"""
-    all_commands = await repository.get_all_commands()
-    return [
-        CommandSchema(
-            command_id=command.command_id,
-            target_client_id=command.target_client_id,
-            content=command.content,
-            type=command.type,
-            status=command.status,
-                created_at=str(command.created_at) if command.created_at else None,
-            started_at=str(command.started_at) if command.started_at else None,
-            completed_at=str(command.completed_at) if command.completed_at else None,
-            result=command.result,
-            error=command.error,
-            execution_time=command.execution_time
-        )
-        for command in all_commands
-    ]
+):
+    """API endpoint: List commands, optionally filtered, paged and projected"""
+    selected_fields = None
+    if fields:
+        selected_fields = {field.strip() for field in fields.split(",") if field.strip()} | {"command_id"}
+        unknown_fields = selected_fields - set(CommandSchema.model_fields)
+        if unknown_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+    
+    query.descending = order == "desc"
+    query.after = _decode_cursor(cursor) if cursor else None
+    # One extra command tells whether another page follows
+    query.limit = limit + 1 if limit else None
+    commands = await repository.query_commands(query)
+    
+    headers = {}
+    if limit and len(commands) > limit:
+        commands = commands[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(CommandQuery.command_key(commands[-1]))
+    
+    if selected_fields is None:
+        response.headers.update(headers)
+        return [await _load_command_schema(repository, command) for command in commands]
+    
+    # Business rule: command.listing - projected listings skip loading and encoding unrequested fields
+    with_result = "result" in selected_fields
+    return JSONResponse([
+        _to_command_schema(command, await repository.load_result(command) if with_result else None)
+        .model_dump(include=selected_fields)
+        for command in commands
+    ], headers=headers)
 
 
 @router.get("/client/{client_id}", response_model=List[CommandSchema])
 async def get_commands_by_client_id(
     client_id: str,
-    repository: CommandRepository = Depends(get_command_repository),
-    client_repository: ClientRepository = Depends(get_client_repository)
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case),
+    lease_use_case: CommandLeaseUseCase = Depends(get_command_lease_use_case)
 ) -> List[CommandSchema]:
     """API endpoint: Client retrieves pending commands and marks them as processing"""
-    # Update client activity when polling
-    client = await client_repository.find_client_by_id(client_id)
-    if client:
-        client.update_activity()
-        await client_repository.save_registered_client(client)
-    
-    # Get only pending commands for this client
-    pending_commands = await repository.get_pending_commands_for_client(client_id)
-    
-    # If there are pending commands, mark the first one as processing
-    if pending_commands:
-        command = pending_commands[0]  # Only return one command for single execution
-        command.mark_as_processing()
-        await repository.save_command(command)
-        
-        return [CommandSchema(
-            command_id=command.command_id,
-            target_client_id=command.target_client_id,
-            content=command.content,
-            type=command.type,
-            status=command.status,
-                created_at=str(command.created_at) if command.created_at else None,
-            started_at=str(command.started_at) if command.started_at else None,
-            completed_at=str(command.completed_at) if command.completed_at else None,
-            result=command.result,
-            error=command.error,
-            execution_time=command.execution_time
-        )]
-    
-    return []  # No pending commands
+    # Update client activity when polling (in memory; persisted in the background)
+    presence_use_case.record_poll(client_id)
+    
+    # Claim the oldest pending command for this client (this legacy path sends no heartbeats)
+    commands = await lease_use_case.claim_pending_commands(client_id, with_lease=False)
+    return [_to_command_schema(command) for command in commands]
+
+
+@router.get("/{command_id}/wait",
+            response_model=CommandSchema,
+            summary="Wait for Command Result",
+            description="Block up to `timeout` seconds for a queued command to finish, then return its current state. "
+                        "Check `status` to see whether it completed; call again to keep waiting.")
+async def wait_for_command_result(
+    command_id: str,
+    timeout: float = Query(30.0, ge=0, description="Maximum seconds to wait (capped at the server command timeout)"),
+    use_case: SubmitCommandUseCase = Depends(get_submit_command_use_case),
+    repository: CommandRepository = Depends(get_command_repository)
+) -> CommandSchema:
+    """API endpoint: Wait for a command submitted with wait=false"""
+    command = await use_case.wait_for_command(command_id, timeout)
+    if not command:
+        raise HTTPException(status_code=404, detail="Command not found")
+    return await _load_command_schema(repository, command)
+
+
+@router.post("/{command_id}/output",
+             response_model=SubmitOutputChunkResponseSchema,
+             summary="Append Live Command Output")
+async def submit_command_output(
+    command_id: str,
+    request: SubmitOutputChunkRequestSchema,
+    repository: CommandRepository = Depends(get_command_repository),
+    output_buffer: CommandOutputBuffer = Depends(get_command_output_buffer),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    lease_use_case: CommandLeaseUseCase = Depends(get_command_lease_use_case)
+) -> SubmitOutputChunkResponseSchema:
+    """API endpoint: Client uploads output produced so far by a running command
+    
+    Chunks carry increasing sequence numbers; re-sending a chunk is harmless.
+    The complete output is still reported with the final result. 409 tells
+    the client the command is not processing (any more).
+    """
+    command = await repository.find_command_by_id(command_id)
+    if not command:
+        raise HTTPException(status_code=404, detail="Command not found")
+    
+    # Uploading output proves the client is alive: it renews the lease like a heartbeat.
+    # Only the delivery currently running the command may upload (not pending, finished or requeued ones)
+    if not await lease_use_case.renew_lease(command):
+        raise HTTPException(status_code=409, detail=f"Command is {command.status}, not processing")
+    accepted = output_buffer.append(command_id, request.sequence, request.data)
+    if accepted:
+        event_bus.notify_output_appended(command_id)
+    return SubmitOutputChunkResponseSchema(
+        accepted=accepted,
+        last_sequence=output_buffer.last_sequence(command_id)
+    )
+
+
+@router.get("/{command_id}/output",
+            response_model=CommandOutputResponseSchema,
+            summary="Tail Live Command Output",
+            description="Return output chunks uploaded after sequence `since` (-1 for all retained chunks). "
+                        "With `wait` the request is held until new output arrives, the command completes or "
+                        "the wait expires. Continue with `since=next_since`.")
+async def get_command_output(
+    command_id: str,
+    since: int = Query(-1, ge=-1, description="Last chunk sequence already seen"),
+    wait: float = Query(0.0, ge=0, description="Seconds to wait for new output (capped at the long-poll limit)"),
+    repository: CommandRepository = Depends(get_command_repository),
+    output_buffer: CommandOutputBuffer = Depends(get_command_output_buffer),
+    event_bus: CommandEventBus = Depends(get_command_event_bus)
+) -> CommandOutputResponseSchema:
+    """API endpoint: Read output of a running command incrementally"""
+    with event_bus.output_waiter(command_id) as waiter:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait, MAX_POLL_WAIT)
+        while True:
+            command = await repository.find_command_by_id(command_id)
+            if not command:
+                raise HTTPException(status_code=404, detail="Command not found")
+            output = output_buffer.read_since(command_id, since)
+            if output.chunks or command.is_completed() or loop.time() >= deadline:
+                break
+            await waiter.wait(deadline - loop.time())
+    
+    return CommandOutputResponseSchema(
+        command_id=command_id,
+        status=command.status,
+        chunks=[CommandOutputChunkSchema(sequence=chunk.sequence, data=chunk.data) for chunk in output.chunks],
+        next_since=output.next_since,
+        truncated=output.truncated
+    )
+
+
+@router.post("/{command_id}/heartbeat",
+             response_model=CommandHeartbeatResponseSchema,
+             summary="Renew Command Lease")
+async def renew_command_lease(
+    command_id: str,
+    repository: CommandRepository = Depends(get_command_repository),
+    lease_use_case: CommandLeaseUseCase = Depends(get_command_lease_use_case),
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case)
+) -> CommandHeartbeatResponseSchema:
+    """API endpoint: Client signals it is still executing a command
+    
+    A command whose lease runs out is requeued or failed by the lease
+    sweeper; 409 tells the client its delivery is no longer current.
+    """
+    command = await repository.find_command_by_id(command_id)
+    if not command:
+        raise HTTPException(status_code=404, detail="Command not found")
+    if not await lease_use_case.renew_lease(command, force=True):
+        raise HTTPException(status_code=409, detail=f"Command is {command.status}, not processing")
+    # A client busy executing does not poll; its heartbeats keep it from counting as gone
+    presence_use_case.record_activity(command.target_client_id)
+    
+    return CommandHeartbeatResponseSchema(
+        command_id=command_id,
+        lease_expires_at=str(command.lease_expires_at),
+        lease_seconds=lease_use_case.lease_seconds
+    )
 
 
 @router.post("/poll", response_model=dict)
 async def poll_for_commands(
     request: dict,
-    repository: CommandRepository = Depends(get_command_repository)
+    repository: CommandRepository = Depends(get_command_repository),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    lease_use_case: CommandLeaseUseCase = Depends(get_command_lease_use_case),
+    presence_use_case: ClientPresenceUseCase = Depends(get_client_presence_use_case),
+    poll_pacer: PollPacer = Depends(get_poll_pacer)
 ) -> dict:
-    """API endpoint: Client polls for pending commands"""
+    """API endpoint: Client polls for pending commands
+    
+    With ``wait`` (seconds) the request is held open until a command is queued
+    for the client or the wait expires (long polling). Clients sending
+    ``lease: true`` promise heartbeats; their commands are requeued or failed
+    if the lease returned as ``lease_seconds`` is not renewed. Each command
+    carries ``delivery_attempt``; sending it back with the result lets the
+    server refuse results of a delivery whose lease lapsed. Every response
+    carries ``next_poll_after``: seconds the client should wait before polling
+    again, from its queue depth, recent command rate and server load (0 after
+    a long poll, so the client re-arms it at once).
+    
+    A response that leaves the client's queue empty carries ``queue_version``.
+    Sending it back with the next poll skips the repository while nothing new
+    was queued, so idle polls cost no storage access.
+    
+    With ``max_commands`` up to that many queued commands are handed out at
+    once as a ``commands`` list, saving a round trip per command for clients
+    with a backlog; results can go back together via ``/commands/result/batch``.
+    """
     client_id = request.get("client_id")
     if not client_id:
         raise HTTPException(status_code=400, detail="client_id is required")
+    try:
+        wait_seconds = min(max(float(request.get("wait") or 0), 0.0), MAX_POLL_WAIT)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="wait must be a number of seconds")
+    max_commands = request.get("max_commands")
+    if max_commands is not None:
+        if not isinstance(max_commands, int) or isinstance(max_commands, bool) or max_commands < 1:
+            raise HTTPException(status_code=400, detail="max_commands must be a positive integer")
+        max_commands = min(max_commands, MAX_POLL_BATCH)
+    with_lease = bool(request.get("lease"))
+    presence_use_case.record_poll(client_id)
+    
+    with poll_pacer.tracking_poll():
+        # Subscribe before the first lookup so a command queued in between is not missed
+        with event_bus.command_queued_waiter(client_id) as waiter:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait_seconds
+            seen_version = request.get("queue_version")
+            commands: List[Command] = []
+            while True:
+                # Read the version before the lookup: a command queued after it moves the version on
+                current_version = event_bus.queue_token(client_id)
+                if current_version != seen_version:
+                    seen_version = current_version
+                    # Found commands are marked processing at once, so no other poll receives them
+                    commands = await lease_use_case.claim_pending_commands(client_id, max_commands, with_lease)
+                if commands or loop.time() >= deadline:
+                    break
+                await waiter.wait(deadline - loop.time())
     
-    # Get only pending commands for this client
-    pending_commands = await repository.get_pending_commands_for_client(client_id)
-    
-    # If there are pending commands, mark the first one as processing and return it
-    if pending_commands:
-        command = pending_commands[0]  # Only return one command for single execution
-        command.mark_as_processing()
-        await repository.save_command(command)
-        
-        return {
-            "command_id": command.command_id,
-            "command_content": command.content,
-            "timeout": int(float(os.getenv('BRIEF_BRIDGE_COMMAND_TIMEOUT', '300.0')))  # Use configured timeout
+    # No pending commands - return the pacing hint and the version the queue was empty at
+    if not commands:
+        response = {
+            "next_poll_after": poll_pacer.next_poll_after(client_id, queue_depth=0, long_polled=wait_seconds > 0),
+            "queue_version": seen_version
         }
+        presence_use_case.record_poll_hint(client_id, response["next_poll_after"])
+        if max_commands is not None:
+            response["commands"] = []
+        return response
+    
+    for _ in commands:
+        poll_pacer.record_command_delivered(client_id)
+    version_before_depth = event_bus.queue_token(client_id)
+    queue_depth = len(await repository.get_pending_commands_for_client(client_id))
     
-    # No pending commands - return empty response
-    return {}
+    timeout = int(float(os.getenv('BRIEF_BRIDGE_COMMAND_TIMEOUT', '300.0')))  # Use configured timeout
+    deliveries = [
+        {"command_id": command.command_id, "command_content": command.content, "timeout": timeout,
+         "delivery_attempt": command.delivery_attempts}
+        for command in commands
+    ]
+    response = deliveries[0] if max_commands is None else {"commands": deliveries}
+    response["next_poll_after"] = poll_pacer.next_poll_after(client_id, queue_depth, long_polled=wait_seconds > 0)
+    presence_use_case.record_poll_hint(client_id, response["next_poll_after"])
+    if with_lease:
+        response["lease_seconds"] = lease_use_case.lease_seconds  # Heartbeat well within this period
+    if queue_depth == 0:
+        response["queue_version"] = version_before_depth
+    return response
+
+
+def _apply_result(command: Command, request: SubmitResultRequestSchema) -> None:
+    """Update command with execution result"""
+    if request.error:
+        command.mark_as_failed(request.error, request.execution_time or 0.0)
+    else:
+        command.mark_as_completed(request.output or "", request.execution_time or 0.0)
+
+
+def _notify_results(event_bus: CommandEventBus, output_buffer: CommandOutputBuffer, commands: List[Command]) -> None:
+    """Wake any submitter waiting on the commands and drop their live output"""
+    for command in commands:
+        # The full output is in the result, so the live chunks are no longer needed
+        output_buffer.discard(command.command_id)
+        event_bus.notify_command_completed(command.command_id)
+        # Output tails return on completion
+        event_bus.notify_output_appended(command.command_id)
+
+
+async def _store_results(repository: CommandRepository, results: List[SubmitResultRequestSchema]) -> Tuple[List[Command], List[str], List[str]]:
+    """Apply results to the commands awaiting them, one locked write per client
+    
+    Returns the stored commands, the unknown command IDs and the IDs whose
+    result came from a delivery that is no longer current.
+    """
+    known: List[Tuple[str, SubmitResultRequestSchema]] = []
+    unknown_command_ids: List[str] = []
+    for result in results:
+        command = await repository.find_command_by_id(result.command_id)
+        if command:
+            known.append((command.target_client_id, result))
+        else:
+            unknown_command_ids.append(result.command_id)
+    
+    stored: List[Command] = []
+    rejected_command_ids: List[str] = []
+    for client_id in dict.fromkeys(client_id for client_id, _ in known):
+        async with repository.client_lock(client_id):
+            commands = []
+            for result in (result for result_client_id, result in known if result_client_id == client_id):
+                # Re-read under the lock: the lease sweeper may have requeued or failed the command
+                command = await repository.find_command_by_id(result.command_id)
+                if command is None or not CommandLeaseUseCase.is_current_delivery(command, result.delivery_attempt):
+                    rejected_command_ids.append(result.command_id)
+                    continue
+                _apply_result(command, result)
+                commands.append(command)
+            if commands:
+                await repository.save_commands(commands)
+            stored.extend(commands)
+    return stored, unknown_command_ids, rejected_command_ids
 
 
 @router.post("/result", response_model=SubmitResultResponseSchema)
 async def submit_command_result(
     request: SubmitResultRequestSchema,
-    repository: CommandRepository = Depends(get_command_repository)
+    repository: CommandRepository = Depends(get_command_repository),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    output_buffer: CommandOutputBuffer = Depends(get_command_output_buffer)
 ) -> SubmitResultResponseSchema:
-    """API endpoint: Client submits command execution result"""
-    # Find the command by ID
-    command = await repository.find_command_by_id(request.command_id)
-    if not command:
-        raise HTTPException(status_code=404, detail="Command not found")
+    """API endpoint: Client submits command execution result
     
-    # Update command with execution result
-    if request.error:
-        command.mark_as_failed(request.error, request.execution_time or 0.0)
-    else:
-        command.mark_as_completed(request.output or "", request.execution_time or 0.0)
+    409 tells the client the command no longer awaits this result (its lease
+    expired and it was failed or handed out again).
+    """
+    stored, unknown_command_ids, _ = await _store_results(repository, [request])
+    if unknown_command_ids:
+        raise HTTPException(status_code=404, detail="Command not found")
+    if not stored:
+        raise HTTPException(status_code=409, detail="Command is not awaiting a result from this delivery")
     
-    # Save updated command
-    await repository.save_command(command)
+    # Wake any submitter waiting on it
+    _notify_results(event_bus, output_buffer, stored)
     
     return SubmitResultResponseSchema(
         status="success",
         message="Result received successfully"
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/result/batch", response_model=SubmitResultBatchResponseSchema)
+async def submit_command_results(
+    request: SubmitResultBatchRequestSchema,
+    repository: CommandRepository = Depends(get_command_repository),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    output_buffer: CommandOutputBuffer = Depends(get_command_output_buffer)
+) -> SubmitResultBatchResponseSchema:
+    """API endpoint: Client submits the results of several commands in one request
+    
+    All accepted results of one client are saved in one repository write.
+    Unknown command IDs and results of stale deliveries do not fail the
+    batch; they are listed in ``unknown_command_ids`` and ``rejected_command_ids``.
+    """
+    stored, unknown_command_ids, rejected_command_ids = await _store_results(repository, request.results)
+    _notify_results(event_bus, output_buffer, stored)
+    
+    return SubmitResultBatchResponseSchema(
+        accepted_count=len(stored),
+        unknown_command_ids=unknown_command_ids,
+        rejected_command_ids=rejected_command_ids
+    )
@@ -1,26 +1,83 @@
-from brief_bridge.repositories.client_repository import ClientRepository, FileBasedClientRepository
-from brief_bridge.repositories.command_repository import CommandRepository, FileBasedCommandRepository
+from brief_bridge.repositories.client_repository import ClientRepository, FileBasedClientRepository, SqliteClientRepository
+from brief_bridge.repositories.command_repository import CommandRepository, FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+from brief_bridge.repositories.command_archive import CommandArchive
 from brief_bridge.use_cases.register_client_use_case import RegisterClientUseCase
 from brief_bridge.use_cases.submit_command_use_case import SubmitCommandUseCase
 from brief_bridge.use_cases.tunnel_setup_use_case import TunnelSetupUseCase
+from brief_bridge.use_cases.command_lease_use_case import CommandLeaseUseCase
+from brief_bridge.use_cases.client_presence_use_case import ClientPresenceUseCase
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.command_output import CommandOutputBuffer
+from brief_bridge.services.client_presence import ClientPresenceTable
+from brief_bridge.services.poll_pacing import PollPacer
 from fastapi import Depends, Request
 import os
 
-# File-based repository instances for persistent storage
-_client_repository_instance: ClientRepository = FileBasedClientRepository()
-_command_repository_instance: CommandRepository = FileBasedCommandRepository()
+# Storage backend: "wal" (default; a snapshot-compatible successor of "file"), "file" or "sqlite"
+STORAGE_BACKEND = os.getenv('BRIEF_BRIDGE_STORAGE_BACKEND', 'wal').lower()
+
+
+def _create_client_repository(backend: str) -> ClientRepository:
+    """Build the client repository for the configured storage backend"""
+    if backend == "sqlite":
+        return SqliteClientRepository()
+    return FileBasedClientRepository()
+
+
+def _create_command_repository(backend: str) -> CommandRepository:
+    """Build the command repository for the configured storage backend"""
+    if backend == "sqlite":
+        return SqliteCommandRepository()
+    if backend == "file":
+        return FileBasedCommandRepository()
+    return WriteAheadLogCommandRepository()
+
+
+# Repository instances for persistent storage
+_client_repository_instance: ClientRepository = _create_client_repository(STORAGE_BACKEND)
+_command_repository_instance: CommandRepository = _create_command_repository(STORAGE_BACKEND)
+_command_archive_instance: CommandArchive = CommandArchive()
+_command_event_bus_instance: CommandEventBus = CommandEventBus()
+_command_output_buffer_instance: CommandOutputBuffer = CommandOutputBuffer()
+_client_presence_table_instance: ClientPresenceTable = ClientPresenceTable()
+_poll_pacer_instance: PollPacer = PollPacer()
 
 
 def get_client_repository() -> ClientRepository:
-    """FastAPI dependency: File-based client repository"""
+    """FastAPI dependency: Persistent client repository for the configured backend"""
     return _client_repository_instance
 
 
 def get_command_repository() -> CommandRepository:
-    """FastAPI dependency: File-based command repository"""
+    """FastAPI dependency: Persistent command repository for the configured backend"""
     return _command_repository_instance
 
 
+def get_command_archive() -> CommandArchive:
+    """FastAPI dependency: Archive of commands moved out of the live store"""
+    return _command_archive_instance
+
+
+def get_command_event_bus() -> CommandEventBus:
+    """FastAPI dependency: Process-wide command lifecycle event bus"""
+    return _command_event_bus_instance
+
+
+def get_command_output_buffer() -> CommandOutputBuffer:
+    """FastAPI dependency: Process-wide buffer of live command output"""
+    return _command_output_buffer_instance
+
+
+def get_client_presence_table() -> ClientPresenceTable:
+    """FastAPI dependency: Process-wide table of client activity"""
+    return _client_presence_table_instance
+
+
+def get_poll_pacer() -> PollPacer:
+    """FastAPI dependency: Process-wide poll pacing state"""
+    return _poll_pacer_instance
+
+
 def get_register_client_use_case(
     client_repository: ClientRepository = Depends(get_client_repository)
 ) -> RegisterClientUseCase:
@@ -30,10 +87,30 @@ def get_register_client_use_case(
 
 def get_submit_command_use_case(
     client_repository: ClientRepository = Depends(get_client_repository),
-    command_repository: CommandRepository = Depends(get_command_repository)
+    command_repository: CommandRepository = Depends(get_command_repository),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    presence_table: ClientPresenceTable = Depends(get_client_presence_table)
 ) -> SubmitCommandUseCase:
     """FastAPI dependency: Submit command use case with repository injection"""
-    return SubmitCommandUseCase(client_repository, command_repository)
+    return SubmitCommandUseCase(client_repository, command_repository, event_bus=event_bus, presence_table=presence_table)
+
+
+def get_command_lease_use_case(
+    command_repository: CommandRepository = Depends(get_command_repository),
+    event_bus: CommandEventBus = Depends(get_command_event_bus),
+    output_buffer: CommandOutputBuffer = Depends(get_command_output_buffer)
+) -> CommandLeaseUseCase:
+    """FastAPI dependency: Command lease use case with repository injection"""
+    return CommandLeaseUseCase(command_repository, event_bus, output_buffer=output_buffer)
+
+
+def get_client_presence_use_case(
+    client_repository: ClientRepository = Depends(get_client_repository),
+    presence_table: ClientPresenceTable = Depends(get_client_presence_table),
+    event_bus: CommandEventBus = Depends(get_command_event_bus)
+) -> ClientPresenceUseCase:
+    """FastAPI dependency: Client presence use case with repository injection"""
+    return ClientPresenceUseCase(client_repository, presence_table, event_bus)
 
 
 def get_tunnel_setup_use_case(request: Request) -> TunnelSetupUseCase:
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 
 class RegisterClientRequestSchema(BaseModel):
@@ -26,6 +26,10 @@ class SubmitCommandRequestSchema(BaseModel):
     target_client_id: str = Field(..., description="ID of the target client to execute the command")
     command_content: str = Field(..., description="Command content to execute", json_schema_extra={"examples": ["echo 'Hello World'", "Get-Process | Where-Object Name -like 'powershell*'"]})
     command_type: str = Field(default="shell", description="Type of command to execute", json_schema_extra={"examples": ["shell", "powershell"]})
+    result_offset: Optional[int] = Field(default=None, ge=0, description="Return the result from this character offset")
+    result_length: Optional[int] = Field(default=None, ge=0, description="Return at most this many characters of the result")
+    result_tail_lines: Optional[int] = Field(default=None, ge=1, description="Return only the last N lines of the result (overrides result_offset)")
+    pickup_deadline: Optional[float] = Field(default=None, gt=0, description="Seconds an unresponsive client gets to fetch the command (default: reject at once)")
 
 
 class SubmitCommandResponseSchema(BaseModel):
@@ -37,6 +41,31 @@ class SubmitCommandResponseSchema(BaseModel):
     result: Optional[str] = None
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    # Set when only part of the result was requested
+    result_offset: Optional[int] = Field(None, description="Character offset of the returned part within the full result")
+    result_total_length: Optional[int] = Field(None, description="Characters in the full result")
+    expected_pickup_seconds: Optional[float] = Field(None, description="Seconds until the client was expected to fetch the command, from its poll history")
+
+
+class BatchCommandTargetSchema(BaseModel):
+    target_client_id: str = Field(..., description="ID of the target client")
+    command_content: Optional[str] = Field(default=None, description="Command for this target (defaults to the batch command_content)")
+    command_type: Optional[str] = Field(default=None, description="Command type for this target (defaults to the batch command_type)")
+
+
+class SubmitBatchCommandRequestSchema(BaseModel):
+    command_content: Optional[str] = Field(default=None, description="Command sent to every client in target_client_ids")
+    command_type: str = Field(default="shell", description="Type of command to execute")
+    target_client_ids: List[str] = Field(default_factory=list, description="Clients that all receive command_content")
+    commands: List[BatchCommandTargetSchema] = Field(default_factory=list, description="Individual command/target pairs")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Seconds to wait for all results (capped at the server command timeout)")
+
+
+class SubmitBatchCommandResponseSchema(BaseModel):
+    results: List[SubmitCommandResponseSchema]
+    total_count: int
+    successful_count: int
+    failed_count: int
 
 
 class CommandSchema(BaseModel):
@@ -50,8 +79,13 @@ class CommandSchema(BaseModel):
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
     result: Optional[str] = None
+    result_size: Optional[int] = Field(None, description="Size in bytes of a large result stored outside the command record")
+    result_sha256: Optional[str] = Field(None, description="SHA-256 of a large result stored outside the command record")
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    # Set when only part of the result was requested
+    result_offset: Optional[int] = Field(None, description="Character offset of the returned part within the full result")
+    result_total_length: Optional[int] = Field(None, description="Characters in the full result")
 
 
 class SubmitResultRequestSchema(BaseModel):
@@ -60,8 +94,49 @@ class SubmitResultRequestSchema(BaseModel):
     output: Optional[str] = None
     error: Optional[str] = None
     execution_time: Optional[float] = None
+    delivery_attempt: Optional[int] = Field(None, description="delivery_attempt of the poll response that handed out the command; results of an earlier delivery are refused")
 
 
 class SubmitResultResponseSchema(BaseModel):
     status: str = "success"
-    message: str = "Result received successfully"
\ No newline at end of file
+    message: str = "Result received successfully"
+
+
+class SubmitResultBatchRequestSchema(BaseModel):
+    results: List[SubmitResultRequestSchema] = Field(..., min_length=1, description="Results of commands received from one or more polls")
+
+
+class SubmitResultBatchResponseSchema(BaseModel):
+    status: str = "success"
+    accepted_count: int = Field(..., description="Results stored")
+    unknown_command_ids: List[str] = Field(default_factory=list, description="Command IDs the server does not know (their results were dropped)")
+    rejected_command_ids: List[str] = Field(default_factory=list, description="Commands no longer awaiting this result, e.g. failed or redelivered after their lease expired (results dropped)")
+
+
+class SubmitOutputChunkRequestSchema(BaseModel):
+    sequence: int = Field(..., ge=0, description="Chunk number, starting at 0 and increasing by one per chunk")
+    data: str = Field(..., description="Output produced since the previous chunk")
+
+
+class SubmitOutputChunkResponseSchema(BaseModel):
+    accepted: bool = Field(..., description="False if this sequence was already received")
+    last_sequence: int = Field(..., description="Highest sequence stored for the command")
+
+
+class CommandOutputChunkSchema(BaseModel):
+    sequence: int
+    data: str
+
+
+class CommandOutputResponseSchema(BaseModel):
+    command_id: str
+    status: str
+    chunks: List[CommandOutputChunkSchema]
+    next_since: int = Field(..., description="Pass as `since` to fetch only newer chunks")
+    truncated: bool = Field(default=False, description="Older chunks were dropped from the live buffer; the complete output arrives with the result")
+
+
+class CommandHeartbeatResponseSchema(BaseModel):
+    command_id: str
+    lease_expires_at: str = Field(..., description="The command is requeued or failed if not renewed by then")
+    lease_seconds: float
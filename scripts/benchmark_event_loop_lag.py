@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Measure event-loop lag while clients poll a file-backed command store
+
+Runs the same concurrent poll workload twice against FileBasedCommandRepository:
+once with repository I/O inline on the event loop (the previous behaviour) and
+once on the storage thread pool. A probe task sleeps in short ticks and records
+how late it wakes up; that lateness is what a health check or install-script
+download would see while the polls are in flight.
+
+Usage:
+    python scripts/benchmark_event_loop_lag.py [--commands 20000] [--clients 20] [--polls 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brief_bridge.entities.command import Command  # noqa: E402
+from brief_bridge.repositories.command_repository import FileBasedCommandRepository  # noqa: E402
+
+PROBE_TICK = 0.005  # seconds
+
+
+async def run_inline(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking storage call directly on the event loop"""
+    return func(*args)
+
+
+class InlineFileBasedCommandRepository(FileBasedCommandRepository):
+    """Repository I/O on the event loop, as before the storage thread pool"""
+    _run_io = staticmethod(run_inline)
+
+
+def seed_commands(repository: FileBasedCommandRepository, command_count: int, client_count: int) -> None:
+    """Write a commands.json with mostly completed history, like a long-running server"""
+    records = {}
+    for index in range(command_count):
+        command = Command.create_new_command(f"client-{index % client_count}", f"echo {index}")
+        command.mark_as_processing()
+        command.mark_as_completed("x" * 200, 0.1)
+        records[command.command_id] = repository._command_to_dict(command)
+    repository._store._write_file(records)
+
+
+async def probe_lag(samples: list, stop: asyncio.Event) -> None:
+    """Record how much later than requested each short sleep returns"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(PROBE_TICK)
+        samples.append(loop.time() - started - PROBE_TICK)
+
+
+async def client_polls(repository: FileBasedCommandRepository, client_id: str, polls: int) -> None:
+    """One client: look up its pending commands, occasionally record a new one"""
+    for poll in range(polls):
+        await repository.get_pending_commands_for_client(client_id)
+        if poll % 5 == 0:
+            await repository.save_command(Command.create_new_command(client_id, "echo poll"))
+
+
+async def run_workload(repository: FileBasedCommandRepository, client_count: int, polls: int) -> dict:
+    samples: list = []
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(probe_lag(samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*[client_polls(repository, f"client-{index}", polls) for index in range(client_count)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    samples.sort()
+    return {
+        "elapsed": elapsed,
+        "max_lag": samples[-1] if samples else 0.0,
+        "p99_lag": samples[int(len(samples) * 0.99) - 1] if samples else 0.0,
+        "median_lag": statistics.median(samples) if samples else 0.0,
+        "probe_wakeups": len(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=20000, help="commands in the seeded store")
+    parser.add_argument("--clients", type=int, default=20, help="concurrently polling clients")
+    parser.add_argument("--polls", type=int, default=10, help="polls per client")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed_commands(FileBasedCommandRepository(data_dir), args.commands, args.clients)
+        size_mb = os.path.getsize(os.path.join(data_dir, "commands.json")) / 1e6
+        print(f"Store: {args.commands} commands ({size_mb:.1f} MB), "
+              f"{args.clients} clients x {args.polls} polls\n")
+        print(f"{'mode':<14}{'total s':>9}{'max lag ms':>12}{'p99 lag ms':>12}{'median ms':>11}{'probe ticks':>13}")
+        for label, repository_class in (("inline", InlineFileBasedCommandRepository),
+                                        ("thread pool", FileBasedCommandRepository)):
+            result = asyncio.run(run_workload(repository_class(data_dir), args.clients, args.polls))
+            print(f"{label:<14}{result['elapsed']:>9.2f}{result['max_lag'] * 1000:>12.1f}"
+                  f"{result['p99_lag'] * 1000:>12.1f}{result['median_lag'] * 1000:>11.1f}"
+                  f"{result['probe_wakeups']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Batch fan-out E2E tests with client simulation framework"""
+
+import json
+import time
+from .client_simulator import MultiClientSimulator, create_delayed_handler
+
+
+class TestBatchCommandExecutionE2E:
+    """E2E tests for submitting one command to several clients"""
+    
+    def test_batch_submit_waits_for_all_clients_concurrently(self, api_client):
+        """Test batch fan-out takes as long as the slowest client, not the sum"""
+        multi_sim = MultiClientSimulator(api_client)
+        client_ids = [f"batch-client-{i}" for i in range(3)]
+        for i, client_id in enumerate(client_ids):
+            api_client.post("/clients/register", json={"client_id": client_id, "name": f"Batch Client {i}"})
+            multi_sim.add_client(client_id, create_delayed_handler(0.6, f"Batch result {i}"))
+        
+        threads = multi_sim.start_all_clients(poll_interval=0.1)
+        
+        try:
+            start_time = time.time()
+            response = api_client.post("/commands/submit/batch", json={
+                "command_content": "hostname",
+                "target_client_ids": client_ids + ["unregistered-batch-client"]
+            })
+            elapsed = time.time() - start_time
+            
+            assert response.status_code == 200
+            batch = response.json()
+            assert batch["total_count"] == 4
+            assert batch["successful_count"] == 3
+            assert [result["target_client_id"] for result in batch["results"]] == client_ids + ["unregistered-batch-client"]
+            for i in range(3):
+                assert batch["results"][i]["result"] == f"Batch result {i}"
+            assert batch["results"][3]["submission_message"] == "Target client not found"
+            
+            # Three 0.6s executions in parallel, not 1.8s in sequence
+            assert elapsed < 1.6
+            
+        finally:
+            multi_sim.stop_all_clients()
+            for thread in threads:
+                thread.join(timeout=2)
+
+    def test_batch_results_stream_as_ndjson_in_completion_order(self, api_client):
+        """Test streamed batch emits each client's result as it lands, fastest first"""
+        multi_sim = MultiClientSimulator(api_client)
+        delays = {"stream-client-slow": 0.8, "stream-client-fast": 0.1}
+        for client_id, delay in delays.items():
+            api_client.post("/clients/register", json={"client_id": client_id, "name": client_id})
+            multi_sim.add_client(client_id, create_delayed_handler(delay, f"from {client_id}"))
+        
+        threads = multi_sim.start_all_clients(poll_interval=0.05)
+        
+        try:
+            with api_client.stream("POST", "/commands/submit/batch?stream=ndjson", json={
+                "command_content": "uptime",
+                "target_client_ids": list(delays)
+            }) as response:
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("application/x-ndjson")
+                lines = [json.loads(line) for line in response.iter_lines() if line]
+            
+            assert [line["target_client_id"] for line in lines] == ["stream-client-fast", "stream-client-slow"]
+            assert all(line["status"] == "completed" for line in lines)
+            assert lines[0]["result"] == "from stream-client-fast"
+            
+        finally:
+            multi_sim.stop_all_clients()
+            for thread in threads:
+                thread.join(timeout=2)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from brief_bridge.entities.client import Client
+from brief_bridge.repositories.client_repository import FileBasedClientRepository, InMemoryClientRepository
+from brief_bridge.services.client_presence import ClientPresenceTable
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.use_cases.client_presence_use_case import ClientPresenceUseCase
+
+
+async def test_polls_are_recorded_in_memory_and_flushed_in_one_write(tmp_path):
+    """Business Rule: Polling costs no client store write; the background flush persists the latest activity"""
+    repository = FileBasedClientRepository(data_dir=str(tmp_path))
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    await repository.save_clients([
+        Client(client_id=f"poller-{index}", status="offline", last_seen=long_ago) for index in range(3)
+    ])
+    writes = []
+    write_file = repository._store._write_file
+    repository._store._write_file = lambda records: (writes.append(len(records)), write_file(records))
+    presence = ClientPresenceUseCase(repository, ClientPresenceTable())
+
+    for _ in range(20):
+        for index in range(3):
+            presence.record_poll(f"poller-{index}")
+    presence.record_poll("never-registered")
+    assert writes == []
+    assert (await presence.find_client("poller-0")).status == "online"  # visible before the flush
+
+    assert await presence.flush_presence() == 3
+    assert len(writes) == 1
+    assert await presence.flush_presence() == 0
+
+
+async def test_file_repository_round_trips_status_and_last_seen(tmp_path):
+    """Business Rule: Stored client status and last_seen survive a restart of the file store"""
+    last_seen = datetime.now(timezone.utc) - timedelta(minutes=5)
+    await FileBasedClientRepository(data_dir=str(tmp_path)).save_registered_client(
+        Client(client_id="file-client", name="File Client", status="offline", last_seen=last_seen)
+    )
+
+    client = await FileBasedClientRepository(data_dir=str(tmp_path)).find_client_by_id("file-client")
+
+    assert client.status == "offline"
+    assert client.last_seen == last_seen
+
+
+async def test_offline_sweeper_expires_each_client_at_its_own_deadline():
+    """Business Rule: A client goes offline when its threshold expires; later heartbeats push the deadline back"""
+    repository = InMemoryClientRepository()
+    event_bus = CommandEventBus()
+    table = ClientPresenceTable(offline_threshold=60)
+    presence = ClientPresenceUseCase(repository, table, event_bus)
+    start = datetime.now(timezone.utc)
+    await repository.save_registered_client(Client(client_id="stored-idle", status="online", last_seen=start - timedelta(seconds=30)))
+    await presence.track_stored_clients()
+    table.record_seen("quiet", seen_at=start)
+    table.record_seen("busy", seen_at=start)
+    table.record_seen("busy", seen_at=start + timedelta(seconds=50))
+
+    assert presence.expire_offline_clients(start + timedelta(seconds=29)) == []
+    assert presence.expire_offline_clients(start + timedelta(seconds=30)) == ["stored-idle"]
+    with event_bus.client_status_waiter("quiet") as waiter:
+        assert presence.expire_offline_clients(start + timedelta(seconds=61)) == ["quiet"]
+        assert await waiter.wait(0.1)
+    assert presence.expire_offline_clients(start + timedelta(seconds=111)) == ["busy"]
+    assert table.next_deadline() is None
+    assert set(table.take_dirty()) == {"stored-idle", "quiet", "busy"}
+
+    with event_bus.client_status_waiter("quiet") as waiter:
+        presence.record_poll("quiet")
+        assert table.get("quiet").status == "online"
+        assert await waiter.wait(0.1)
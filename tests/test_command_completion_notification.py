@@ -0,0 +1,56 @@
+import asyncio
+import time
+from brief_bridge.entities.client import Client
+from brief_bridge.repositories.client_repository import InMemoryClientRepository
+from brief_bridge.repositories.command_repository import InMemoryCommandRepository
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.use_cases.submit_command_use_case import SubmitCommandUseCase, CommandSubmissionRequest
+
+
+async def test_waiting_submission_wakes_when_result_is_reported():
+    """Business Rule: A waiting submit returns as soon as the result is stored, not on the next poll"""
+    client_repository = InMemoryClientRepository()
+    command_repository = InMemoryCommandRepository()
+    event_bus = CommandEventBus()
+    await client_repository.save_registered_client(Client.register_new_client("event-client"))
+    # A poll interval this long would make the test time out if the use case still polled
+    use_case = SubmitCommandUseCase(client_repository, command_repository,
+                                    max_wait_time=5.0, poll_interval=60.0, event_bus=event_bus)
+
+    async def simulated_client():
+        while True:
+            command = await command_repository.get_next_pending_command_for_client("event-client")
+            if command:
+                break
+            await asyncio.sleep(0.01)
+        command.mark_as_processing()
+        command.mark_as_completed("done", 0.05)
+        await command_repository.save_command(command)
+        event_bus.notify_command_completed(command.command_id)
+
+    started = time.monotonic()
+    client_task = asyncio.create_task(simulated_client())
+    response = await use_case.execute_command_submission(
+        CommandSubmissionRequest(target_client_id="event-client", command_content="echo done")
+    )
+    await client_task
+
+    assert response.submission_successful is True
+    assert response.result == "done"
+    assert time.monotonic() - started < 1.0
+
+
+async def test_waiting_submission_times_out_without_result():
+    """Business Rule: Without a result the submit gives up after max_wait_time"""
+    client_repository = InMemoryClientRepository()
+    await client_repository.save_registered_client(Client.register_new_client("silent-client"))
+    use_case = SubmitCommandUseCase(client_repository, InMemoryCommandRepository(),
+                                    max_wait_time=0.2, event_bus=CommandEventBus())
+
+    response = await use_case.execute_command_submission(
+        CommandSubmissionRequest(target_client_id="silent-client", command_content="echo never")
+    )
+
+    assert response.submission_successful is False
+    assert response.submission_message == "Command execution timeout after 0.2 seconds"
+    assert response.execution_time >= 0.2
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from brief_bridge.entities.client import Client
+from brief_bridge.repositories.client_repository import InMemoryClientRepository
+from brief_bridge.repositories.command_repository import (
+    InMemoryCommandRepository, FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+)
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.command_output import CommandOutputBuffer
+from brief_bridge.entities.command import Command
+from brief_bridge.use_cases.command_lease_use_case import CommandLeaseUseCase
+from brief_bridge.use_cases.submit_command_use_case import SubmitCommandUseCase, CommandSubmissionRequest
+
+
+async def test_expired_lease_is_requeued_until_delivery_attempts_run_out():
+    """Business Rule: An abandoned command goes back to pending, then fails once its attempts are used"""
+    command_repository = InMemoryCommandRepository()
+    output_buffer = CommandOutputBuffer()
+    lease_use_case = CommandLeaseUseCase(command_repository, lease_seconds=10, max_delivery_attempts=2,
+                                         output_buffer=output_buffer)
+    command = await command_repository.save_command(Command.create_new_command("lease-client", "long-job"))
+    after_lease = lambda: datetime.utcnow() + timedelta(seconds=11)
+
+    await lease_use_case.dispatch_command(command)
+    output_buffer.append(command.command_id, 0, "partial output")
+    assert (await lease_use_case.sweep_expired_leases(datetime.utcnow())).requeued == []
+
+    first_sweep = await lease_use_case.sweep_expired_leases(after_lease())
+    assert first_sweep.requeued == [command]
+    assert (await command_repository.get_next_pending_command_for_client("lease-client")) is command
+    # The next delivery numbers its output from 0 again
+    assert output_buffer.append(command.command_id, 0, "output of the second delivery") is True
+
+    await lease_use_case.dispatch_command(command)
+    second_sweep = await lease_use_case.sweep_expired_leases(after_lease())
+    assert second_sweep.failed == [command]
+    assert command.status == "failed"
+    assert command.delivery_attempts == 2
+
+
+async def test_waiting_submission_fails_fast_when_client_dies():
+    """Business Rule: A submitter waiting on a dead client is released by the lease sweep, not the command timeout"""
+    client_repository = InMemoryClientRepository()
+    command_repository = InMemoryCommandRepository()
+    event_bus = CommandEventBus()
+    await client_repository.save_registered_client(Client.register_new_client("dying-client"))
+    use_case = SubmitCommandUseCase(client_repository, command_repository, max_wait_time=30.0, event_bus=event_bus)
+    lease_use_case = CommandLeaseUseCase(command_repository, event_bus, lease_seconds=0.1, max_delivery_attempts=1)
+    sweeper = asyncio.ensure_future(lease_use_case.run_lease_sweeper(interval=0.05))
+
+    async def client_that_dies_after_pickup():
+        while True:
+            command = await command_repository.get_next_pending_command_for_client("dying-client")
+            if command:
+                await lease_use_case.dispatch_command(command)
+                return
+            await asyncio.sleep(0.01)
+
+    try:
+        response, _ = await asyncio.wait_for(asyncio.gather(
+            use_case.execute_command_submission(CommandSubmissionRequest("dying-client", "sleep 600")),
+            client_that_dies_after_pickup()
+        ), timeout=5)
+    finally:
+        sweeper.cancel()
+
+    assert response.submission_successful is False
+    assert "lease expired" in response.error
+
+
+@pytest.mark.parametrize("repository_class", [
+    FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+])
+async def test_concurrent_polls_never_receive_the_same_command(tmp_path, repository_class):
+    """Business Rule: A pending command is claimed by exactly one of two simultaneous polls"""
+    command_repository = repository_class(data_dir=str(tmp_path))
+    command = await command_repository.save_command(Command.create_new_command("busy-client", "echo once"))
+
+    # Each request builds its own use case; only the repository is shared
+    first_poll, second_poll = await asyncio.gather(
+        CommandLeaseUseCase(command_repository).claim_pending_commands("busy-client"),
+        CommandLeaseUseCase(command_repository).claim_pending_commands("busy-client")
+    )
+
+    assert sorted([len(first_poll), len(second_poll)]) == [0, 1]
+    assert (first_poll + second_poll)[0].command_id == command.command_id
+    assert (await command_repository.find_command_by_id(command.command_id)).status == "processing"
+
+
+async def test_sweep_does_not_overwrite_a_result_stored_after_its_scan(tmp_path):
+    """Business Rule: A result that lands while the sweeper runs wins over the expired lease"""
+    command_repository = FileBasedCommandRepository(data_dir=str(tmp_path))
+    lease_use_case = CommandLeaseUseCase(command_repository, lease_seconds=10, max_delivery_attempts=1)
+    command = await command_repository.save_command(Command.create_new_command("late-client", "make"))
+    await lease_use_case.dispatch_command(command)
+
+    scan_processing_commands = command_repository.get_processing_commands
+
+    async def scan_then_result_arrives():
+        scanned = await scan_processing_commands()
+        finished = await command_repository.find_command_by_id(command.command_id)
+        finished.mark_as_completed("built", 12.0)
+        await command_repository.save_command(finished)
+        return scanned
+
+    command_repository.get_processing_commands = scan_then_result_arrives
+    sweep = await lease_use_case.sweep_expired_leases(datetime.utcnow() + timedelta(seconds=11))
+
+    assert sweep.failed == []
+    stored = await command_repository.find_command_by_id(command.command_id)
+    assert (stored.status, stored.result) == ("completed", "built")
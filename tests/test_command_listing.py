@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime, timedelta
+from brief_bridge.entities.command import Command
+from brief_bridge.entities.command_query import CommandQuery
+from brief_bridge.repositories.command_repository import (
+    InMemoryCommandRepository, FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+)
+
+
+def _repository(repository_class, tmp_path):
+    if repository_class is InMemoryCommandRepository:
+        return repository_class()
+    return repository_class(data_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize("repository_class", [
+    InMemoryCommandRepository, FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+])
+async def test_query_pages_through_filtered_commands_in_creation_order(tmp_path, repository_class):
+    """Business Rule: Filters and cursors are applied by the repository; pages neither skip nor repeat"""
+    repository = _repository(repository_class, tmp_path)
+    started = datetime(2026, 10, 1)
+    commands = []
+    for index in range(12):
+        command = Command.create_new_command(f"client-{index % 2}", f"echo {index}")
+        command.created_at = started + timedelta(minutes=index)
+        if index % 3 == 0:
+            command.mark_as_processing()
+        commands.append(command)
+    await repository.save_commands(commands)
+
+    expected = [command.command_id for command in commands if command.target_client_id == "client-0"][::-1]
+    pages, query = [], CommandQuery(target_client_id="client-0", descending=True, limit=4)
+    while True:
+        page = await repository.query_commands(query)
+        pages.append([command.command_id for command in page])
+        if len(page) < query.limit:
+            break
+        query.after = CommandQuery.command_key(page[-1])
+    assert [command_id for page in pages for command_id in page] == expected
+
+    pending_since = await repository.query_commands(CommandQuery(
+        status="pending", created_since=started + timedelta(minutes=6)
+    ))
+    assert [command.content for command in pending_since] == ["echo 7", "echo 8", "echo 10", "echo 11"]
+    await repository.close()
+
+
+@pytest.mark.parametrize("repository_class", [
+    InMemoryCommandRepository, FileBasedCommandRepository, SqliteCommandRepository
+])
+async def test_iter_commands_yields_every_match_in_batches(tmp_path, repository_class):
+    """Business Rule: Export iterates the whole history without materializing it at once"""
+    repository = _repository(repository_class, tmp_path)
+    commands = [Command.create_new_command("export-client", f"echo {index}") for index in range(7)]
+    await repository.save_commands(commands)
+
+    batches = [batch async for batch in repository.iter_commands(CommandQuery(), batch_size=3)]
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [command.command_id for batch in batches for command in batch] == [c.command_id for c in commands]
+    await repository.close()
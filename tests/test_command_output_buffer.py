@@ -0,0 +1,35 @@
+from brief_bridge.services.command_output import CommandOutputBuffer
+
+
+def test_live_output_drops_oldest_chunks_beyond_retention_limit():
+    """Business Rule: Live output per command is bounded; readers learn that older chunks were dropped"""
+    buffer = CommandOutputBuffer(max_retained_bytes=10)
+    for sequence in range(4):
+        buffer.append("command-1", sequence, "abcd")
+
+    output = buffer.read_since("command-1")
+    assert [chunk.sequence for chunk in output.chunks] == [2, 3]
+    assert output.truncated is True
+    assert output.next_since == 3
+    assert buffer.read_since("command-1", since=2).truncated is False
+
+
+def test_live_output_retention_limit_counts_encoded_bytes():
+    """Business Rule: The retention limit is in bytes, so multi-byte characters count fully"""
+    buffer = CommandOutputBuffer(max_retained_bytes=10)
+    for sequence in range(3):
+        buffer.append("command-1", sequence, "ééé")
+
+    assert [chunk.sequence for chunk in buffer.read_since("command-1").chunks] == [2]
+
+
+def test_live_output_tracks_a_bounded_number_of_commands():
+    """Business Rule: The least recently written command output is evicted first"""
+    buffer = CommandOutputBuffer(max_tracked_commands=2)
+    buffer.append("command-1", 0, "a")
+    buffer.append("command-2", 0, "b")
+    buffer.append("command-1", 1, "c")
+    buffer.append("command-3", 0, "d")
+
+    assert buffer.last_sequence("command-2") is None
+    assert buffer.last_sequence("command-1") == 1
@@ -0,0 +1,56 @@
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.blob_store import BlobStore
+from brief_bridge.repositories.command_repository import (
+    FileBasedCommandRepository, SqliteCommandRepository, WriteAheadLogCommandRepository
+)
+
+
+@pytest.mark.parametrize("repository_class", [
+    FileBasedCommandRepository, WriteAheadLogCommandRepository, SqliteCommandRepository
+])
+async def test_large_result_is_stored_outside_the_command_record(tmp_path, repository_class):
+    """Business Rule: Results above the blob threshold keep only reference, size and hash in the record"""
+    repository = repository_class(data_dir=str(tmp_path), blob_threshold=100)
+    large_output = "build line\n" * 1000
+    command = Command.create_new_command("blob-client", "make")
+    command.mark_as_processing()
+    command.mark_as_completed(large_output, 3.5)
+    await repository.save_command(command)
+    await repository.close()
+
+    restarted = repository_class(data_dir=str(tmp_path), blob_threshold=100)
+    stored = await restarted.find_command_by_id(command.command_id)
+    assert stored.result is None
+    assert stored.result_size == len(large_output)
+    assert await restarted.load_result(stored) == large_output
+    await restarted.close()
+
+
+async def test_small_results_stay_inline(tmp_path):
+    """Business Rule: Results below the threshold remain in commands.json and need no blob read"""
+    repository = FileBasedCommandRepository(data_dir=str(tmp_path), blob_threshold=100)
+    small, large = (Command.create_new_command("blob-client", "echo") for _ in range(2))
+    for command, output in ((small, "ok"), (large, "x" * 500)):
+        command.mark_as_processing()
+        command.mark_as_completed(output, 0.1)
+    await repository.save_commands([small, large])
+
+    records = json.loads((tmp_path / "commands.json").read_text(encoding="utf-8"))
+    assert records[small.command_id]["result"] == "ok"
+    assert records[large.command_id]["result"] is None
+    assert len(list((tmp_path / "blobs").rglob("*.lines"))) == 1  # one blob (with its line index)
+
+
+def test_concurrent_puts_of_the_same_output_all_succeed(tmp_path):
+    """Business Rule: Identical outputs stored at the same time (batch fan-out) share one blob without errors"""
+    blob_store = BlobStore(tmp_path / "blobs")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for trial in range(20):
+            content = f"fan-out output {trial}\n" * 2000
+            references = list(pool.map(lambda _: blob_store.put(content), range(4)))
+            assert len({reference.ref for reference in references}) == 1
+            assert blob_store.get(references[0].ref, references[0].sha256) == content
+    assert list((tmp_path / "blobs").rglob("*.tmp")) == []
@@ -0,0 +1,34 @@
+import pytest
+from brief_bridge.entities.result_slice import ResultRange, slice_text
+from brief_bridge.repositories.blob_store import BlobStore
+
+LOG = "".join(f"step {index} ✓ done\n" for index in range(500))
+
+
+@pytest.mark.parametrize("result_range", [
+    ResultRange(tail_lines=3),
+    ResultRange(tail_lines=1000),
+    ResultRange(offset=17, length=40),
+    ResultRange(offset=len(LOG) - 5),
+    ResultRange(offset=len(LOG) + 10, length=5),
+    ResultRange(tail_lines=2, length=10),
+])
+@pytest.mark.parametrize("compression_level", [0, 6])
+def test_blob_slices_match_inline_slices(tmp_path, result_range, compression_level):
+    """Business Rule: Indexed blob reads return exactly what slicing the full result would"""
+    store = BlobStore(tmp_path, compression_level)
+    reference = store.put(LOG)
+
+    blob_slice = store.read_slice(reference.ref, result_range)
+    inline_slice = slice_text(LOG, result_range)
+
+    assert blob_slice == inline_slice
+    assert blob_slice.total_length == len(LOG)
+
+
+def test_tail_lines_returns_last_lines_without_trailing_empty_line():
+    """Business Rule: tail_lines counts output lines; a final newline does not add an empty one"""
+    result_slice = slice_text("one\ntwo\nthree\n", ResultRange(tail_lines=2))
+    assert result_slice.content == "two\nthree\n"
+    assert result_slice.offset == 4
+    assert result_slice.truncated
@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime, timedelta
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.command_archive import CommandArchive
+from brief_bridge.repositories.command_repository import (
+    InMemoryCommandRepository, FileBasedCommandRepository, WriteAheadLogCommandRepository
+)
+from brief_bridge.use_cases.command_retention_use_case import CommandRetentionUseCase
+
+
+def _finished_command(client_id: str, completed_at: datetime, output: str = "ok") -> Command:
+    command = Command.create_new_command(client_id, "echo")
+    command.mark_as_processing()
+    command.mark_as_completed(output, 0.1)
+    command.completed_at = completed_at
+    return command
+
+
+async def test_commands_beyond_retention_limits_move_to_the_archive(tmp_path):
+    """Business Rule: Old, surplus-per-client and over-budget finished commands are archived; live work stays"""
+    repository = InMemoryCommandRepository()
+    archive = CommandArchive(data_dir=str(tmp_path))
+    retention = CommandRetentionUseCase(repository, archive, max_age_days=7, max_per_client=2, max_total_bytes=10_000)
+    now = datetime(2026, 10, 17, 12, 0)
+
+    old = _finished_command("client-a", now - timedelta(days=8))
+    recent = [_finished_command("client-a", now - timedelta(hours=hours)) for hours in (1, 2, 3)]
+    large = _finished_command("client-b", now - timedelta(hours=4), output="x" * 20_000)
+    pending = Command.create_new_command("client-a", "echo pending")
+    await repository.save_commands([old, *recent, large, pending])
+
+    archived = await retention.apply_retention(now)
+
+    assert {command.command_id for command in archived} == {old.command_id, recent[2].command_id, large.command_id}
+    remaining = {command.command_id for command in await repository.get_all_commands()}
+    assert remaining == {recent[0].command_id, recent[1].command_id, pending.command_id}
+
+    assert await archive.list_days() == ["2026-10-17", "2026-10-09"]
+    assert [command.command_id for command in await archive.get_commands_for_day("2026-10-09")] == [old.command_id]
+    assert (await archive.find_command_by_id(large.command_id)).result == "x" * 20_000
+
+
+async def test_blob_results_count_towards_the_budget_and_leave_with_their_commands(tmp_path):
+    """Business Rule: Large results stored as blobs are bounded by the byte budget and archived inline"""
+    repository = FileBasedCommandRepository(data_dir=str(tmp_path), blob_threshold=100)
+    archive = CommandArchive(data_dir=str(tmp_path))
+    retention = CommandRetentionUseCase(repository, archive, max_age_days=0, max_per_client=0, max_total_bytes=5_000)
+    now = datetime(2026, 10, 17, 12, 0)
+
+    pruned = _finished_command("client-a", now - timedelta(hours=3), output="a" * 4_000)
+    shared = [_finished_command("client-a", now - timedelta(hours=hours), output="b" * 1_000) for hours in (2, 1)]
+    await repository.save_commands([pruned, *shared])
+    blobs = lambda: {path.name.split(".")[0] for path in (tmp_path / "blobs").rglob("*") if path.is_file()}
+    assert len(blobs()) == 2  # the identical results share one blob
+
+    archived = await retention.apply_retention(now)
+
+    assert [command.command_id for command in archived] == [pruned.command_id]
+    assert (await archive.find_command_by_id(pruned.command_id)).result == "a" * 4_000
+    assert len(blobs()) == 1
+    assert await repository.load_result(await repository.find_command_by_id(shared[0].command_id)) == "b" * 1_000
+
+
+@pytest.mark.parametrize("repository_class", [InMemoryCommandRepository, WriteAheadLogCommandRepository])
+async def test_deleted_pending_commands_leave_the_dispatch_queue(tmp_path, repository_class):
+    """Business Rule: A deleted command is never handed to its client"""
+    if repository_class is InMemoryCommandRepository:
+        repository = repository_class()
+    else:
+        repository = repository_class(data_dir=str(tmp_path))
+    deleted, kept = Command.create_new_command("queue-client", "echo 1"), Command.create_new_command("queue-client", "echo 2")
+    await repository.save_commands([deleted, kept])
+
+    await repository.delete_commands([deleted.command_id])
+
+    assert [command.command_id for command in await repository.get_pending_commands_for_client("queue-client")] == [kept.command_id]
+    assert (await repository.get_next_pending_command_for_client("queue-client")).command_id == kept.command_id
+
+
+async def test_deleted_commands_stay_deleted_after_write_ahead_log_replay(tmp_path):
+    """Business Rule: Archiving is durable; a restart does not resurrect removed commands"""
+    repository = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    kept, removed = Command.create_new_command("wal-client", "echo 1"), Command.create_new_command("wal-client", "echo 2")
+    await repository.save_commands([kept, removed])
+    await repository.delete_commands([removed.command_id])
+
+    restarted = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    assert await restarted.find_command_by_id(removed.command_id) is None
+    assert await restarted.find_command_by_id(kept.command_id) is not None
+
+
+async def test_archive_lookup_by_id_reads_only_the_indexed_segment(tmp_path):
+    """Business Rule: Finding an archived command costs one segment read; an unknown ID costs none"""
+    archive = CommandArchive(data_dir=str(tmp_path))
+    now = datetime(2026, 10, 17, 12, 0)
+    commands = [_finished_command("client-a", now - timedelta(days=days)) for days in range(5)]
+    for command in commands:
+        await archive.archive_commands([command])
+
+    restarted = CommandArchive(data_dir=str(tmp_path))
+    read_segments = []
+    read_segment = restarted._read_segment
+    restarted._read_segment = lambda segment_file: read_segments.append(segment_file) or read_segment(segment_file)
+
+    assert await restarted.find_command_by_id("unknown-command") is None
+    assert read_segments == []
+    assert (await restarted.find_command_by_id(commands[3].command_id)).command_id == commands[3].command_id
+    assert len(read_segments) == 1
+
+    # Archives written before the index existed are indexed on first lookup
+    (tmp_path / "archive" / "index.tsv").unlink()
+    legacy = CommandArchive(data_dir=str(tmp_path))
+    assert (await legacy.find_command_by_id(commands[1].command_id)).command_id == commands[1].command_id
+    assert (tmp_path / "archive" / "index.tsv").exists()
@@ -0,0 +1,52 @@
+import json
+from brief_bridge.entities.client import Client
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.client_repository import FileBasedClientRepository
+from brief_bridge.repositories.command_repository import FileBasedCommandRepository
+
+
+async def test_reads_are_served_from_memory_after_first_load(tmp_path):
+    """Business Rule: The file is parsed once; later lookups do not touch the disk"""
+    repository = FileBasedCommandRepository(data_dir=str(tmp_path))
+    command = await repository.save_command(Command.create_new_command("cache-client", "echo 'cached'"))
+    assert json.loads((tmp_path / "commands.json").read_text(encoding="utf-8"))[command.command_id]
+
+    (tmp_path / "commands.json").unlink()
+    restored = await repository.find_command_by_id(command.command_id)
+    assert restored.content == "echo 'cached'"
+    assert restored is not command  # Callers get their own copy, as with a file read
+
+
+async def test_deferred_writes_are_flushed_on_close(tmp_path):
+    """Business Rule: With a flush interval saves return before the rewrite; shutdown writes them"""
+    commands = FileBasedCommandRepository(data_dir=str(tmp_path), flush_interval=60.0)
+    clients = FileBasedClientRepository(data_dir=str(tmp_path), flush_interval=60.0)
+    await commands.start()
+    await clients.start()
+    command = await commands.save_command(Command.create_new_command("deferred-client", "echo 'later'"))
+    await clients.save_registered_client(Client.register_new_client("deferred-client"))
+    assert not (tmp_path / "commands.json").exists()
+
+    await commands.close()
+    await clients.close()
+
+    restarted = FileBasedCommandRepository(data_dir=str(tmp_path))
+    assert (await restarted.find_command_by_id(command.command_id)).content == "echo 'later'"
+    assert await FileBasedClientRepository(data_dir=str(tmp_path)).find_client_by_id("deferred-client")
+
+
+async def test_concurrent_saves_share_one_file_rewrite(tmp_path):
+    """Business Rule: A burst of saves is group-committed; every save returns only once it is on disk"""
+    import asyncio
+
+    repository = FileBasedCommandRepository(data_dir=str(tmp_path))
+    rewrites = []
+    write_file = repository._store._write_file
+    repository._store._write_file = lambda records: (rewrites.append(len(records)), write_file(records))
+
+    commands = [Command.create_new_command(f"burst-client-{index}", "echo 'burst'") for index in range(40)]
+    await asyncio.gather(*[repository.save_command(command) for command in commands])
+
+    assert len(rewrites) < 5
+    stored = json.loads((tmp_path / "commands.json").read_text(encoding="utf-8"))
+    assert set(stored) == {command.command_id for command in commands}
@@ -0,0 +1,34 @@
+from brief_bridge.services.poll_pacing import PollPacer
+
+
+def test_busy_clients_poll_sooner_than_idle_ones():
+    """Business Rule: The poll hint shrinks with a client's recent command rate and grows back when idle"""
+    pacer = PollPacer(max_delay=30, load_target=100)
+    for second in range(10):
+        pacer.record_command_delivered("busy", now=float(second))
+
+    assert pacer.next_poll_after("idle", queue_depth=0, now=10.0) == 30
+    assert pacer.next_poll_after("busy", queue_depth=3, now=10.0) == 0
+    assert pacer.next_poll_after("busy", queue_depth=0, now=10.0) < 1
+    assert pacer.next_poll_after("busy", queue_depth=0, now=600.0) == 30
+
+
+def test_poll_hints_stretch_while_the_server_is_overloaded():
+    """Business Rule: More polls in flight than the load target lengthen every hint, up to the shedding cap"""
+    pacer = PollPacer(max_delay=10, load_target=2)
+    pacer.record_command_delivered("client", now=0.0)
+    normal = pacer.next_poll_after("client", queue_depth=0, now=0.0)
+
+    with pacer.tracking_poll(), pacer.tracking_poll(), pacer.tracking_poll(), pacer.tracking_poll():
+        assert pacer.next_poll_after("client", queue_depth=0, now=0.0) == 2 * normal
+        assert pacer.next_poll_after("idle", queue_depth=0, now=0.0) == 20
+    assert pacer.next_poll_after("client", queue_depth=0, now=0.0) == normal
+
+
+def test_long_polling_clients_re_arm_at_once_unless_load_is_shed():
+    """Business Rule: An empty long poll is followed by the next one right away; only overload spaces them out"""
+    pacer = PollPacer(max_delay=30, load_target=2)
+
+    assert pacer.next_poll_after("idle", queue_depth=0, long_polled=True, now=0.0) == 0
+    with pacer.tracking_poll(), pacer.tracking_poll(), pacer.tracking_poll(), pacer.tracking_poll():
+        assert pacer.next_poll_after("idle", queue_depth=0, long_polled=True, now=0.0) == 60
@@ -1,8 +1,10 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from fastapi.testclient import TestClient
 from brief_bridge.main import app
-from brief_bridge.web.dependencies import get_client_repository
+from brief_bridge.web.dependencies import get_client_repository, get_client_presence_table
 from brief_bridge.repositories.client_repository import ClientRepository, InMemoryClientRepository
+from brief_bridge.services.client_presence import ClientPresenceTable
 
 
 @pytest.fixture
@@ -86,4 +88,16 @@ def test_system_health_and_api_availability(client):
     assert response_data["service"] == "Brief Bridge"
     assert response_data["status"] == "active"
     assert "documentation" in response_data
-    assert "prompts.md" in response_data["documentation"]["comprehensive_guide"]
\ No newline at end of file
+    assert "prompts.md" in response_data["documentation"]["comprehensive_guide"]
+
+
+def test_registered_client_that_never_polls_goes_offline(client):
+    """Business Rule: Registration starts the offline deadline, so a client that never polls is not online forever"""
+    table = ClientPresenceTable(offline_threshold=60)
+    app.dependency_overrides[get_client_presence_table] = lambda: table
+
+    client.post("/clients/register", json={"client_id": "silent-client"})
+    assert table.next_deadline() is not None
+    assert table.expire_due(datetime.now(timezone.utc) + timedelta(seconds=61)) == ["silent-client"]
+
+    assert client.get("/clients/silent-client").json()["status"] == "offline"
@@ -0,0 +1,45 @@
+import json
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.blob_store import BlobStore
+from brief_bridge.repositories.command_repository import FileBasedCommandRepository, SqliteCommandRepository
+
+OUTPUT = "".join(f"PASS tests/test_module_{index % 7}.py::test_case\n" for index in range(1000))
+
+
+async def test_results_are_compressed_on_disk_and_read_back_transparently(tmp_path):
+    """Business Rule: Stored results are zlib-compressed; callers still see the plain text"""
+    repository = FileBasedCommandRepository(data_dir=str(tmp_path), compression_level=6)
+    command = Command.create_new_command("compress-client", "pytest")
+    command.mark_as_processing()
+    command.mark_as_completed(OUTPUT, 1.0)
+    await repository.save_command(command)
+
+    record = json.loads((tmp_path / "commands.json").read_text(encoding="utf-8"))[command.command_id]
+    assert record["result_encoding"] == "zlib"
+    assert len(record["result"]) * 5 < len(OUTPUT)
+    restarted = FileBasedCommandRepository(data_dir=str(tmp_path), compression_level=0)
+    assert (await restarted.find_command_by_id(command.command_id)).result == OUTPUT
+
+
+async def test_sqlite_reads_results_written_with_another_level(tmp_path):
+    """Business Rule: Changing the level affects new writes only; older results stay readable"""
+    command = Command.create_new_command("compress-client", "pytest")
+    command.mark_as_processing()
+    command.mark_as_completed(OUTPUT, 1.0)
+    repository = SqliteCommandRepository(data_dir=str(tmp_path), compression_level=9)
+    await repository.save_command(command)
+    await repository.close()
+
+    restarted = SqliteCommandRepository(data_dir=str(tmp_path), compression_level=0)
+    assert (await restarted.find_command_by_id(command.command_id)).result == OUTPUT
+    await restarted.close()
+
+
+def test_compressed_blob_round_trips_and_stays_small(tmp_path):
+    """Business Rule: Large outputs are stored as compressed frames and verified on read"""
+    store = BlobStore(tmp_path, compression_level=6)
+    large_output = OUTPUT * 20
+    reference = store.put(large_output)
+
+    assert (tmp_path / f"{reference.ref}.z").stat().st_size * 10 < reference.size
+    assert store.get(reference.ref, reference.sha256) == large_output
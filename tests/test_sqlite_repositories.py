@@ -0,0 +1,53 @@
+from datetime import datetime, timezone, timedelta
+from brief_bridge.entities.client import Client
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.client_repository import SqliteClientRepository
+from brief_bridge.repositories.command_repository import SqliteCommandRepository
+
+
+async def test_pending_commands_are_returned_in_creation_order(tmp_path):
+    """Business Rule: Dispatch returns only pending commands for the client, oldest first"""
+    repository = SqliteCommandRepository(data_dir=str(tmp_path))
+    base_time = datetime.utcnow()
+    commands = []
+    for offset in (2, 0, 1):
+        command = Command.create_new_command(target_client_id="sqlite-client", content=f"echo {offset}")
+        command.created_at = base_time + timedelta(seconds=offset)
+        commands.append(await repository.save_command(command))
+    other = Command.create_new_command(target_client_id="other-client", content="echo other")
+    await repository.save_command(other)
+
+    commands[1].mark_as_processing()
+    await repository.save_command(commands[1])
+
+    pending = await repository.get_pending_commands_for_client("sqlite-client")
+    assert [cmd.content for cmd in pending] == ["echo 1", "echo 2"]
+    history = await repository.find_commands_by_client_id("sqlite-client")
+    assert [cmd.content for cmd in history] == ["echo 0", "echo 1", "echo 2"]
+    assert (await repository.find_command_by_id(commands[1].command_id)).status == "processing"
+
+
+async def test_dispatch_query_uses_index(tmp_path):
+    """Business Rule: Pending lookups are served by the dispatch index instead of a table scan"""
+    repository = SqliteCommandRepository(data_dir=str(tmp_path))
+    plan = repository._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT command_id FROM commands "
+        "WHERE target_client_id = ? AND status = 'pending' ORDER BY created_at",
+        ("sqlite-client",)
+    ).fetchall()
+    assert any("idx_commands_dispatch" in row[-1] for row in plan)
+
+
+async def test_client_status_and_last_seen_round_trip(tmp_path):
+    """Business Rule: Stored client status and last_seen are restored from the database"""
+    repository = SqliteClientRepository(data_dir=str(tmp_path))
+    last_seen = datetime.now(timezone.utc) - timedelta(minutes=5)
+    await repository.save_registered_client(
+        Client(client_id="sqlite-client", name="SQLite Client", status="offline", last_seen=last_seen)
+    )
+
+    reopened = SqliteClientRepository(data_dir=str(tmp_path))
+    client = await reopened.find_client_by_id("sqlite-client")
+    assert client.status == "offline"
+    assert client.last_seen == last_seen
+    assert [c.client_id for c in await reopened.get_all_registered_clients()] == ["sqlite-client"]
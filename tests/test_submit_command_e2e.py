@@ -1,9 +1,16 @@
+import asyncio
+import json
+import threading
+import time
 import pytest
+from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
+from brief_bridge.entities.command import Command
 from brief_bridge.main import app
 from brief_bridge.web.dependencies import get_client_repository, get_command_repository
 from brief_bridge.repositories.client_repository import ClientRepository, InMemoryClientRepository
 from brief_bridge.repositories.command_repository import CommandRepository, InMemoryCommandRepository
+from brief_bridge.use_cases.command_lease_use_case import CommandLeaseUseCase
 
 
 @pytest.fixture
@@ -106,3 +113,281 @@ def test_get_commands_for_nonexistent_client_returns_empty_list(client):
     assert len(commands) == 0
 
 
+def test_client_receives_pending_commands_in_creation_order(client, test_command_repository):
+    """Business Rule: Polling dispatches the oldest pending command first, one at a time"""
+    queued = []
+    for index in range(3):
+        command = Command.create_new_command(target_client_id="fifo-client", content=f"echo {index}")
+        asyncio.run(test_command_repository.save_command(command))
+        queued.append(command.command_id)
+
+    dispatched = []
+    hints = []
+    for _ in range(3):
+        poll_response = client.post("/commands/poll", json={"client_id": "fifo-client"})
+        assert poll_response.status_code == 200
+        dispatched.append(poll_response.json()["command_id"])
+        hints.append(poll_response.json()["next_poll_after"])
+
+    assert dispatched == queued
+    # Business Rule: a client with more commands queued is told to poll again at once
+    assert hints[:2] == [0.0, 0.0] and hints[2] > 0
+    assert "command_id" not in client.post("/commands/poll", json={"client_id": "fifo-client"}).json()
+
+
+def test_long_poll_returns_as_soon_as_command_is_queued(client):
+    """Business Rule: A waiting poll is released by command submission instead of the poll interval"""
+    client.post("/clients/register", json={"client_id": "long-poll-client", "name": "Long Poll Client"})
+    poll_outcome = {}
+
+    def long_poll_and_report():
+        started = time.monotonic()
+        poll_response = client.post("/commands/poll", json={"client_id": "long-poll-client", "wait": 10})
+        poll_outcome["elapsed"] = time.monotonic() - started
+        command = poll_response.json()
+        poll_outcome["command"] = command
+        client.post("/commands/result", json={"command_id": command["command_id"], "output": "long-polled"})
+
+    poller = threading.Thread(target=long_poll_and_report)
+    poller.start()
+    time.sleep(0.3)  # Let the poll park on the server first
+
+    submit_response = client.post("/commands/submit", json={
+        "target_client_id": "long-poll-client",
+        "command_content": "echo 'long-polled'"
+    })
+    poller.join(timeout=5)
+
+    assert poll_outcome["command"]["command_content"] == "echo 'long-polled'"
+    assert poll_outcome["elapsed"] < 5
+    assert submit_response.json()["result"] == "long-polled"
+
+
+def test_long_poll_without_commands_returns_empty_after_wait(client):
+    """Business Rule: An idle long poll ends with an empty response once the wait expires"""
+    started = time.monotonic()
+    response = client.post("/commands/poll", json={"client_id": "idle-client", "wait": 0.3})
+
+    assert response.status_code == 200
+    assert "command_id" not in response.json()
+    # The client re-arms the long poll at once instead of backing off
+    assert response.json()["next_poll_after"] == 0
+    assert time.monotonic() - started >= 0.3
+
+
+def test_non_blocking_submit_returns_202_and_result_is_collected_via_wait(client):
+    """Business Rule: wait=false queues the command immediately; /wait collects its result later"""
+    client.post("/clients/register", json={"client_id": "async-client", "name": "Async Client"})
+
+    submit_response = client.post("/commands/submit?wait=false", json={
+        "target_client_id": "async-client",
+        "command_content": "echo 'async'"
+    })
+    assert submit_response.status_code == 202
+    submit_data = submit_response.json()
+    assert submit_data["submission_successful"] is True
+    command_id = submit_data["command_id"]
+
+    # Not picked up yet: a short wait returns the command still pending
+    pending_view = client.get(f"/commands/{command_id}/wait?timeout=0.1")
+    assert pending_view.status_code == 200
+    assert pending_view.json()["status"] == "pending"
+
+    polled = client.post("/commands/poll", json={"client_id": "async-client"}).json()
+    client.post("/commands/result", json={"command_id": polled["command_id"], "output": "async"})
+
+    completed_view = client.get(f"/commands/{command_id}/wait?timeout=5")
+    assert completed_view.json()["status"] == "completed"
+    assert completed_view.json()["result"] == "async"
+
+
+def test_non_blocking_submit_validation_failure_is_not_accepted(client):
+    """Business Rule: Business validation failures are reported without 202"""
+    response = client.post("/commands/submit?wait=false", json={
+        "target_client_id": "nonexistent-client",
+        "command_content": "echo 'x'"
+    })
+    assert response.status_code == 200
+    assert response.json()["submission_message"] == "Target client not found"
+    assert client.get("/commands/unknown-command/wait?timeout=0").status_code == 404
+
+
+def test_running_command_output_can_be_tailed_before_result(client):
+    """Business Rule: Output uploaded while a command runs is readable incrementally; re-sent chunks are ignored"""
+    client.post("/clients/register", json={"client_id": "streaming-client", "name": "Streaming Client"})
+    command_id = client.post("/commands/submit?wait=false", json={
+        "target_client_id": "streaming-client",
+        "command_content": "make build"
+    }).json()["command_id"]
+    # Output before the command was picked up is refused
+    assert client.post(f"/commands/{command_id}/output", json={"sequence": 0, "data": "early"}).status_code == 409
+    client.post("/commands/poll", json={"client_id": "streaming-client"})
+
+    assert client.post(f"/commands/{command_id}/output", json={"sequence": 0, "data": "step 1\n"}).json()["accepted"] is True
+    assert client.post(f"/commands/{command_id}/output", json={"sequence": 0, "data": "step 1\n"}).json()["accepted"] is False
+    client.post(f"/commands/{command_id}/output", json={"sequence": 1, "data": "step 2\n"})
+
+    first_read = client.get(f"/commands/{command_id}/output").json()
+    assert first_read["status"] == "processing"
+    assert [chunk["data"] for chunk in first_read["chunks"]] == ["step 1\n", "step 2\n"]
+
+    # Tail from the last seen sequence: nothing new yet
+    tail = client.get(f"/commands/{command_id}/output?since={first_read['next_since']}&wait=0.1").json()
+    assert tail["chunks"] == []
+
+    client.post("/commands/result", json={"command_id": command_id, "output": "step 1\nstep 2"})
+    # Live output is dropped once the result carries the complete output
+    finished = client.get(f"/commands/{command_id}/output").json()
+    assert (finished["status"], finished["chunks"]) == ("completed", [])
+    late_chunk = client.post(f"/commands/{command_id}/output", json={"sequence": 2, "data": "late"})
+    assert late_chunk.status_code == 409
+    assert client.get("/commands/unknown-command/output").status_code == 404
+
+
+def test_heartbeat_renews_lease_of_processing_command_only(client):
+    """Business Rule: Heartbeats extend the lease of a dispatched command and are refused once it is finished"""
+    client.post("/clients/register", json={"client_id": "heartbeat-client", "name": "Heartbeat Client"})
+    client.post("/commands/submit?wait=false", json={
+        "target_client_id": "heartbeat-client",
+        "command_content": "sleep 60"
+    })
+    polled = client.post("/commands/poll", json={"client_id": "heartbeat-client", "lease": True}).json()
+    assert polled["lease_seconds"] > 0
+
+    heartbeat = client.post(f"/commands/{polled['command_id']}/heartbeat")
+    assert heartbeat.status_code == 200
+    assert heartbeat.json()["lease_expires_at"]
+
+    client.post("/commands/result", json={"command_id": polled["command_id"], "output": "done"})
+    assert client.post(f"/commands/{polled['command_id']}/heartbeat").status_code == 409
+    assert client.post("/commands/unknown-command/heartbeat").status_code == 404
+
+
+def test_result_of_a_lapsed_delivery_is_refused(client, test_command_repository):
+    """Business Rule: Only the delivery a command is processing may report its result, and only once"""
+    client.post("/clients/register", json={"client_id": "late-client"})
+    command_id = client.post("/commands/submit?wait=false", json={
+        "target_client_id": "late-client",
+        "command_content": "sleep 60"
+    }).json()["command_id"]
+    first = client.post("/commands/poll", json={"client_id": "late-client", "lease": True}).json()
+    after_lease = datetime.utcnow() + timedelta(seconds=first["lease_seconds"] + 1)
+    asyncio.run(CommandLeaseUseCase(test_command_repository, max_delivery_attempts=2).sweep_expired_leases(after_lease))
+    second = client.post("/commands/poll", json={"client_id": "late-client", "lease": True}).json()
+    assert (first["delivery_attempt"], second["delivery_attempt"]) == (1, 2)
+
+    late = client.post("/commands/result", json={"command_id": command_id, "output": "first", "delivery_attempt": 1})
+    assert late.status_code == 409
+    current = client.post("/commands/result", json={"command_id": command_id, "output": "second", "delivery_attempt": 2})
+    assert current.status_code == 200
+    assert client.post("/commands/result", json={"command_id": command_id, "output": "again"}).status_code == 409
+    batch = client.post("/commands/result/batch", json={"results": [{"command_id": command_id, "output": "again"}]}).json()
+    assert (batch["accepted_count"], batch["rejected_command_ids"]) == (0, [command_id])
+    assert client.get(f"/commands/{command_id}").json()["result"] == "second"
+
+
+def test_get_command_returns_only_requested_part_of_result(client):
+    """API: tail_lines and offset/length cut long results down to the part the caller needs"""
+    client.post("/clients/register", json={"client_id": "range-client"})
+    command_id = client.post("/commands/submit?wait=false", json={
+        "target_client_id": "range-client",
+        "command_content": "make"
+    }).json()["command_id"]
+    client.post("/commands/poll", json={"client_id": "range-client"})
+    client.post("/commands/result", json={"command_id": command_id, "output": "a\nb\nc\nd\n"})
+
+    tail = client.get(f"/commands/{command_id}?tail_lines=2").json()
+    assert tail["result"] == "c\nd\n"
+    assert (tail["result_offset"], tail["result_total_length"]) == (4, 8)
+
+    assert client.get(f"/commands/{command_id}?offset=2&length=3").json()["result"] == "b\nc"
+    assert client.get(f"/commands/{command_id}").json()["result_total_length"] is None
+
+
+def test_list_commands_pages_with_cursor_header_and_projection(client):
+    """API: limit returns one page and X-Next-Cursor; fields drops content and result"""
+    client.post("/clients/register", json={"client_id": "list-client"})
+    for index in range(3):
+        client.post("/commands/submit?wait=false", json={
+            "target_client_id": "list-client",
+            "command_content": f"echo {index}"
+        })
+
+    first_page = client.get("/commands/?target_client_id=list-client&limit=2")
+    assert [command["content"] for command in first_page.json()] == ["echo 0", "echo 1"]
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    last_page = client.get(f"/commands/?target_client_id=list-client&limit=2&cursor={cursor}&fields=status")
+    assert last_page.json() == [{"command_id": last_page.json()[0]["command_id"], "status": "pending"}]
+    assert "X-Next-Cursor" not in last_page.headers
+    assert client.get("/commands/?fields=secret").status_code == 400
+
+
+def test_export_streams_filtered_history_as_ndjson(client):
+    """API: /commands/export yields one command per line, optionally gzip-encoded"""
+    client.post("/clients/register", json={"client_id": "export-client"})
+    for index in range(3):
+        client.post("/commands/submit?wait=false", json={
+            "target_client_id": "export-client",
+            "command_content": f"echo {index}"
+        })
+
+    plain = client.get("/commands/export?target_client_id=export-client")
+    assert plain.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["content"] for line in plain.text.splitlines()] == ["echo 0", "echo 1", "echo 2"]
+
+    compressed = client.get("/commands/export?target_client_id=export-client&compress=true")
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.text == plain.text  # decoded transparently by the HTTP client
+
+
+def test_poll_with_unchanged_queue_version_skips_the_repository(client, test_command_repository):
+    """Business Rule: An idle client sending back its queue_version is answered without a queue lookup"""
+    client.post("/clients/register", json={"client_id": "versioned-client"})
+    lookups = []
+    find_next = test_command_repository.get_next_pending_command_for_client
+
+    async def counting_find_next(client_id):
+        lookups.append(client_id)
+        return await find_next(client_id)
+
+    test_command_repository.get_next_pending_command_for_client = counting_find_next
+
+    version = client.post("/commands/poll", json={"client_id": "versioned-client"}).json()["queue_version"]
+    for _ in range(5):
+        idle_poll = client.post("/commands/poll", json={"client_id": "versioned-client", "queue_version": version}).json()
+        assert idle_poll["queue_version"] == version
+    assert len(lookups) == 1
+
+    client.post("/commands/submit?wait=false", json={"target_client_id": "versioned-client", "command_content": "echo new"})
+    poll = client.post("/commands/poll", json={"client_id": "versioned-client", "queue_version": version}).json()
+    assert poll["command_content"] == "echo new"
+    assert poll["queue_version"] != version
+    assert len(lookups) == 2
+
+
+def test_client_fetches_a_backlog_and_reports_results_in_one_round_trip_each(client):
+    """Business Rule: max_commands hands out several queued commands; their results go back in one batch"""
+    client.post("/clients/register", json={"client_id": "backlog-client"})
+    queued = [
+        client.post("/commands/submit?wait=false", json={"target_client_id": "backlog-client", "command_content": f"echo {index}"}).json()["command_id"]
+        for index in range(3)
+    ]
+
+    first = client.post("/commands/poll", json={"client_id": "backlog-client", "max_commands": 2, "lease": True}).json()
+    assert [command["command_id"] for command in first["commands"]] == queued[:2]
+    assert first["next_poll_after"] == 0.0 and "queue_version" not in first
+    rest = client.post("/commands/poll", json={"client_id": "backlog-client", "max_commands": 2}).json()
+    assert [command["command_id"] for command in rest["commands"]] == queued[2:]
+
+    response = client.post("/commands/result/batch", json={"results": [
+        {"command_id": command_id, "output": f"done {command_id}"} for command_id in queued
+    ] + [{"command_id": "no-such-command", "output": "lost"}]})
+
+    assert response.status_code == 200
+    assert response.json()["accepted_count"] == 3
+    assert response.json()["unknown_command_ids"] == ["no-such-command"]
+    for command_id in queued:
+        command = client.get(f"/commands/{command_id}").json()
+        assert (command["status"], command["result"]) == ("completed", f"done {command_id}")
+    assert client.post("/commands/poll", json={"client_id": "backlog-client", "max_commands": 2}).json()["commands"] == []
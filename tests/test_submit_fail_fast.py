@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from brief_bridge.entities.client import Client
+from brief_bridge.repositories.client_repository import InMemoryClientRepository
+from brief_bridge.repositories.command_repository import InMemoryCommandRepository
+from brief_bridge.services.client_presence import ClientPresenceTable
+from brief_bridge.services.command_events import CommandEventBus
+from brief_bridge.services.poll_pacing import PollPacer
+from brief_bridge.use_cases.submit_command_use_case import SubmitCommandUseCase, CommandSubmissionRequest
+
+
+async def _use_case_with_client(last_seen_ago: float):
+    client_repository = InMemoryClientRepository()
+    command_repository = InMemoryCommandRepository()
+    table = ClientPresenceTable(default_poll_interval=5, unresponsive_poll_intervals=3)
+    last_seen = datetime.now(timezone.utc) - timedelta(seconds=last_seen_ago)
+    await client_repository.save_registered_client(Client(client_id="target", last_seen=last_seen))
+    use_case = SubmitCommandUseCase(client_repository, command_repository, max_wait_time=5,
+                                    event_bus=CommandEventBus(), presence_table=table)
+    return use_case, command_repository, table
+
+
+async def test_submit_to_silent_client_is_rejected_without_queueing():
+    """Business Rule: A client silent for more than N poll intervals fails the submit at once"""
+    use_case, command_repository, _ = await _use_case_with_client(last_seen_ago=3600)
+
+    response = await use_case.execute_command_submission(CommandSubmissionRequest("target", "echo hi"))
+
+    assert response.submission_successful is False
+    assert "has not polled for 3600 seconds" in response.submission_message
+    assert await command_repository.get_all_commands() == []
+
+
+async def test_pickup_deadline_queues_and_withdraws_the_unfetched_command():
+    """Business Rule: With a pickup deadline the command waits only that long for an unresponsive client"""
+    use_case, command_repository, _ = await _use_case_with_client(last_seen_ago=3600)
+
+    response = await use_case.execute_command_submission(
+        CommandSubmissionRequest("target", "echo hi", pickup_deadline=0.05))
+
+    assert response.submission_successful is False
+    assert "did not pick up the command within 0.05 seconds" in response.error
+    [command] = await command_repository.get_all_commands()
+    assert command.status == "failed"
+
+
+async def test_command_claimed_at_the_pickup_deadline_is_not_withdrawn():
+    """Business Rule: A command the client claims while the deadline passes runs and reports normally"""
+    use_case, command_repository, _ = await _use_case_with_client(last_seen_ago=3600)
+    client_lock = command_repository.client_lock("target")
+    await client_lock.acquire()
+    submission = asyncio.ensure_future(use_case.execute_command_submission(
+        CommandSubmissionRequest("target", "echo hi", pickup_deadline=0.05)))
+
+    # The deadline passes while a poll holds the client's lock and claims the command
+    await asyncio.sleep(0.2)
+    [command] = await command_repository.get_all_commands()
+    command.mark_as_processing()
+    command.mark_as_completed("hi", 0.1)
+    await command_repository.save_command(command)
+    client_lock.release()
+
+    response = await asyncio.wait_for(submission, timeout=2)
+    assert response.submission_successful is True
+    assert response.result == "hi"
+
+
+async def test_responsive_client_reports_expected_pickup_from_its_poll_interval():
+    """Business Rule: The submit response tells when the target's next poll is due"""
+    use_case, _, table = await _use_case_with_client(last_seen_ago=0)
+    now = datetime.now(timezone.utc)
+    for seconds_ago in (8, 6, 4, 2):
+        table.record_seen("target", seen_at=now - timedelta(seconds=seconds_ago))
+
+    response = await use_case.queue_command_submission(CommandSubmissionRequest("target", "echo hi"))
+
+    assert response.submission_successful is True
+    assert 0.0 < response.expected_pickup_seconds <= 2.0
+
+
+async def test_idle_client_obeying_the_poll_hint_stays_responsive():
+    """Business Rule: A client sleeping the next_poll_after it was given is not taken for silent"""
+    _, _, table = await _use_case_with_client(last_seen_ago=0)
+    seen_at = datetime.now(timezone.utc)
+    table.record_seen("target", seen_at=seen_at)
+    hint = PollPacer(max_delay=30).next_poll_after("target", queue_depth=0)
+    table.record_poll_hint("target", hint, issued_at=seen_at)
+    client = Client(client_id="target", last_seen=seen_at)
+
+    for seconds_later in (21, 30, 45):
+        estimate = table.estimate_pickup(client, now=seen_at + timedelta(seconds=seconds_later))
+        assert estimate.responsive is True
+    assert table.estimate_pickup(client, now=seen_at + timedelta(seconds=10)).expected_seconds == 20.0
+    assert table.estimate_pickup(client, now=seen_at + timedelta(seconds=120)).responsive is False
+
+
+async def test_client_without_known_hint_may_be_sleeping_the_longest_one():
+    """Business Rule: After a restart a client gets the longest poll hint before counting as silent"""
+    table = ClientPresenceTable(default_poll_interval=5, unresponsive_poll_intervals=3, max_poll_hint=30)
+    seen_at = datetime.now(timezone.utc)
+    client = Client(client_id="target", last_seen=seen_at)
+    table.track(client)
+
+    assert table.estimate_pickup(client, now=seen_at + timedelta(seconds=40)).responsive is True
+    assert table.estimate_pickup(client, now=seen_at + timedelta(seconds=50)).responsive is False
@@ -0,0 +1,58 @@
+import json
+from brief_bridge.entities.command import Command
+from brief_bridge.repositories.command_repository import WriteAheadLogCommandRepository
+
+
+async def test_saved_commands_survive_restart_by_log_replay(tmp_path):
+    """Business Rule: Commands appended to the log are restored after restart"""
+    repository = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    # Nothing is written until the first save
+    assert not (tmp_path / "commands.log").exists()
+    command = Command.create_new_command(target_client_id="wal-client", content="echo 'hi'")
+    await repository.save_command(command)
+    command.mark_as_processing()
+    await repository.save_command(command)
+    command.mark_as_completed("hi", 0.2)
+    await repository.save_command(command)
+
+    # Each save is one appended record, not a rewrite
+    log_lines = (tmp_path / "commands.log").read_text(encoding="utf-8").splitlines()
+    assert len(log_lines) == 3
+
+    restarted = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    restored = await restarted.find_command_by_id(command.command_id)
+    assert restored is not None
+    assert restored.status == "completed"
+    assert restored.result == "hi"
+    assert await restarted.get_pending_commands_for_client("wal-client") == []
+
+
+async def test_compaction_writes_snapshot_and_truncates_log(tmp_path):
+    """Business Rule: Compaction folds the log into commands.json so restart replays only newer records"""
+    repository = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    first = Command.create_new_command(target_client_id="wal-client", content="echo 1")
+    await repository.save_command(first)
+    await repository.compact()
+
+    snapshot = json.loads((tmp_path / "commands.json").read_text(encoding="utf-8"))
+    assert first.command_id in snapshot
+    assert (tmp_path / "commands.log").read_text(encoding="utf-8") == ""
+
+    second = Command.create_new_command(target_client_id="wal-client", content="echo 2")
+    await repository.save_command(second)
+
+    restarted = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    pending_ids = {cmd.command_id for cmd in await restarted.get_pending_commands_for_client("wal-client")}
+    assert pending_ids == {first.command_id, second.command_id}
+
+
+async def test_torn_log_record_is_skipped_on_replay(tmp_path):
+    """Business Rule: A partially written final record does not prevent startup"""
+    repository = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    command = Command.create_new_command(target_client_id="wal-client", content="echo ok")
+    await repository.save_command(command)
+    with open(tmp_path / "commands.log", "a", encoding="utf-8") as f:
+        f.write('{"command_id": "torn')
+
+    restarted = WriteAheadLogCommandRepository(data_dir=str(tmp_path))
+    assert await restarted.find_command_by_id(command.command_id) is not None